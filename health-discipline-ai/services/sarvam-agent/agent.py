@@ -15,57 +15,230 @@ and POSTs results back to the NestJS webhook.
 Usage:
   python agent.py dev        # Development mode
   python agent.py console    # Console test mode (no phone call)
+  python agent.py start      # Production worker
+  python agent.py supervise  # One worker per core (see supervisor.py)
+  python agent.py startup-profile  # Cold-start timings (see startup_profile.py)
+  python agent.py replay <dir>     # Replay saved transcripts, no audio (see benchmarks/replay_calls.py)
 """
 
 import asyncio
+import contextlib
+import functools
 import json
 import logging
 import os
-import re
-import threading
+import sys
+import tempfile
 import time
-from http.server import BaseHTTPRequestHandler, HTTPServer
 
-import httpx
-from dotenv import load_dotenv
-from livekit.agents import AutoSubscribe, JobContext, WorkerOptions, cli
-from livekit.agents.voice import Agent, AgentSession
-from livekit.plugins import google, sarvam
+if __name__ == "__main__" and sys.argv[1:2] == ["replay"]:
+    # Before the imports below: the replay points metrics, journals and the
+    # Sarvam URL at scratch space and local stand-ins, then imports this
+    # module itself (see benchmarks/replay_calls.py)
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+    import replay_calls
 
-from prompt import build_system_prompt
+    sys.exit(replay_calls.main(sys.argv[2:]))
+
+# Must be imported before livekit.agents: it points prometheus_client at the
+# multiprocess metrics directory shared with the job processes
+import worker_metrics  # isort: skip
+import health_server  # isort: skip
+from dotenv import load_dotenv  # isort: skip
 
 load_dotenv()
 
+if __name__ == "__main__" and sys.argv[1:2] in (["start"], ["supervise"]):
+    # Bind the health port before the livekit/plugin imports below (~2s on a
+    # cold container), so Cloud Run's startup probe isn't racing them.
+    # /ready stays 503 until the worker is actually up. The supervisor only
+    # binds here: no thread may be running yet when it forks the workers.
+    if sys.argv[1:2] == ["start"]:
+        health_server.start()
+    else:
+        health_server.bind()
+
+from livekit.agents import (  # noqa: E402
+    AutoSubscribe,
+    JobContext,
+    JobProcess,
+    JobRequest,
+    WorkerOptions,
+    cli,
+    llm,
+)
+from livekit.agents.metrics import EOUMetrics, LLMMetrics, TTSMetrics  # noqa: E402
+from livekit.agents.voice import Agent, AgentSession  # noqa: E402
+
+# Imported here (not lazily in build_plugins) on purpose: LiveKit preloads
+# every registered plugin package into its forkserver, so job processes
+# fork with google/sarvam already imported instead of importing them each.
+from livekit.plugins import google, sarvam  # noqa: E402
+
+import answer_detector  # noqa: E402
+import hedging  # noqa: E402
+import http_pool  # noqa: E402
+import startup_profile  # noqa: E402
+from capacity import CapacityScheduler, RoomMonitor  # noqa: E402
+import language_packs  # noqa: E402
+from greeting_cache import GreetingAudioCache, pcm_frames  # noqa: E402
+from incremental_extractor import IncrementalExtractor  # noqa: E402
+from latency_tracer import TurnTracer  # noqa: E402
+from plugin_pool import PluginPool, PluginSet  # noqa: E402
+from prompt import build_first_message, build_system_prompt  # noqa: E402
+from response_cache import LeadTrimmer, SpeculativeAcks  # noqa: E402
+from supervisor import Supervisor  # noqa: E402
+from text_sanitizer import StreamingSanitizer  # noqa: E402
+from transcript_store import TranscriptStore  # noqa: E402
+from tts_chunker import ClauseScheduler  # noqa: E402
+from webhook_queue import INLINE_DEADLINE, DeliveryWorker, WebhookQueue  # noqa: E402
+
 logger = logging.getLogger("sarvam-agent")
 logger.setLevel(logging.INFO)
 
-# Language code to Sarvam TTS language code mapping
-SARVAM_LANG_MAP = {
-    "hi": "hi-IN",
-    "te": "te-IN",
-    "ta": "ta-IN",
-    "kn": "kn-IN",
-    "ml": "ml-IN",
-    "bn": "bn-IN",
-    "mr": "mr-IN",
-    "gu": "gu-IN",
-    "pa": "pa-IN",
-    "en": "en-IN",
-}
-
-# Sarvam STT language code mapping
-SARVAM_STT_LANG_MAP = {
-    "hi": "hi-IN",
-    "te": "te-IN",
-    "ta": "ta-IN",
-    "kn": "kn-IN",
-    "ml": "ml-IN",
-    "bn": "bn-IN",
-    "mr": "mr-IN",
-    "gu": "gu-IN",
-    "pa": "pa-IN",
-    "en": "en-IN",
-}
+# Sarvam TTS settings shared by live synthesis and the greeting audio cache;
+# the speaker is per language (see language_packs.py)
+TTS_MODEL = "bulbul:v3"
+TTS_PACE = 0.95  # Slightly slower for elderly patients on phone
+
+# Pre-synthesized greeting clips (see greeting_cache.py)
+GREETING_CACHE_DIR = os.environ.get(
+    "GREETING_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sarvam-greetings")
+)
+
+# Languages whose plugins are built in every job process before a room is
+# assigned (see prewarm). Others are built on demand when the call starts.
+# Every job process runs a single call, so each extra language here is
+# cold-start time, memory and connections that call never uses.
+WARM_LANGUAGES = [
+    lang.strip()
+    for lang in os.environ.get("WARM_LANGUAGES", "hi,en").split(",")
+    if lang.strip()
+]
+
+
+def tts_speaker(lang_code: str) -> str:
+    return language_packs.get(lang_code).tts_speaker
+
+
+@functools.cache
+def build_llm() -> google.LLM:
+    # Language-independent and ~100ms to construct (Gemini client setup),
+    # so one instance is shared by every language's PluginSet in the process
+    return google.LLM(
+        model="gemini-2.0-flash",  # ~280ms TTFT, excellent Indian language support
+        temperature=0.3,
+    )
+
+
+@functools.cache
+def build_backup_llm() -> google.LLM:
+    # Raced against build_llm() when its first token is late (see hedging.py).
+    # A separate, lighter model so a slow or overloaded primary model doesn't
+    # slow the backup down with it.
+    return google.LLM(
+        model=os.environ.get("BACKUP_LLM_MODEL", "gemini-2.0-flash-lite"),
+        temperature=0.3,
+    )
+
+
+def build_tts(pack: language_packs.LanguagePack) -> sarvam.TTS:
+    tts = sarvam.TTS(
+        target_language_code=pack.tts_language,
+        model=TTS_MODEL,
+        speaker=pack.tts_speaker,
+        pace=TTS_PACE,
+        speech_sample_rate=8000,  # 8kHz — matches telephony codec, smaller chunks = faster streaming
+        enable_preprocessing=True,  # Normalize numbers/abbreviations before synthesis
+    )
+    # Swap the plugin's stock sentence tokenizer (no danda support, fixed
+    # 20-char minimum) for clause-aware units — see tts_chunker.py. The plugin
+    # exposes no constructor arg for this, so set it on the options directly.
+    tts._opts.word_tokenizer = ClauseScheduler()
+    return tts
+
+
+def build_plugins(lang_code: str) -> PluginSet:
+    """Construct the STT/LLM/TTS trio for one language, plus backups for
+    hedged requests unless HEDGING=0."""
+    pack = language_packs.get(lang_code)
+    return PluginSet(
+        language=lang_code,
+        stt=sarvam.STT(
+            language=pack.stt_language,
+            model="saaras:v3",
+            mode="transcribe",
+            flush_signal=True,  # Emit speech start/end events for turn-taking
+        ),
+        llm=build_llm(),
+        tts=build_tts(pack),
+        # The backup TTS is the same voice on its own client and connection,
+        # so a stalled synthesis stream can be sidestepped mid-call
+        backup_llm=build_backup_llm() if hedging.HEDGING_ENABLED else None,
+        backup_tts=build_tts(pack) if hedging.HEDGING_ENABLED else None,
+    )
+
+
+def prewarm(proc: JobProcess):
+    """Runs in each job process before a room is assigned — build plugins and
+    load the greeting clips up front. Per-stage timings go to
+    proc.userdata["prewarm_ms"] (reported by startup-profile)."""
+    timings = proc.userdata.setdefault("prewarm_ms", {})
+    with startup_profile.stage(timings, "plugins"):
+        pool = PluginPool(build_plugins)
+        pool.warm(WARM_LANGUAGES)
+        proc.userdata["plugin_pool"] = pool
+    with startup_profile.stage(timings, "greeting_cache"):
+        greeting_cache = GreetingAudioCache(GREETING_CACHE_DIR, tts_speaker, TTS_PACE)
+        clips = greeting_cache.preload()
+        proc.userdata["greeting_cache"] = greeting_cache
+    with startup_profile.stage(timings, "webhook_queue"):
+        proc.userdata["webhook_queue"] = WebhookQueue()
+    logger.info(
+        f"Prewarmed {len(WARM_LANGUAGES)} language(s), {clips} greeting clip(s): "
+        + ", ".join(f"{k}={v:.0f}ms" for k, v in timings.items())
+    )
+
+
+async def deliver_webhook(webhooks: WebhookQueue, entry: dict) -> None:
+    """Attempt delivery within the job; anything left over is retried by the
+    main process's DeliveryWorker from the journal."""
+    try:
+        await asyncio.wait_for(webhooks.deliver(entry), INLINE_DEADLINE)
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Webhook for callId={entry['key']} still pending after {INLINE_DEADLINE:.0f}s; "
+            "left for background retry"
+        )
+
+
+@functools.cache
+def get_scheduler() -> CapacityScheduler:
+    # Main worker process only: request_fnc and load_fnc run there
+    return CapacityScheduler()
+
+
+async def request_fnc(req: JobRequest):
+    """Accept dispatched rooms that carry a callId and fit the capacity budget.
+
+    Over budget, the scheduler waits briefly for a call to end; otherwise the
+    job is rejected and LiveKit dispatches it to another worker.
+    """
+    try:
+        call_id = json.loads(req.room.metadata or "{}").get("callId")
+    except (json.JSONDecodeError, AttributeError):
+        call_id = None
+    if not call_id:
+        logger.warning(f"Rejecting job for room {req.room.name}: metadata has no callId")
+        await req.reject()
+        worker_metrics.record_job(accepted=False)
+        return
+    if not await get_scheduler().admit(req.id):
+        await req.reject()
+        worker_metrics.record_job(accepted=False)
+        return
+    await req.accept()
+    worker_metrics.record_job(accepted=True)
 
 
 class MedicineCheckAgent(Agent):
@@ -78,36 +251,124 @@ class MedicineCheckAgent(Agent):
     - Sarvam 105B for POST-CALL data extraction (via data_extractor.py)
     """
 
-    def __init__(self, patient_data: dict) -> None:
-        lang_code = patient_data.get("preferredLanguage", "hi")
-        tts_lang = SARVAM_LANG_MAP.get(lang_code, "hi-IN")
-        stt_lang = SARVAM_STT_LANG_MAP.get(lang_code, "unknown")
-
+    def __init__(
+        self,
+        patient_data: dict,
+        plugins: PluginSet,
+        greeting_cache: GreetingAudioCache | None = None,
+        tracer: TurnTracer | None = None,
+        monitor: RoomMonitor | None = None,
+        acks: SpeculativeAcks | None = None,
+    ) -> None:
         super().__init__(
             instructions=build_system_prompt(patient_data),
-            stt=sarvam.STT(
-                language=stt_lang,
-                model="saaras:v3",
-                mode="transcribe",
-                flush_signal=True,  # Emit speech start/end events for turn-taking
-            ),
-            llm=google.LLM(
-                model="gemini-2.0-flash",  # ~280ms TTFT, excellent Indian language support
-                temperature=0.3,
-            ),
-            tts=sarvam.TTS(
-                target_language_code=tts_lang,
-                model="bulbul:v3",
-                speaker="simran",  # Energetic, cheery female voice
-                pace=0.95,  # Slightly slower for elderly patients on phone
-                speech_sample_rate=8000,  # 8kHz — matches telephony codec, smaller chunks = faster streaming
-                enable_preprocessing=True,  # Normalize numbers/abbreviations before synthesis
-            ),
+            stt=plugins.stt,
+            llm=plugins.llm,
+            tts=plugins.tts,
         )
+        self._lang_code = plugins.language
+        self._pack = language_packs.get(plugins.language)
+        self._backup_llm = plugins.backup_llm
+        self._backup_tts = plugins.backup_tts
+        self._first_message = build_first_message(patient_data)
+        self._greeting_cache = greeting_cache
+        self._tracer = tracer
+        self._monitor = monitor
+        self._acks = acks
 
     async def on_enter(self):
-        """Called when user joins — agent starts the conversation."""
-        self.session.generate_reply()
+        """Called when user joins — agent starts the conversation.
+
+        If the greeting was pre-synthesized (usually while the phone rang),
+        play it straight from the audio cache; Gemini takes over from the
+        patient's reply. Otherwise fall back to generating the greeting.
+        """
+        clip = (
+            self._greeting_cache.get(self._lang_code, self._first_message)
+            if self._greeting_cache
+            else None
+        )
+        if clip is None:
+            self.session.generate_reply()
+            return
+        pcm, sample_rate = clip
+        logger.info(f"Playing cached greeting: {self._first_message}")
+        self.session.say(self._first_message, audio=pcm_frames(pcm, sample_rate))
+
+    def _cached_ack(self, chat_ctx: llm.ChatContext, text: str) -> tuple[str, tuple] | None:
+        """Pre-synthesized acknowledgement for the patient's reply `text` to
+        the last agent turn in chat_ctx, as (phrase, clip) — see response_cache.py."""
+        if self._acks is None or self._greeting_cache is None or not text:
+            return None
+        agent_turns = [
+            item for item in chat_ctx.items
+            if item.type == "message" and item.role == "assistant"
+        ]
+        if not agent_turns:
+            return None
+        ack = self._acks.lookup(agent_turns[-1].text_content or "", len(agent_turns), text)
+        if ack is None:
+            return None
+        clip = self._greeting_cache.get(self._lang_code, ack)
+        return (ack, clip) if clip is not None else None
+
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        """Play a cached acknowledgement for routine answers right away; the
+        LLM reply (usually already preempted) is queued behind it."""
+        cached = self._cached_ack(turn_ctx, new_message.text_content or "")
+        if cached is None:
+            return
+        ack, (pcm, sample_rate) = cached
+        logger.info(f"Playing cached acknowledgement: {ack}")
+        worker_metrics.record_speculative_ack(self._lang_code)
+        self.session.say(ack, audio=pcm_frames(pcm, sample_rate))
+
+    async def stt_node(self, audio, model_settings):
+        """Default STT node, counted as an open stream for capacity planning."""
+        with self._monitor.stream("stt") if self._monitor else contextlib.nullcontext():
+            async for event in Agent.default.stt_node(self, audio, model_settings):
+                yield event
+
+    async def tts_node(self, text, model_settings):
+        """Default TTS node, counted as an open stream for capacity planning.
+
+        Hedged: if no audio arrives within the pack's tts_hedge_after of the
+        first text, the backup TTS synthesizes the same text alongside it
+        (see hedging.py).
+        """
+        tee = hedging.TextTee(text)
+
+        async def backup():
+            async with self._backup_tts.stream(
+                conn_options=self.session.conn_options.tts_conn_options
+            ) as stream:
+
+                async def forward() -> None:
+                    async for chunk in tee.reader():
+                        stream.push_text(chunk)
+                    stream.end_input()
+
+                forward_task = asyncio.create_task(forward())
+                try:
+                    async for ev in stream:
+                        yield ev.frame
+                finally:
+                    forward_task.cancel()
+                    await asyncio.gather(forward_task, return_exceptions=True)
+
+        try:
+            with self._monitor.stream("tts") if self._monitor else contextlib.nullcontext():
+                async for frame in hedging.hedge(
+                    "tts",
+                    self._lang_code,
+                    self._pack.tts_hedge_after,
+                    lambda: Agent.default.tts_node(self, tee.reader(), model_settings),
+                    backup if self._backup_tts is not None else None,
+                    clock_start=tee.first_text,
+                ):
+                    yield frame
+        finally:
+            await tee.aclose()
 
     async def llm_node(self, chat_ctx, tools, model_settings):
         """Override LLM node to strip markdown/emoji from output before TTS.
@@ -115,23 +376,61 @@ class MedicineCheckAgent(Agent):
         Gemini sometimes returns **bold**, *italic*, #headings, or emoji that
         Sarvam TTS can't synthesize — producing silence or garbled audio.
         Cleaning the text here prevents 'no audio frames' and cutoff issues.
+        See text_sanitizer.py for the single-pass streaming implementation.
         """
-        async for event in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
-            if hasattr(event, "text") and event.text:
-                cleaned = event.text
-                cleaned = re.sub(r"[*_#`~>|]", "", cleaned)  # strip markdown chars
-                cleaned = re.sub(  # strip emoji
-                    r"[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF"
-                    r"\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF"
-                    r"\U00002702-\U000027B0\U0000FE00-\U0000FE0F"
-                    r"\U0001F900-\U0001F9FF\U0001FA00-\U0001FA6F]+",
-                    "", cleaned,
-                )
-                if cleaned.strip():
-                    event.text = cleaned
-                    yield event
+        sanitizer = StreamingSanitizer()
+        # When on_user_turn_completed plays a cached acknowledgement for this
+        # turn, drop Gemini's opening sentence if it's the same phrase, so it
+        # isn't said twice
+        last = chat_ctx.items[-1] if chat_ctx.items else None
+        cached = (
+            self._cached_ack(chat_ctx, last.text_content or "")
+            if last is not None and last.type == "message" and last.role == "user"
+            else None
+        )
+        trimmer = LeadTrimmer([cached[0]]) if cached else None
+
+        async def backup():
+            async with self._backup_llm.chat(
+                chat_ctx=chat_ctx,
+                tools=tools,
+                tool_choice=model_settings.tool_choice,
+                conn_options=self.session.conn_options.llm_conn_options,
+            ) as stream:
+                async for chunk in stream:
+                    yield chunk
+
+        # Hedged: if Gemini's first token is later than the pack's
+        # llm_hedge_after, the backup model is asked too (see hedging.py)
+        async for chunk in hedging.hedge(
+            "llm",
+            self._lang_code,
+            self._pack.llm_hedge_after,
+            lambda: Agent.default.llm_node(self, chat_ctx, tools, model_settings),
+            backup if self._backup_llm is not None else None,
+        ):
+            if isinstance(chunk, str):
+                cleaned = sanitizer.push(chunk)
+                if trimmer and cleaned:
+                    cleaned = trimmer.push(cleaned)
+                if cleaned:
+                    if self._tracer:
+                        self._tracer.first_token()
+                    yield cleaned
+            elif isinstance(chunk, llm.ChatChunk) and chunk.delta and chunk.delta.content:
+                cleaned = sanitizer.push(chunk.delta.content)
+                if trimmer and cleaned:
+                    cleaned = trimmer.push(cleaned)
+                if not cleaned and not chunk.delta.tool_calls:
+                    continue
+                if cleaned and self._tracer:
+                    self._tracer.first_token()
+                chunk.delta.content = cleaned
+                yield chunk
             else:
-                yield event
+                yield chunk
+        if trimmer and (rest := trimmer.flush()):
+            yield rest
 
 
 async def entrypoint(ctx: JobContext):
@@ -154,60 +453,117 @@ async def entrypoint(ctx: JobContext):
         logger.error("Room metadata missing callId, cannot proceed")
         return
 
-    # Wait for the SIP participant (patient) to connect (60s timeout)
-    logger.info(f"Room {room_name}: waiting for SIP participant to join...")
-    remote_participants = list(ctx.room.remote_participants.values())
-    if remote_participants:
-        participant = remote_participants[0]
-        logger.info(f"Participant already in room: {participant.identity}")
-    else:
-        try:
-            participant = await asyncio.wait_for(
-                ctx.wait_for_participant(), timeout=60
-            )
-            logger.info(f"Participant joined: {participant.identity}")
-        except asyncio.TimeoutError:
-            logger.warning(
-                f"No participant joined room {room_name} within 60s — patient didn't answer. "
-                f"callId={call_id}"
-            )
-            # POST no_answer webhook so backend can trigger retry
-            if webhook_url:
-                try:
-                    async with httpx.AsyncClient(timeout=15) as client:
-                        await client.post(webhook_url, json={
-                            "callId": call_id,
-                            "roomName": room_name,
-                            "transcript": [],
-                            "duration": 0,
-                            "terminationReason": "no_answer",
-                        })
-                    logger.info(f"No-answer webhook sent for callId={call_id}")
-                except Exception as e:
-                    logger.error(f"Failed to send no-answer webhook: {e}")
-            return
+    # Lease prewarmed plugins and start opening STT/LLM/TTS connections now,
+    # so they're ready by the time the patient picks up
+    pool = ctx.proc.userdata.get("plugin_pool") or PluginPool(build_plugins)
+    # Unknown/missing languages resolve to the default pack, so plugins,
+    # metric labels and the prompt all agree on one language
+    pack = language_packs.get(patient_data.get("preferredLanguage"))
+    lang_code = pack.code
+    plugins = pool.lease(lang_code)
+    webhooks = ctx.proc.userdata.get("webhook_queue") or WebhookQueue()
+
+    active_rooms = worker_metrics.ACTIVE_ROOMS.labels(language=lang_code)
+    active_rooms.inc()
+    # Per-room CPU / loop lag / stream counts for the capacity scheduler
+    monitor = RoomMonitor(ctx.job.id, room_name, lang_code)
+    loop_lag_task = asyncio.create_task(
+        worker_metrics.monitor_loop_lag(on_sample=monitor.sample)
+    )
+
+    # Post-call webhook POSTs started by on_close
+    deliveries: list[asyncio.Task] = []
+
+    async def on_shutdown():
+        active_rooms.dec()
+        loop_lag_task.cancel()
+        monitor.close()
+        # Shutdown can start while on_close's POST is still in flight; closing
+        # the pool under it would leave the result to the DeliveryWorker,
+        # HANDOFF_AGE later. Bounded: the entry is journaled either way.
+        if deliveries:
+            await asyncio.wait(deliveries, timeout=INLINE_DEADLINE)
+        await http_pool.aclose()
+
+    ctx.add_shutdown_callback(on_shutdown)
+
+    # Synthesize the greeting (then stock phrases) into the audio cache while
+    # ringing; no-op for clips already cached from earlier calls
+    greeting_cache = ctx.proc.userdata.get("greeting_cache") or GreetingAudioCache(
+        GREETING_CACHE_DIR, tts_speaker, TTS_PACE
+    )
+    greeting_warm_task = asyncio.create_task(
+        greeting_cache.warm(
+            plugins.tts,
+            lang_code,
+            [build_first_message(patient_data), *pack.stock_phrases],
+        )
+    )
+
+    # Wait for the patient to pick up, or for the dial to fail — busy,
+    # rejected and unreachable numbers are known within seconds from the SIP
+    # participant's call status (see answer_detector.py)
+    logger.info(f"Room {room_name}: waiting for the patient to answer...")
+    participant, dial_outcome = await answer_detector.wait_for_answer(ctx.room)
+    if participant is None:
+        logger.warning(
+            f"Call not answered in room {room_name} ({dial_outcome}). callId={call_id}"
+        )
+        greeting_warm_task.cancel()
+        if dial_outcome == answer_detector.NO_ANSWER:
+            # Still ringing after ANSWER_TIMEOUT — hang up the dial
+            await ctx.delete_room()
+        # POST the outcome so backend can trigger retry
+        if webhook_url:
+            entry = webhooks.enqueue(webhook_url, {
+                "callId": call_id,
+                "roomName": room_name,
+                "transcript": [],
+                "duration": 0,
+                "terminationReason": dial_outcome,
+            })
+            await deliver_webhook(webhooks, entry)
+        # Hand the job slot back now instead of when the room empties
+        ctx.shutdown(reason=dial_outcome)
+        return
+    logger.info(f"Participant answered: {participant.identity}")
 
     logger.info(
         f"Starting call for patient {patient_data.get('patientName', '?')}, "
         f"callId={call_id}, room={room_name}"
     )
 
-    # Track conversation transcript in real-time
-    transcript: list[dict] = []
+    # Track conversation transcript in real-time (see transcript_store.py)
+    transcript = TranscriptStore()
     call_start_time = time.time()
+    tracer = TurnTracer(lang_code)
+    medicines = [m["name"] for m in patient_data.get("medicines", []) if m.get("name")]
+    # Structured result built turn by turn (see incremental_extractor.py)
+    extractor = IncrementalExtractor(
+        medicines,
+        os.environ.get("SARVAM_API_KEY"),
+        transcript,
+    )
 
     # Create agent and session
-    agent = MedicineCheckAgent(patient_data)
+    agent = MedicineCheckAgent(
+        patient_data,
+        plugins,
+        greeting_cache,
+        tracer,
+        monitor,
+        SpeculativeAcks(pack, medicines),
+    )
     session = AgentSession(
         # Use Sarvam STT-based turn detection (recommended by Sarvam docs)
         # Sarvam STT emits speech start/end events via flush_signal=True
         turn_detection="stt",
         # --- Endpointing (latency-sensitive) ---
         # In STT mode, min_endpointing_delay is ADDITIVE with Sarvam STT's own
-        # end-of-speech signal (~70ms). 0.3s + 70ms = ~370ms — still generous for
-        # elderly patients but 400ms faster than the previous 0.7s setting.
-        min_endpointing_delay=0.3,
-        max_endpointing_delay=3.5,
+        # end-of-speech signal (~70ms). 0.3s + 70ms = ~370ms by default — still
+        # generous for elderly patients; tuned per language in language_packs.py
+        min_endpointing_delay=pack.min_endpointing_delay,
+        max_endpointing_delay=pack.max_endpointing_delay,
         # --- Interruption handling (fixes audio cutoff) ---
         # min_interruption_duration: require 800ms of speech to count as interruption
         # min_interruption_words: require 2+ transcribed words — prevents "hmm"/"haan"/
@@ -226,126 +582,110 @@ async def entrypoint(ctx: JobContext):
 
     # Event to signal session closure
     session_closed = asyncio.Event()
+    termination_reason = "call_ended"
 
     # Real-time transcript capture via conversation_item_added
     # This fires for BOTH user and agent messages when committed to chat history
     @session.on("conversation_item_added")
     def on_conversation_item(event):
         try:
-            item = getattr(event, "item", event)
-            role = getattr(item, "role", "")
-            if role == "system":
-                return
-
-            text = ""
-            content = getattr(item, "content", None)
-            if isinstance(content, list):
-                text = " ".join(
-                    str(getattr(c, "text", ""))
-                    for c in content
-                    if hasattr(c, "text") and getattr(c, "text", None)
-                ).strip()
-            elif isinstance(content, str):
-                text = content.strip()
-            if not text and hasattr(item, "text"):
-                text = str(item.text).strip()
-            if not text and hasattr(item, "text_content"):
-                tc = item.text_content
-                text = (tc() if callable(tc) else str(tc)).strip()
-
-            if text:
-                mapped = "user" if role == "user" else "agent"
-                transcript.append({"role": mapped, "message": text})
-                logger.info(f"[transcript:{mapped}] {text[:100]}")
+            turn = transcript.add_item(event.item)
+            if turn is not None:
+                extractor.add_turn(turn)
+                logger.info(f"[transcript:{turn.role.value}] {turn.text[:100]}")
         except Exception as e:
             logger.error(f"conversation_item_added handler error: {e}")
 
     # Fallback: also capture user speech via user_input_transcribed
-    last_user_speech_end = [0.0]  # Track when user stops speaking (for latency)
-
     @session.on("user_input_transcribed")
     def on_user_input(event):
+        nonlocal termination_reason
         text = getattr(event, "transcript", "") or getattr(event, "text", "")
         is_final = getattr(event, "is_final", True)
         if text.strip() and is_final:
-            last_user_speech_end[0] = time.time()
+            tracer.stt_final()
             logger.info(f"[STT] Patient said: {text}")
-
-    # Latency instrumentation — log time from user speech end to agent speech start
-    @session.on("agent_speech_started")
-    def on_agent_speech_started(event):
-        if last_user_speech_end[0] > 0:
-            latency_ms = int((time.time() - last_user_speech_end[0]) * 1000)
-            logger.info(f"[latency] STT→LLM→TTS: {latency_ms}ms")
+            # A voicemail greeting or carrier announcement answered instead
+            if (
+                termination_reason == "call_ended"
+                and time.time() - call_start_time < answer_detector.ANNOUNCEMENT_WINDOW
+                and answer_detector.is_announcement(text)
+            ):
+                logger.warning(f"Announcement instead of patient, ending call. callId={call_id}")
+                termination_reason = answer_detector.VOICEMAIL
+                session.shutdown(drain=False)
+
+    # --- Per-turn latency tracing (see latency_tracer.py) ---
+    @session.on("user_state_changed")
+    def on_user_state_changed(event):
+        if event.old_state == "speaking" and event.new_state == "listening":
+            tracer.user_speech_ended(event.created_at)
+
+    @session.on("metrics_collected")
+    def on_metrics_collected(event):
+        m = event.metrics
+        if isinstance(m, EOUMetrics):
+            tracer.endpointing(m.end_of_utterance_delay)
+        elif isinstance(m, LLMMetrics) and not m.cancelled:
+            tracer.llm_ttft(m.ttft)
+        elif isinstance(m, TTSMetrics) and not m.cancelled:
+            tracer.tts_first_audio(m.ttfb)
+
+    @session.on("agent_state_changed")
+    def on_agent_state_changed(event):
+        if event.new_state == "speaking":
+            latency_ms = tracer.playout_started(event.created_at)
+            if latency_ms is not None:
+                logger.info(f"[latency] user speech end → agent speech: {latency_ms:.0f}ms")
+
+    @session.on("error")
+    def on_error(event):
+        worker_metrics.record_plugin_error(event.error)
 
     @session.on("close")
     def on_close():
-        """Session closed — POST webhook synchronously before process exits.
+        """Session closed — journal the post-call webhook and start delivering it.
 
         The LiveKit agent framework kills the process immediately after
-        the entrypoint coroutine completes, so async POSTs never finish.
-        Using sync httpx here ensures the webhook is sent before shutdown.
+        the entrypoint coroutine completes, so the result is fsynced to the
+        webhook journal here and entrypoint awaits the async POST before
+        returning. See webhook_queue.py.
         """
         call_duration = int(time.time() - call_start_time)
 
-        # Quick chat_ctx fallback for transcript (sync-safe)
+        # Fallback: rebuild from the session history if no item events arrived
         if not transcript:
-            for _, source in [("agent", agent), ("session", session)]:
-                chat_ctx = getattr(source, "chat_ctx", None) or getattr(
-                    source, "_chat_ctx", None
-                )
-                if not chat_ctx:
-                    continue
-                try:
-                    items = getattr(
-                        chat_ctx, "items", getattr(chat_ctx, "messages", [])
-                    )
-                    for item in items:
-                        role = getattr(item, "role", "")
-                        if role == "system":
-                            continue
-                        text = ""
-                        content = getattr(item, "content", None)
-                        if isinstance(content, list):
-                            text = " ".join(
-                                str(getattr(c, "text", ""))
-                                for c in content
-                                if hasattr(c, "text") and getattr(c, "text", None)
-                            ).strip()
-                        elif isinstance(content, str):
-                            text = content.strip()
-                        if not text and hasattr(item, "text"):
-                            text = str(item.text).strip()
-                        if text:
-                            mapped = "user" if role == "user" else "agent"
-                            transcript.append({"role": mapped, "message": text})
-                    if transcript:
-                        break
-                except Exception:
-                    pass
+            for item in session.history.items:
+                turn = transcript.add_item(item)
+                if turn is not None:
+                    extractor.add_turn(turn)
 
         logger.info(
             f"AgentSession closed — callId={call_id}, duration={call_duration}s, "
             f"transcript_entries={len(transcript)}"
         )
+        logger.info(f"[latency] call summary: {json.dumps(tracer.summary())}")
 
-        # Sync webhook POST — runs before process exits
+        # Journal the result before returning (survives a crash or a down
+        # backend); the POST itself runs in the background and entrypoint
+        # waits for it before the process exits
         if webhook_url:
             try:
-                with httpx.Client(timeout=15) as client:
-                    resp = client.post(
-                        webhook_url,
-                        json={
-                            "callId": call_id,
-                            "roomName": room_name,
-                            "transcript": transcript,
-                            "duration": call_duration,
-                            "terminationReason": "call_ended",
-                        },
-                    )
-                logger.info(f"Webhook POST: status={resp.status_code}")
-            except Exception as e:
-                logger.error(f"Failed to POST webhook: {e}")
+                entry = webhooks.enqueue(
+                    webhook_url,
+                    {
+                        "callId": call_id,
+                        "roomName": room_name,
+                        "transcript": transcript.to_payload(),
+                        "duration": call_duration,
+                        "terminationReason": termination_reason,
+                        "latency": tracer.summary(),
+                        "extraction": extractor.finish(),
+                    },
+                )
+                deliveries.append(asyncio.create_task(deliver_webhook(webhooks, entry)))
+            except OSError as e:
+                logger.error(f"Failed to journal webhook for callId={call_id}: {e}")
         else:
             logger.warning("No webhookUrl, skipping post-call report")
 
@@ -358,35 +698,61 @@ async def entrypoint(ctx: JobContext):
     )
     logger.info("AgentSession started, agent will generate greeting via on_enter()")
 
-    # Wait for the call to end (on_close posts webhook and sets this event)
+    # Wait for the call to end (on_close journals the webhook and sets this
+    # event), then for its delivery attempt — the process exits after we return
     await session_closed.wait()
+    greeting_warm_task.cancel()
+    if termination_reason == answer_detector.VOICEMAIL:
+        await ctx.delete_room()  # hang up rather than talk to the recorder
+    await asyncio.gather(*deliveries, return_exceptions=True)
+    transcript.close()
+
+
+def worker_options(**overrides) -> WorkerOptions:
+    return WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        request_fnc=request_fnc,
+        # Load is normalised to the capacity budget (see capacity.py);
+        # LiveKit also sizes its idle prewarmed-process pool from it
+        load_fnc=get_scheduler().load,
+        load_threshold=float(os.environ.get("LOAD_THRESHOLD", "0.95")),
+        prewarm_fnc=prewarm,
+        **overrides,
+    )
 
 
-# --- Cloud Run health check server ---
-# Cloud Run requires an HTTP endpoint. This runs in a background thread
-# while the LiveKit agent worker runs in the main thread.
-
-class HealthHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-        self.wfile.write(b'{"status":"ok","service":"sarvam-agent-worker"}')
+def start_background_services():
+    # Health check server for Cloud Run (already bound for start/supervise,
+    # see the top of this file); /metrics is served from here too
+    health_server.start()
 
-    def log_message(self, format, *args):
-        pass  # Silence per-request logs
+    # Retry/replay webhooks left pending by job processes (and by previous
+    # runs); it makes a last pass at exit
+    DeliveryWorker().start()
 
 
-def start_health_server():
-    port = int(os.environ.get("PORT", 8080))
-    server = HTTPServer(("0.0.0.0", port), HealthHandler)
-    logger.info(f"Health check server listening on :{port}")
-    server.serve_forever()
+def run_supervised_worker(slot: int):
+    """Body of one forked worker in supervisor mode (see supervisor.py)."""
+    health_server.close_inherited()
+    # Each worker's LiveKit HTTP server needs its own port
+    port = int(os.environ.get("LIVEKIT_WORKER_PORT", "8081")) + slot
+    sys.argv = [sys.argv[0], "start"]
+    cli.run_app(worker_options(port=port))
 
 
 if __name__ == "__main__":
-    # Start health check server in background thread (for Cloud Run)
-    health_thread = threading.Thread(target=start_health_server, daemon=True)
-    health_thread.start()
+    if sys.argv[1:2] == ["startup-profile"]:
+        sys.exit(startup_profile.main(prewarm, sys.argv[2:]))
+
+    if sys.argv[1:2] == ["supervise"]:
+        # Health/metrics and the webhook sender live in the supervisor only,
+        # started once the first workers are forked
+        def on_started():
+            start_background_services()
+            health_server.mark_ready()
+
+        sys.exit(Supervisor(run_supervised_worker, on_started=on_started).run())
 
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    start_background_services()
+    health_server.mark_ready()
+    cli.run_app(worker_options())
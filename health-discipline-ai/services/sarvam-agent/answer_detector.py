@@ -0,0 +1,173 @@
+"""
+Event-driven answer detection for outbound SIP calls.
+
+The backend's CreateSIPParticipant (apps/api sarvam-agent.service.ts) puts
+the callee into the room as soon as dialing starts, and LiveKit moves its
+sip.callStatus attribute dialing → ringing → active when the patient picks
+up. A failed dial disconnects the participant with a reason instead
+(USER_REJECTED for busy/declined, USER_UNAVAILABLE when the carrier gives
+up ringing). Waiting on those room events rather than a fixed 60s
+wait_for_participant means a busy or unreachable number hands its job slot
+back within a few seconds, and the webhook says which outcome it was.
+
+Voicemail and operator announcements ("the number you are calling is
+switched off") often arrive as an answered call, so the first thing the
+"patient" says is checked against a short phrase list (is_announcement).
+
+Unanswered outcomes go out as a zero-duration, empty-transcript webhook,
+which the backend (sarvam-webhook.controller.ts) records as no_answer and
+retries; terminationReason keeps the precise outcome.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+
+from livekit import rtc
+
+import worker_metrics
+
+logger = logging.getLogger("answer-detector")
+
+# Participant attribute LiveKit SIP keeps up to date for the call leg
+SIP_CALL_STATUS = "sip.callStatus"
+STATUS_ACTIVE = "active"
+
+# Outcomes (sent as the webhook's terminationReason when not answered)
+ANSWERED = "answered"
+NO_ANSWER = "no_answer"  # rang out, or the carrier reported the callee unavailable
+BUSY = "busy"  # callee busy or declined (SIP 486/603)
+UNANSWERED = "unanswered"  # hung up or dropped while still ringing
+DIAL_FAILED = "dial_failed"  # no SIP participant ever showed up
+SIP_FAILURE = "sip_failure"  # trunk error
+VOICEMAIL = "voicemail"
+
+# A dial that never produced a participant failed before it reached the
+# carrier (the backend's CreateSIPParticipant errored); no point ringing out
+DIAL_TIMEOUT = float(os.environ.get("DIAL_TIMEOUT", "15"))
+# Backstop for a phone that keeps ringing; carriers usually give up first
+ANSWER_TIMEOUT = float(os.environ.get("ANSWER_TIMEOUT", "60"))
+# Only the opening seconds after pickup are checked for announcements
+ANNOUNCEMENT_WINDOW = float(os.environ.get("ANNOUNCEMENT_WINDOW", "12"))
+
+_DISCONNECT_OUTCOMES = {
+    rtc.DisconnectReason.USER_REJECTED: BUSY,
+    rtc.DisconnectReason.USER_UNAVAILABLE: NO_ANSWER,
+    rtc.DisconnectReason.SIP_TRUNK_FAILURE: SIP_FAILURE,
+}
+
+# Carrier announcements and voicemail greetings as Sarvam STT transcribes them
+_ANNOUNCEMENT_PHRASES = [
+    "the number you are calling", "the number you have dialled", "the number you have dialed",
+    "is switched off", "is not reachable", "not reachable", "out of coverage area",
+    "is busy on another call", "please try again later", "please leave a message",
+    "leave your message", "after the tone", "after the beep", "voicemail",
+    "aap jis number", "jis number par aap", "sampark nahi ho", "sampark kiya ja raha",
+    "abhi band hai", "pahunch se bahar", "kripya thodi der baad",
+    "आप जिस नंबर", "जिस नंबर पर आप", "संपर्क नहीं", "स्विच ऑफ", "पहुंच से बाहर",
+    "कृपया थोड़ी देर बाद",
+]
+_ANNOUNCEMENT_RE = re.compile(
+    "|".join(re.escape(p) for p in sorted(_ANNOUNCEMENT_PHRASES, key=len, reverse=True))
+)
+
+
+def is_announcement(text: str) -> bool:
+    """True if an utterance is a voicemail or network announcement."""
+    return _ANNOUNCEMENT_RE.search(" ".join(text.lower().split())) is not None
+
+
+def _is_callee(participant: rtc.RemoteParticipant) -> bool:
+    return getattr(participant, "kind", None) != rtc.ParticipantKind.PARTICIPANT_KIND_AGENT
+
+
+def _is_answered(participant: rtc.RemoteParticipant) -> bool:
+    # Non-SIP participants (web test clients) and SIP servers that don't
+    # publish a call status are in the call as soon as they join
+    if getattr(participant, "kind", None) != rtc.ParticipantKind.PARTICIPANT_KIND_SIP:
+        return True
+    status = participant.attributes.get(SIP_CALL_STATUS)
+    return status is None or status == STATUS_ACTIVE
+
+
+async def wait_for_answer(
+    room: rtc.Room,
+    dial_timeout: float = DIAL_TIMEOUT,
+    answer_timeout: float = ANSWER_TIMEOUT,
+) -> tuple[rtc.RemoteParticipant | None, str]:
+    """Wait until the callee picks up or the dial fails.
+
+    Returns (participant, ANSWERED), or (None, reason) as soon as the outcome
+    is known: BUSY / NO_ANSWER / UNANSWERED / SIP_FAILURE when the SIP leg
+    ends, DIAL_FAILED when no participant joins within dial_timeout, and
+    NO_ANSWER when it is still ringing after answer_timeout.
+    """
+    loop = asyncio.get_running_loop()
+    outcome: asyncio.Future[tuple[rtc.RemoteParticipant | None, str]] = loop.create_future()
+    ringing: set[str] = set()
+
+    def settle(participant: rtc.RemoteParticipant | None, reason: str) -> None:
+        if not outcome.done():
+            outcome.set_result((participant, reason))
+
+    def check(participant: rtc.RemoteParticipant) -> None:
+        if not _is_callee(participant):
+            return
+        if _is_answered(participant):
+            settle(participant, ANSWERED)
+        elif participant.identity not in ringing:
+            ringing.add(participant.identity)
+            logger.info(
+                f"Callee {participant.identity} is "
+                f"{participant.attributes.get(SIP_CALL_STATUS)}"
+            )
+
+    def on_attributes_changed(changed: dict, participant: rtc.Participant) -> None:
+        if SIP_CALL_STATUS in changed and participant.identity in room.remote_participants:
+            check(participant)
+
+    def on_disconnected(participant: rtc.RemoteParticipant) -> None:
+        if not _is_callee(participant):
+            return
+        reason = _DISCONNECT_OUTCOMES.get(participant.disconnect_reason, UNANSWERED)
+        logger.info(
+            f"Callee {participant.identity} left before answering: "
+            f"{rtc.DisconnectReason.Name(participant.disconnect_reason)}"
+        )
+        settle(None, reason)
+
+    started = time.monotonic()
+    for participant in list(room.remote_participants.values()):
+        if _is_callee(participant) and _is_answered(participant):
+            worker_metrics.record_dial_outcome(ANSWERED, 0.0)
+            return participant, ANSWERED
+
+    room.on("participant_connected", check)
+    room.on("participant_attributes_changed", on_attributes_changed)
+    room.on("participant_disconnected", on_disconnected)
+    try:
+        for participant in list(room.remote_participants.values()):
+            check(participant)
+        try:
+            participant, reason = await asyncio.wait_for(
+                asyncio.shield(outcome), dial_timeout
+            )
+        except asyncio.TimeoutError:
+            if not ringing:
+                participant, reason = None, DIAL_FAILED
+            else:
+                try:
+                    participant, reason = await asyncio.wait_for(
+                        outcome, max(answer_timeout - dial_timeout, 0)
+                    )
+                except asyncio.TimeoutError:
+                    participant, reason = None, NO_ANSWER
+    finally:
+        room.off("participant_connected", check)
+        room.off("participant_attributes_changed", on_attributes_changed)
+        room.off("participant_disconnected", on_disconnected)
+
+    worker_metrics.record_dial_outcome(reason, time.monotonic() - started)
+    return participant, reason
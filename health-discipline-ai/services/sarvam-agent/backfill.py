@@ -0,0 +1,364 @@
+"""
+Bulk re-extraction of archived call transcripts (`python backfill.py`).
+
+After an EXTRACTION_PROMPT change, weeks of calls need extracting again.
+This streams call-result webhook payloads from JSONL files (one payload per
+line, optionally .gz) through data_extractor.extract_calls_batch, with
+bounded concurrency and a Sarvam request rate limit, and writes one result
+row per call as it completes. The batch only reads ahead of the rows written
+by about --concurrency calls, so memory stays flat however large the
+archive is.
+
+Rows go to a JSONL file, which is also the checkpoint: a rerun with the
+same --output skips every callId already in it, so an interrupted backfill
+resumes where it stopped (--fresh starts over). --retry-failed also redoes
+calls whose last row failed; a later row for a callId supersedes earlier
+ones. For a .parquet --output the
+JSONL is written next to it (<output>.jsonl) and converted when the run
+finishes; that needs pyarrow (pip install pyarrow).
+
+Each row records how the result was resolved (local, cache, llm, partial,
+fallback, error — see extract_calls_batch) and the PROMPT_VERSION it was
+extracted with. The closing report breaks calls down by that and by input
+problems (unparseable lines, payloads without a callId or transcript), with
+throughput.
+
+Input payloads look like the webhook's: {"callId", "transcript": [{"role",
+"message"}, ...]}. Medicine names, when present as "medicines" (names or
+{"name"} objects) or under "patient", let unambiguous calls resolve
+locally without a Sarvam request.
+
+Usage:
+  python backfill.py archive/2026-09-*.jsonl.gz --output backfill.jsonl
+  python backfill.py archive/ --output backfill.parquet --concurrency 16 --rate 10
+  python backfill.py archive/ --output backfill.jsonl --limit 200 --report report.json
+"""
+
+import argparse
+import asyncio
+import gzip
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from urllib.parse import urlsplit
+
+import data_extractor
+import http_pool
+
+logger = logging.getLogger("backfill")
+
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# Sources that mean the extraction didn't (fully) work
+FAILED_SOURCES = ("partial", "fallback", "error")
+FSYNC_EVERY = 100  # rows between fsyncs of the checkpoint file
+PARQUET_BATCH = 10_000
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def input_files(paths: list[str], exclude: str | None = None) -> Iterator[str]:
+    """The given files, and every *.jsonl / *.jsonl.gz under given
+    directories, except `exclude` (our own checkpoint, if it's in there)."""
+    skip = os.path.abspath(exclude) if exclude else None
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, _, names in sorted(os.walk(path)):
+            for name in sorted(names):
+                file = os.path.join(root, name)
+                if name.endswith((".jsonl", ".jsonl.gz")) and os.path.abspath(file) != skip:
+                    yield file
+
+
+def _medicines(payload: dict) -> list[str] | None:
+    meds = payload.get("medicines")
+    if meds is None:
+        meds = (payload.get("patient") or {}).get("medicines")
+    if not meds:
+        return None
+    names = [m.get("name") if isinstance(m, dict) else m for m in meds]
+    return [n for n in names if isinstance(n, str) and n] or None
+
+
+def read_calls(
+    paths: list[str], done: set[str], problems: Counter, checkpoint: str | None = None
+) -> Iterator[tuple[str, list[dict], list[str] | None]]:
+    """(callId, transcript, medicines) for each call not in done, read lazily.
+
+    Skipped calls are counted in problems: "resumed" (in done), "duplicate"
+    (earlier in the input), and bad lines and payloads by reason.
+    """
+    seen: set[str] = set()
+    for path in input_files(paths, checkpoint):
+        try:
+            f = _open(path)
+        except OSError as e:
+            logger.error(f"Skipping {path}: {e}")
+            problems["unreadable_file"] += 1
+            continue
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    payload = json.loads(line)
+                except json.JSONDecodeError:
+                    problems["bad_json"] += 1
+                    continue
+                if not isinstance(payload, dict) or not payload.get("callId"):
+                    problems["no_call_id"] += 1
+                    continue
+                call_id = str(payload["callId"])
+                transcript = payload.get("transcript")
+                if not isinstance(transcript, list) or not transcript:
+                    problems["no_transcript"] += 1
+                    continue
+                if call_id in seen:
+                    problems["duplicate"] += 1
+                    continue
+                seen.add(call_id)
+                if call_id in done:
+                    problems["resumed"] += 1
+                    continue
+                yield call_id, transcript, _medicines(payload)
+
+
+def _rows(checkpoint: str) -> Iterator[tuple[int, dict]]:
+    """(line number, row) for each intact row of a checkpoint file."""
+    with open(checkpoint, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a row cut off by an interruption; redone
+            if isinstance(row, dict) and "callId" in row:
+                yield i, row
+
+
+def completed_calls(checkpoint: str, retry_failed: bool = False) -> set[str]:
+    """callIds already in a checkpoint file, less those whose last row
+    failed when retry_failed."""
+    if not os.path.exists(checkpoint):
+        return set()
+    latest = {row["callId"]: row.get("source") for _, row in _rows(checkpoint)}
+    return {
+        call_id for call_id, source in latest.items()
+        if not (retry_failed and source in FAILED_SOURCES)
+    }
+
+
+def _open_checkpoint(checkpoint: str, fresh: bool):
+    if fresh or not os.path.exists(checkpoint):
+        return open(checkpoint, "w", encoding="utf-8")
+    with open(checkpoint, "rb") as f:
+        torn = False
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            torn = f.read(1) != b"\n"
+    out = open(checkpoint, "a", encoding="utf-8")
+    if torn:
+        out.write("\n")  # don't glue the next row onto a half-written one
+    return out
+
+
+def to_parquet(checkpoint: str, output: str) -> int:
+    """Convert the JSONL rows to Parquet, one column per extraction field
+    and one row per call (its last)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("callId", pa.string()),
+        ("source", pa.string()),
+        ("promptVersion", pa.string()),
+        ("model", pa.string()),
+        ("extractedAt", pa.float64()),
+        ("medicine_responses", pa.string()),
+        ("vitals_checked", pa.string()),
+        ("glucose", pa.float64()),
+        ("systolic", pa.float64()),
+        ("diastolic", pa.float64()),
+        ("wellness", pa.string()),
+        ("complaints", pa.string()),
+        ("re_scheduled", pa.string()),
+    ])
+
+    def flat(row: dict) -> dict:
+        result = row.pop("extraction")
+        vitals = result.pop("vitals", None) or {}
+        bp = vitals.get("blood_pressure") or {}
+        return {
+            **row,
+            **result,
+            "glucose": vitals.get("glucose"),
+            "systolic": bp.get("systolic"),
+            "diastolic": bp.get("diastolic"),
+        }
+
+    last = {row["callId"]: i for i, row in _rows(checkpoint)}
+    rows = 0
+    tmp = output + ".tmp"
+    with pq.ParquetWriter(tmp, schema) as writer:
+        batch: list[dict] = []
+        for i, row in _rows(checkpoint):
+            if last[row["callId"]] != i:
+                continue
+            batch.append(flat(row))
+            if len(batch) >= PARQUET_BATCH:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                rows += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            rows += len(batch)
+    os.replace(tmp, output)
+    return rows
+
+
+async def run(args: argparse.Namespace, checkpoint: str) -> dict:
+    api_key = os.environ.get("SARVAM_API_KEY")
+    if not api_key:
+        raise SystemExit("SARVAM_API_KEY is not set")
+    # Room for every worker's keep-alive connection (the import-time pool
+    # is sized to the default EXTRACTION_CONCURRENCY)
+    http_pool.configure(
+        urlsplit(data_extractor.SARVAM_API_URL).netloc,
+        max_connections=args.concurrency,
+        timeout=30,
+    )
+    data_extractor.set_rate_limit(args.rate, burst=args.concurrency)
+
+    done = set() if args.fresh else completed_calls(checkpoint, args.retry_failed)
+    if done:
+        logger.info(f"Resuming: {len(done)} call(s) already in {checkpoint}")
+    problems: Counter = Counter()
+    calls = read_calls(args.inputs, done, problems, checkpoint)
+    if args.limit:
+        calls = (call for _, call in zip(range(args.limit), calls))
+
+    sources: Counter = Counter()
+    started = last_progress = time.monotonic()
+    with _open_checkpoint(checkpoint, args.fresh) as out:
+        try:
+            async for call_id, result, source in data_extractor.extract_calls_batch(
+                calls, api_key, args.concurrency
+            ):
+                out.write(json.dumps({
+                    "callId": call_id,
+                    "source": source,
+                    "promptVersion": data_extractor.PROMPT_VERSION,
+                    "model": data_extractor.SARVAM_MODEL,
+                    "extractedAt": time.time(),
+                    "extraction": result,
+                }, ensure_ascii=False) + "\n")
+                sources[source] += 1
+                extracted = sum(sources.values())
+                if extracted % FSYNC_EVERY == 0:
+                    out.flush()
+                    # Off the loop: the batch waits on this consumer, and
+                    # Sarvam streams in flight shouldn't stall on the disk
+                    await asyncio.to_thread(os.fsync, out.fileno())
+                now = time.monotonic()
+                if now - last_progress >= args.progress:
+                    last_progress = now
+                    logger.info(
+                        f"{extracted} extracted, {extracted / (now - started):.1f}/s, "
+                        f"{sum(sources[s] for s in FAILED_SOURCES)} failed"
+                    )
+        finally:
+            out.flush()
+            os.fsync(out.fileno())
+            await data_extractor.close_client()
+    elapsed = time.monotonic() - started
+
+    extracted = sum(sources.values())
+    return {
+        "output": args.output,
+        "promptVersion": data_extractor.PROMPT_VERSION,
+        "extracted": extracted,
+        "elapsed_s": round(elapsed, 2),
+        "calls_per_s": round(extracted / elapsed, 2) if elapsed else None,
+        "sarvam_calls_per_s": round(
+            sum(sources[s] for s in ("llm", "partial", "fallback")) / elapsed, 2
+        ) if elapsed else None,
+        "sources": dict(sources.most_common()),
+        "failed": sum(sources[s] for s in FAILED_SOURCES),
+        "skipped": dict(problems.most_common()),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"extracted  {report['extracted']} call(s) in {report['elapsed_s']:.1f}s — "
+        f"{report['calls_per_s'] or 0:.2f} calls/s "
+        f"({report['sarvam_calls_per_s'] or 0:.2f}/s through Sarvam), "
+        f"prompt {report['promptVersion']}"
+    )
+    print("sources    " + (", ".join(f"{k}={v}" for k, v in report["sources"].items()) or "none"))
+    print(f"failed     {report['failed']} (partial, fallback or error; --retry-failed redoes them)")
+    if report["skipped"]:
+        print("skipped    " + ", ".join(f"{k}={v}" for k, v in report["skipped"].items()))
+    print(f"output     {report['output']}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("inputs", nargs="+", help="JSONL(.gz) files or directories of them")
+    parser.add_argument("--output", required=True, help="results file (.jsonl or .parquet)")
+    parser.add_argument(
+        "--concurrency", type=int, default=data_extractor.EXTRACTION_CONCURRENCY,
+        help="in-flight extractions",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=data_extractor.EXTRACTION_RATE_LIMIT,
+        help="max Sarvam requests per second (0 = no limit)",
+    )
+    parser.add_argument("--limit", type=int, help="stop after this many calls")
+    parser.add_argument("--fresh", action="store_true", help="ignore earlier progress in --output")
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="also redo calls whose last row failed"
+    )
+    parser.add_argument("--progress", type=float, default=30.0, help="seconds between progress lines")
+    parser.add_argument("--report", help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    # Per-call extraction logs would drown the progress lines
+    logging.getLogger("data-extractor").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    parquet = args.output.endswith(".parquet")
+    if parquet and not PARQUET_AVAILABLE:
+        print("Parquet output needs pyarrow (pip install pyarrow); use a .jsonl --output")
+        return 2
+    checkpoint = args.output + ".jsonl" if parquet else args.output
+
+    try:
+        report = asyncio.run(run(args, checkpoint))
+    except KeyboardInterrupt:
+        print(f"interrupted; rerun the same command to resume from {checkpoint}")
+        return 130
+    if parquet:
+        rows = to_parquet(checkpoint, args.output)
+        logger.info(f"Wrote {rows} row(s) to {args.output} (checkpoint kept at {checkpoint})")
+
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+Offline end-to-end benchmark: N concurrent rooms through agent.entrypoint.
+
+Each call runs the real entrypoint (plugin lease, greeting cache, transcript
+store, incremental extraction, webhook journal and delivery) against the
+local stand-ins in fakes.py: STT/LLM/TTS plugins, a Sarvam chat endpoint and
+the call-result webhook, each with its own latency distribution. Scripted
+multilingual patients (call_scripts.json) answer every agent turn; after the
+webhook lands, the call's transcript also goes through extract_call_data.
+
+Reports calls/sec, turn-latency percentiles (end of patient speech → first
+agent audio frame, so endpointing, LLM TTFT, sanitizer, clause scheduling
+and TTS first byte all count), post-call extraction latency, process CPU
+time per call and per turn, event-loop lag, and resident memory per
+concurrent room. --fail-p95-ms turns it into a regression gate.
+
+All rooms share this one process and event loop, whereas production runs
+one job process per call, so memory per room here is the incremental cost
+of a call (session, transcript, buffers), not a job process's footprint.
+
+Each PluginSet also gets a backup LLM and TTS (same latency distributions
+unless --backup-llm-ttft / --backup-tts-ttfb say otherwise) for hedged
+requests; --no-hedge leaves them out to compare.
+
+--speed compresses the patient's speech, think time and agent playout
+(not service latencies), so calls finish faster while turn latency is still
+measured in real time.
+
+Usage:
+  python benchmarks/bench_calls.py
+  python benchmarks/bench_calls.py --rooms 50 --calls 200 --speed 10
+  python benchmarks/bench_calls.py --llm-ttft lognormal:300:900 --sarvam-latency lognormal:1200:4000
+  python benchmarks/bench_calls.py --llm-ttft lognormal:300:2500 --no-hedge
+  python benchmarks/bench_calls.py --json results.json --fail-p95-ms 1500
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# Everything the agent writes goes to a scratch directory, and Sarvam is the
+# local stand-in. Set before the imports below: these are read at import.
+SCRATCH = tempfile.mkdtemp(prefix="bench-calls-")
+atexit.register(shutil.rmtree, SCRATCH, ignore_errors=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+SERVICES_PORT = _free_port()
+for _name, _value in {
+    "PROMETHEUS_MULTIPROC_DIR": os.path.join(SCRATCH, "metrics"),
+    "WEBHOOK_JOURNAL_DIR": os.path.join(SCRATCH, "webhooks"),
+    "ROOM_STATS_DIR": os.path.join(SCRATCH, "rooms"),
+    "GREETING_CACHE_DIR": os.path.join(SCRATCH, "greetings"),
+    "TRANSCRIPT_SPILL_DIR": SCRATCH,
+    "SARVAM_API_URL": f"http://127.0.0.1:{SERVICES_PORT}/chat/completions",
+}.items():
+    os.environ[_name] = _value
+os.environ.setdefault("SARVAM_API_KEY", "bench")
+os.makedirs(os.environ["WEBHOOK_JOURNAL_DIR"], exist_ok=True)
+
+import psutil  # noqa: E402
+
+import agent  # noqa: E402
+import http_pool  # noqa: E402
+import worker_metrics  # noqa: E402
+import fakes  # noqa: E402
+from data_extractor import extract_call_data  # noqa: E402
+from greeting_cache import GreetingAudioCache  # noqa: E402
+from plugin_pool import PluginPool, PluginSet  # noqa: E402
+from webhook_queue import WebhookQueue  # noqa: E402
+
+CALL_TIMEOUT = 300.0
+LOOP_LAG_INTERVAL = 0.05
+
+# entrypoint builds its session from this module global; the bench session
+# runs on fake audio I/O instead of a LiveKit room
+agent.AgentSession = fakes.BenchSession
+# Production closes a job's pooled HTTP clients at shutdown because the loop
+# dies with the job process. Here every room shares one loop, so that would
+# close clients other calls are mid-request on; the run closes them at the end.
+_close_http_pool = http_pool.aclose
+
+
+async def _keep_http_pool(host: str | None = None) -> None:
+    pass
+
+
+http_pool.aclose = _keep_http_pool
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def _ms(value: float | None) -> str:
+    return f"{value * 1000:7.0f}ms" if value is not None else "      n/a"
+
+
+class Bench:
+    # Run each finished call's transcript through extract_call_data
+    post_call_extraction = True
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        rng = random.Random(args.seed)
+        self.rng = rng
+        self.scripts = self.load_scripts()
+        if args.languages:
+            wanted = set(args.languages.split(","))
+            self.scripts = [
+                s for s in self.scripts if s["patient"]["preferredLanguage"] in wanted
+            ]
+        if not self.scripts:
+            raise SystemExit("no call scripts selected")
+
+        self.stt_latency = fakes.Latency(args.stt_latency, rng)
+        self.llm_ttft = fakes.Latency(args.llm_ttft, rng)
+        self.llm_chunk = fakes.Latency(args.llm_chunk, rng)
+        self.tts_ttfb = fakes.Latency(args.tts_ttfb, rng)
+        self.backup_llm_ttft = fakes.Latency(args.backup_llm_ttft or args.llm_ttft, rng)
+        self.backup_tts_ttfb = fakes.Latency(args.backup_tts_ttfb or args.tts_ttfb, rng)
+        self.think = fakes.Latency(args.think, rng)
+        self.services = fakes.FakeServices(
+            SERVICES_PORT,
+            fakes.Latency(args.sarvam_latency, rng),
+            fakes.Latency(args.webhook_latency, rng),
+            args.sarvam_error_rate,
+            rng,
+            args.sarvam_truncate_rate,
+        )
+
+        self.turn_latencies: list[float] = []
+        self.extraction_latencies: list[float] = []
+        self.loop_lags: list[float] = []
+        self.call_durations: list[float] = []
+        self.failures: list[str] = []
+        self.active = 0
+        self.peak_active = 0
+        self.peak_rss = 0
+
+    def load_scripts(self) -> list[dict]:
+        with open(self.args.scripts, encoding="utf-8") as f:
+            return json.load(f)
+
+    def build_plugins(self, lang: str) -> PluginSet:
+        return PluginSet(
+            language=lang,
+            stt=fakes.FakeSTT(lang, self.stt_latency),
+            llm=fakes.FakeLLM(self.llm_ttft, self.llm_chunk),
+            tts=fakes.FakeTTS(self.tts_ttfb),
+            backup_llm=None
+            if self.args.no_hedge
+            else fakes.FakeLLM(self.backup_llm_ttft, self.llm_chunk),
+            backup_tts=None if self.args.no_hedge else fakes.FakeTTS(self.backup_tts_ttfb),
+        )
+
+    async def _sample_memory(self) -> None:
+        proc = psutil.Process()
+        while True:
+            self.peak_rss = max(self.peak_rss, proc.memory_info().rss)
+            await asyncio.sleep(0.2)
+
+    async def _call(self, index: int, userdata: dict, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            script = self.scripts[index % len(self.scripts)]
+            call_id = f"bench-{index:05d}"
+            metadata = {
+                **script["patient"],
+                "callId": call_id,
+                "webhookUrl": f"{self.services.base_url}/webhook",
+            }
+            caller = fakes.ScriptedCaller(
+                script, self.args.speed, self.think, max_duration=CALL_TIMEOUT / 2
+            )
+            fakes.CURRENT_CALLER.set(caller)
+            ctx = fakes.FakeJobContext(call_id, metadata, userdata)
+
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(agent.entrypoint(ctx), CALL_TIMEOUT)
+            except Exception as e:
+                self.failures.append(f"{call_id} ({script['name']}): {e!r}")
+                return
+            finally:
+                self.active -= 1
+                await ctx.shutdown()
+            self.call_durations.append(time.monotonic() - started)
+            self.turn_latencies.extend(caller.turn_latencies)
+            if not self.post_call_extraction:
+                return
+
+            payload = self.services.webhooks.get(call_id)
+            if payload is None:
+                self.failures.append(f"{call_id} ({script['name']}): no webhook received")
+                return
+            medicines = [m["name"] for m in script["patient"].get("medicines", [])]
+            t0 = time.monotonic()
+            await extract_call_data(payload["transcript"], os.environ["SARVAM_API_KEY"], medicines)
+            self.extraction_latencies.append(time.monotonic() - t0)
+
+    async def run(self) -> dict:
+        self.services.start()
+        userdata = {
+            "plugin_pool": PluginPool(self.build_plugins),
+            "greeting_cache": GreetingAudioCache(
+                os.environ["GREETING_CACHE_DIR"], agent.tts_speaker, agent.TTS_PACE
+            ),
+            "webhook_queue": WebhookQueue(),
+        }
+        proc = psutil.Process()
+        baseline_rss = proc.memory_info().rss
+        cpu_before = proc.cpu_times()
+        sampler = asyncio.create_task(self._sample_memory())
+        lag_monitor = asyncio.create_task(
+            worker_metrics.monitor_loop_lag(LOOP_LAG_INTERVAL, self.loop_lags.append)
+        )
+        slots = asyncio.Semaphore(self.args.rooms)
+        started = time.monotonic()
+        try:
+            await asyncio.gather(
+                *(self._call(i, userdata, slots) for i in range(self.args.calls))
+            )
+        finally:
+            wall = time.monotonic() - started
+            cpu_after = proc.cpu_times()
+            sampler.cancel()
+            lag_monitor.cancel()
+            await _close_http_pool()
+            self.services.stop()
+
+        completed = len(self.call_durations)
+        cpu_s = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+        return {
+            "config": {
+                k: v for k, v in vars(self.args).items() if k not in ("json", "verbose")
+            },
+            "calls": {
+                "completed": completed,
+                "failed": len(self.failures),
+                "wall_s": round(wall, 2),
+                "calls_per_s": round(completed / wall, 3) if wall else None,
+                "peak_concurrent": self.peak_active,
+                "mean_duration_s": round(sum(self.call_durations) / completed, 2)
+                if completed
+                else None,
+            },
+            "turn_latency_s": self._percentiles(self.turn_latencies),
+            "extraction_latency_s": self._percentiles(self.extraction_latencies),
+            "cpu": {
+                "seconds": round(cpu_s, 2),
+                "utilization": round(cpu_s / wall, 3) if wall else None,
+                "per_call_ms": round(cpu_s / completed * 1000, 1) if completed else None,
+                "per_turn_ms": round(cpu_s / len(self.turn_latencies) * 1000, 2)
+                if self.turn_latencies
+                else None,
+            },
+            "loop_lag_s": self._percentiles(self.loop_lags),
+            "sarvam": {
+                "requests": self.services.sarvam_requests,
+                "errors": self.services.sarvam_errors,
+                "truncated": self.services.sarvam_truncated,
+            },
+            "memory": {
+                "baseline_mb": round(baseline_rss / 2**20, 1),
+                "peak_mb": round(self.peak_rss / 2**20, 1),
+                "per_room_mb": round(
+                    (self.peak_rss - baseline_rss) / 2**20 / max(1, self.peak_active), 2
+                ),
+            },
+            "failures": self.failures[:20],
+        }
+
+    @staticmethod
+    def _percentiles(values: list[float]) -> dict:
+        return {
+            "count": len(values),
+            **{f"p{p}": percentile(values, p) for p in (50, 90, 95, 99)},
+            "max": max(values) if values else None,
+        }
+
+
+def print_report(result: dict) -> None:
+    calls = result["calls"]
+    print(
+        f"calls      {calls['completed']} completed, {calls['failed']} failed in "
+        f"{calls['wall_s']:.1f}s — {calls['calls_per_s']:.2f} calls/s, "
+        f"peak {calls['peak_concurrent']} concurrent"
+    )
+    for label, key in (
+        ("turns", "turn_latency_s"),
+        ("extraction", "extraction_latency_s"),
+        ("loop lag", "loop_lag_s"),
+    ):
+        stats = result[key]
+        print(
+            f"{label:<10} n={stats['count']:<5} "
+            + " ".join(f"{p}={_ms(stats[p])}" for p in ("p50", "p90", "p95", "p99", "max"))
+        )
+    cpu = result["cpu"]
+    print(
+        f"cpu        {cpu['seconds']:.1f}s ({cpu['utilization']:.0%} of one core), "
+        f"{cpu['per_call_ms']}ms per call, {cpu['per_turn_ms']}ms per turn"
+    )
+    sarvam = result["sarvam"]
+    print(
+        f"sarvam     {sarvam['requests']} requests, {sarvam['errors']} injected errors, "
+        f"{sarvam['truncated']} truncated"
+    )
+    memory = result["memory"]
+    print(
+        f"memory     baseline {memory['baseline_mb']:.0f}MB, peak {memory['peak_mb']:.0f}MB, "
+        f"{memory['per_room_mb']:.2f}MB per concurrent room"
+    )
+    for failure in result["failures"]:
+        print(f"  failed: {failure}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=10, help="concurrent rooms")
+    parser.add_argument("--calls", type=int, default=30, help="total calls")
+    parser.add_argument("--speed", type=float, default=5.0, help="conversation time compression")
+    parser.add_argument("--scripts", default=os.path.join(HERE, "call_scripts.json"))
+    parser.add_argument("--languages", help="comma-separated subset of script languages")
+    parser.add_argument("--seed", type=int, default=1)
+    latency = parser.add_argument_group(
+        "latency distributions (fixed:MS | uniform:LO:HI | lognormal:MEDIAN:P95)"
+    )
+    latency.add_argument("--stt-latency", default="lognormal:70:200", help="end of speech → final transcript")
+    latency.add_argument("--llm-ttft", default="lognormal:280:700")
+    latency.add_argument("--llm-chunk", default="uniform:5:20", help="gap between streamed LLM chunks")
+    latency.add_argument("--tts-ttfb", default="lognormal:150:400")
+    latency.add_argument("--sarvam-latency", default="lognormal:900:2500")
+    latency.add_argument("--webhook-latency", default="lognormal:30:120")
+    latency.add_argument("--backup-llm-ttft", help="default: --llm-ttft")
+    latency.add_argument("--backup-tts-ttfb", help="default: --tts-ttfb")
+    latency.add_argument("--think", default="uniform:300:1200", help="patient pause before answering")
+    parser.add_argument("--no-hedge", action="store_true", help="no backup LLM/TTS requests")
+    parser.add_argument("--sarvam-error-rate", type=float, default=0.0, help="fraction of 503s")
+    parser.add_argument(
+        "--sarvam-truncate-rate", type=float, default=0.0,
+        help="fraction of extraction answers cut off mid-JSON",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--fail-p95-ms", type=float, help="exit 1 if turn latency p95 exceeds this")
+    parser.add_argument("--verbose", action="store_true", help="show agent logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.ERROR)
+        agent.logger.setLevel(logging.ERROR)
+
+    result = asyncio.run(Bench(args).run())
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    p95 = result["turn_latency_s"]["p95"]
+    if result["calls"]["failed"]:
+        return 1
+    if args.fail_p95_ms is not None and (p95 is None or p95 * 1000 > args.fail_p95_ms):
+        print(f"turn latency p95 over budget ({args.fail_p95_ms:.0f}ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: streaming text sanitizer vs. the previous two-regex version.
+
+Replays realistic Gemini chunk streams (Hindi/Telugu/English, with and
+without markdown/emoji) through both implementations and reports per-chunk
+cost.
+
+Usage:
+  python benchmarks/bench_sanitizer.py
+  python benchmarks/bench_sanitizer.py --iterations 20000
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_sanitizer import StreamingSanitizer  # noqa: E402
+
+# The implementation llm_node used before text_sanitizer.py
+_LEGACY_EMOJI_PATTERN = (
+    r"[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF"
+    r"\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF"
+    r"\U00002702-\U000027B0\U0000FE00-\U0000FE0F"
+    r"\U0001F900-\U0001F9FF\U0001FA00-\U0001FA6F]+"
+)
+
+
+def legacy_stream(chunks: list[str]) -> list[str]:
+    out = []
+    for chunk in chunks:
+        cleaned = re.sub(r"[*_#`~>|]", "", chunk)
+        cleaned = re.sub(_LEGACY_EMOJI_PATTERN, "", cleaned)
+        if cleaned.strip():
+            out.append(cleaned)
+    return out
+
+
+def streaming(chunks: list[str]) -> list[str]:
+    sanitizer = StreamingSanitizer()
+    out = []
+    for chunk in chunks:
+        cleaned = sanitizer.push(chunk)
+        if cleaned:
+            out.append(cleaned)
+    return out
+
+
+STREAMS = {
+    "hindi_plain": ["नमस्ते ", "रमेश जी", "! आप ", "कैसे ", "हैं? ", "सुबह की ", "दवाई ", "ली?"],
+    "hindi_markdown": ["**", "नमस्ते", "** ", "रमेश जी! ", "😊", " आज ", "*सुबह*", " की दवाई ली?"],
+    "telugu_plain": ["నమస్కారం ", "గారు! ", "ఎలా ", "ఉన్నారు? ", "ఉదయం ", "మందులు ", "వేసుకున్నారా?"],
+    "english_emoji": ["Hello", " Ramesh", "! 👋", " How are", " you", " today", "? 🙏", "#", " Take care"],
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'stream':<16} {'legacy µs/chunk':>16} {'streaming µs/chunk':>20} {'speedup':>8}")
+    for name, chunks in STREAMS.items():
+        legacy = timeit.timeit(lambda: legacy_stream(chunks), number=args.iterations)
+        fast = timeit.timeit(lambda: streaming(chunks), number=args.iterations)
+        per_chunk = 1e6 / (args.iterations * len(chunks))
+        print(
+            f"{name:<16} {legacy * per_chunk:>16.2f} {fast * per_chunk:>20.2f} "
+            f"{legacy / fast:>7.1f}x"
+        )
+
+    sample = STREAMS["hindi_markdown"]
+    print("\nlegacy output:   ", repr("".join(legacy_stream(sample))))
+    print("streaming output:", repr("".join(streaming(sample))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,528 @@
+"""
+Local stand-ins for everything a call touches outside this process, used by
+bench_calls.py.
+
+  Latency            — a latency distribution parsed from a CLI spec
+  ScriptedCaller     — the patient: answers each agent turn from a call
+                       script, hangs up after the last one, and measures
+                       turn latency (end of patient speech → first agent
+                       audio frame)
+  FakeSTT / FakeLLM / FakeTTS
+                     — LiveKit plugin implementations with configurable
+                       latency; the LLM plays the script's agent lines
+  FakeAudioInput / FakeAudioOutput
+                     — real-time silent input frames, and an output that
+                       "plays" audio at the benchmark's speed
+  BenchSession       — AgentSession wired to the fake audio I/O instead of
+                       a LiveKit room
+  FakeJobContext     — just enough JobContext for agent.entrypoint
+  FakeServices       — an aiohttp server (own thread and loop) standing in
+                       for the Sarvam chat endpoint and the NestJS webhook
+
+The current call's ScriptedCaller is found through a context variable, so
+plugins built once per language (as in prewarm) still talk to the right
+caller: asyncio copies context into every task the session creates.
+"""
+
+import asyncio
+import contextvars
+import json
+import math
+import random
+import threading
+import time
+import types
+import uuid
+
+from aiohttp import web
+from livekit import rtc
+from livekit.agents import APIConnectOptions, llm, stt, tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+from livekit.agents.voice import AgentSession, io
+
+CURRENT_CALLER: contextvars.ContextVar["ScriptedCaller"] = contextvars.ContextVar(
+    "current_caller"
+)
+
+TTS_SAMPLE_RATE = 8000  # matches the Sarvam TTS setting in agent.py
+INPUT_SAMPLE_RATE = 16000
+INPUT_FRAME_MS = 20
+CHARS_PER_SECOND = 14.0  # speaking rate used for both sides of the call
+LLM_CHUNK_CHARS = 4
+
+
+class Latency:
+    """Latency distribution from a spec string; sample() returns seconds.
+
+    Specs (milliseconds):
+      fixed:MS
+      uniform:LO:HI
+      lognormal:MEDIAN:P95   — long right tail, the usual shape for API latency
+    """
+
+    def __init__(self, spec: str, rng: random.Random) -> None:
+        self.spec = spec
+        self._rng = rng
+        kind, *params = spec.split(":")
+        try:
+            values = [float(p) / 1000 for p in params]
+        except ValueError:
+            raise ValueError(f"bad latency spec {spec!r}") from None
+        if kind == "fixed" and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda: rng.uniform(values[0], values[1])
+        elif kind == "lognormal" and len(values) == 2 and 0 < values[0] <= values[1]:
+            mu = math.log(values[0])
+            sigma = (math.log(values[1]) - mu) / 1.645
+            self._sample = lambda: rng.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"bad latency spec {spec!r}")
+
+    def sample(self) -> float:
+        return self._sample()
+
+    def __repr__(self) -> str:
+        return self.spec
+
+
+def speech_seconds(text: str) -> float:
+    return max(0.4, len(text) / CHARS_PER_SECOND)
+
+
+class ScriptedCaller:
+    """One patient on one call, driven by a script from call_scripts.json."""
+
+    def __init__(
+        self, script: dict, speed: float, think: Latency, max_duration: float
+    ) -> None:
+        self.script = script
+        self.speed = speed
+        self._think = think
+        self._max_duration = max_duration
+        # (line, pause before saying it) — a turn's "pause" in seconds, e.g.
+        # from a replayed transcript, overrides the sampled think time
+        self._lines = [
+            (t["patient"], t.get("pause")) for t in script["turns"] if t.get("patient")
+        ]
+        self.utterances: asyncio.Queue[str] = asyncio.Queue()
+        self.turn_latencies: list[float] = []
+        self.session: AgentSession | None = None
+        self._speech_end: float | None = None
+        self._hangup: asyncio.TimerHandle | None = None
+        self.hung_up = False
+
+    def agent_line(self, user_turns: int) -> str:
+        turns = self.script["turns"]
+        return turns[min(user_turns, len(turns) - 1)]["agent"]
+
+    def attach(self, session: AgentSession) -> None:
+        self.session = session
+        session.on("agent_state_changed", self._on_agent_state)
+        # Backstop in case the agent stops answering
+        self._hangup = asyncio.get_running_loop().call_later(self._max_duration, self.hang_up)
+
+    def _on_agent_state(self, ev) -> None:
+        if ev.old_state == "speaking" and ev.new_state == "listening":
+            asyncio.create_task(self._reply())
+
+    async def _reply(self) -> None:
+        if not self._lines:
+            self.hang_up()
+            return
+        line, pause = self._lines.pop(0)
+        await asyncio.sleep((self._think.sample() if pause is None else pause) / self.speed)
+        self.utterances.put_nowait(line)
+
+    def speech_ended(self) -> None:
+        self._speech_end = time.monotonic()
+
+    def agent_audio_started(self) -> None:
+        if self._speech_end is not None:
+            self.turn_latencies.append(time.monotonic() - self._speech_end)
+            self._speech_end = None
+
+    def hang_up(self) -> None:
+        if self.hung_up or self.session is None:
+            return
+        self.hung_up = True
+        if self._hangup is not None:
+            self._hangup.cancel()
+        asyncio.create_task(self.session.aclose())
+
+
+# --- STT ---------------------------------------------------------------
+
+
+class FakeSTT(stt.STT):
+    def __init__(self, language: str, latency: Latency) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=True, interim_results=False))
+        self.language = language
+        self.latency = latency
+
+    async def _recognize_impl(self, buffer, *, language=None, conn_options=None):
+        raise NotImplementedError("bench STT is streaming only")
+
+    def stream(self, *, language=None, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return FakeRecognizeStream(stt=self, conn_options=conn_options)
+
+
+class FakeRecognizeStream(stt.RecognizeStream):
+    """Ignores the audio; emits the caller's next line as Sarvam would with
+    flush_signal=True: start of speech, final transcript, end of speech."""
+
+    async def _run(self) -> None:
+        caller = CURRENT_CALLER.get()
+        fake: FakeSTT = self._stt
+        drain = asyncio.create_task(self._drain_input())
+        try:
+            while not drain.done():
+                next_line = asyncio.create_task(caller.utterances.get())
+                await asyncio.wait({next_line, drain}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_line.done():
+                    next_line.cancel()
+                    break
+                text = next_line.result()
+                self._event_ch.send_nowait(
+                    stt.SpeechEvent(type=stt.SpeechEventType.START_OF_SPEECH)
+                )
+                await asyncio.sleep(speech_seconds(text) / caller.speed)
+                caller.speech_ended()
+                await asyncio.sleep(fake.latency.sample())
+                self._event_ch.send_nowait(
+                    stt.SpeechEvent(
+                        type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+                        request_id=uuid.uuid4().hex,
+                        alternatives=[
+                            stt.SpeechData(
+                                language=f"{fake.language}-IN", text=text, confidence=0.92
+                            )
+                        ],
+                    )
+                )
+                self._event_ch.send_nowait(
+                    stt.SpeechEvent(type=stt.SpeechEventType.END_OF_SPEECH)
+                )
+        finally:
+            drain.cancel()
+
+    async def _drain_input(self) -> None:
+        async for _ in self._input_ch:
+            pass
+
+
+# --- LLM ---------------------------------------------------------------
+
+
+class FakeLLM(llm.LLM):
+    def __init__(self, ttft: Latency, chunk_interval: Latency) -> None:
+        super().__init__()
+        self.ttft = ttft
+        self.chunk_interval = chunk_interval
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools=None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        **kwargs,
+    ) -> "FakeLLMStream":
+        return FakeLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class FakeLLMStream(llm.LLMStream):
+    """Streams the script's agent line for this point in the conversation."""
+
+    async def _run(self) -> None:
+        fake: FakeLLM = self._llm
+        user_turns = sum(
+            1 for item in self._chat_ctx.items if getattr(item, "role", None) == "user"
+        )
+        text = CURRENT_CALLER.get().agent_line(user_turns)
+        request_id = uuid.uuid4().hex
+        await asyncio.sleep(fake.ttft.sample())
+        for i in range(0, len(text), LLM_CHUNK_CHARS):
+            if i:
+                await asyncio.sleep(fake.chunk_interval.sample())
+            self._event_ch.send_nowait(
+                llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", content=text[i:i + LLM_CHUNK_CHARS]),
+                )
+            )
+
+
+# --- TTS ---------------------------------------------------------------
+
+
+def _silence(text: str) -> bytes:
+    return bytes(int(speech_seconds(text) * TTS_SAMPLE_RATE) * 2)
+
+
+class FakeTTS(tts.TTS):
+    def __init__(self, ttfb: Latency) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=True),
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+
+    def synthesize(self, text: str, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS):
+        return FakeSynthesizeStream(tts=self, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=uuid.uuid4().hex,
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(self._tts.ttfb.sample())
+        output_emitter.push(_silence(self._input_text))
+
+
+class FakeSynthesizeStream(tts.SynthesizeStream):
+    """One segment per stream; audio for each text chunk once the first
+    byte latency has passed."""
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        output_emitter.initialize(
+            request_id=uuid.uuid4().hex,
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+            stream=True,
+        )
+        started = False
+        async for data in self._input_ch:
+            if isinstance(data, self._FlushSentinel):
+                if started:
+                    output_emitter.end_segment()
+                    started = False
+                continue
+            if not started:
+                output_emitter.start_segment(segment_id=utils.shortuuid())
+                await asyncio.sleep(self._tts.ttfb.sample())
+                started = True
+            output_emitter.push(_silence(data))
+        if started:
+            output_emitter.end_segment()
+
+
+# --- audio I/O ---------------------------------------------------------
+
+
+class FakeAudioInput(io.AudioInput):
+    """Silent microphone frames at real-time pace, like a quiet phone line."""
+
+    def __init__(self) -> None:
+        super().__init__(label="bench-input")
+        self._samples = INPUT_SAMPLE_RATE * INPUT_FRAME_MS // 1000
+        self._data = bytes(self._samples * 2)
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        await asyncio.sleep(INPUT_FRAME_MS / 1000)
+        return rtc.AudioFrame(self._data, INPUT_SAMPLE_RATE, 1, self._samples)
+
+
+class FakeAudioOutput(io.AudioOutput):
+    """Discards agent audio, reporting playout as if it played at caller speed."""
+
+    def __init__(self, caller: ScriptedCaller) -> None:
+        super().__init__(
+            label="bench-output",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+            sample_rate=TTS_SAMPLE_RATE,
+        )
+        self._caller = caller
+        self._segment_start: float | None = None
+        self._segment_duration = 0.0
+        self._playout: asyncio.Task | None = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if self._segment_start is None:
+            self._segment_start = time.monotonic()
+            self._segment_duration = 0.0
+            self._caller.agent_audio_started()
+            self.on_playback_started(created_at=time.time())
+        self._segment_duration += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if self._segment_start is None:
+            return
+        remaining = self._segment_start + self._segment_duration / self._caller.speed
+        duration = self._segment_duration
+        self._segment_start = None
+        self._playout = asyncio.create_task(self._finish(remaining - time.monotonic(), duration))
+
+    async def _finish(self, delay: float, duration: float) -> None:
+        await asyncio.sleep(max(0.0, delay))
+        self.on_playback_finished(playback_position=duration, interrupted=False)
+
+    def clear_buffer(self) -> None:
+        if self._playout is not None and not self._playout.done():
+            self._playout.cancel()
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        elif self._segment_start is not None:
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        self._segment_start = None
+
+
+class BenchSession(AgentSession):
+    """AgentSession on fake audio I/O; the `room` argument is ignored."""
+
+    async def start(self, agent, *, room=None, **kwargs):
+        caller = CURRENT_CALLER.get()
+        self.input.audio = FakeAudioInput()
+        self.output.audio = FakeAudioOutput(caller)
+        caller.attach(self)
+        return await super().start(agent, **kwargs)
+
+
+# --- job context -------------------------------------------------------
+
+
+class FakeJobContext:
+    """The parts of livekit.agents.JobContext that agent.entrypoint uses,
+    with the patient already in the room."""
+
+    def __init__(self, job_id: str, metadata: dict, userdata: dict) -> None:
+        self.job = types.SimpleNamespace(id=job_id)
+        self.proc = types.SimpleNamespace(userdata=userdata)
+        participant = types.SimpleNamespace(identity=f"sip_{job_id}", attributes={})
+        self.room = types.SimpleNamespace(
+            name=f"bench-{job_id}",
+            metadata=json.dumps(metadata),
+            remote_participants={participant.identity: participant},
+        )
+        self._shutdown_callbacks = []
+
+    async def connect(self, **kwargs) -> None:
+        pass
+
+    async def wait_for_participant(self, **kwargs):
+        return next(iter(self.room.remote_participants.values()))
+
+    def add_shutdown_callback(self, callback) -> None:
+        self._shutdown_callbacks.append(callback)
+
+    async def shutdown(self) -> None:
+        for callback in self._shutdown_callbacks:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                await result
+
+
+# --- Sarvam + webhook --------------------------------------------------
+
+
+class FakeServices:
+    """Sarvam chat completions and the call-result webhook on localhost.
+
+    Runs in its own thread and event loop so the stand-ins' own overhead
+    doesn't show up as event-loop lag in the process being measured.
+    """
+
+    def __init__(
+        self,
+        port: int,
+        sarvam_latency: Latency,
+        webhook_latency: Latency,
+        error_rate: float,
+        rng: random.Random,
+        truncate_rate: float = 0.0,
+    ) -> None:
+        self.port = port
+        self.sarvam_latency = sarvam_latency
+        self.webhook_latency = webhook_latency
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self._rng = rng
+        self.webhooks: dict[str, dict] = {}  # callId → payload
+        self.sarvam_requests = 0
+        self.sarvam_errors = 0
+        self.sarvam_truncated = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: web.AppRunner | None = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="bench-services", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.sarvam_requests += 1
+        await asyncio.sleep(self.sarvam_latency.sample())
+        if self._rng.random() < self.error_rate:
+            self.sarvam_errors += 1
+            return web.json_response({"error": "overloaded"}, status=503)
+        content = json.dumps({
+            "medicine_responses": "",
+            "vitals_checked": "unclear",
+            "vitals": {"glucose": None, "blood_pressure": {"systolic": None, "diastolic": None}},
+            "wellness": "good",
+            "complaints": "none",
+            "re_scheduled": "false",
+        })
+        finish_reason = "stop"
+        if self._rng.random() < self.truncate_rate:
+            # Ran into max_tokens somewhere in the middle of the object
+            self.sarvam_truncated += 1
+            content = content[: self._rng.randrange(1, len(content))]
+            finish_reason = "length"
+        if not body.get("stream"):
+            return web.json_response({
+                "choices": [{
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }]
+            })
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for start in range(0, len(content), 16):
+            delta = {"choices": [{"delta": {"content": content[start:start + 16]}}]}
+            await response.write(f"data: {json.dumps(delta)}\n\n".encode())
+        done = {"choices": [{"delta": {}, "finish_reason": finish_reason}]}
+        await response.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+        await response.write_eof()
+        return response
+
+    async def _webhook(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        await asyncio.sleep(self.webhook_latency.sample())
+        self.webhooks[payload.get("callId", "")] = payload
+        return web.json_response({"ok": True})
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_post("/chat/completions", self._chat)
+        app.router.add_post("/webhook", self._webhook)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        self._loop.run_until_complete(site.start())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> None:
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
@@ -0,0 +1,217 @@
+"""
+Replay archived call transcripts through agent.entrypoint, without audio.
+
+`python agent.py replay <dir>` (or this script directly) turns every saved
+transcript in <dir> into a scripted call and runs them concurrently in one
+process on bench_calls.py's stand-ins: each patient line arrives as a
+synthetic STT event, the LLM stand-in says the agent's original line back,
+and audio output is silent frames played at --speed. The patient's pauses
+are the original ones, recovered from the turn timestamps.
+
+Service latencies default to zero, so what's left is the Python side of a
+call — session event handlers, llm_node (sanitizer, trimmer, hedging),
+transcript capture and incremental extraction, webhook journaling. The
+report's CPU per call/turn, event-loop lag and memory per concurrent room
+are the numbers for sizing instances: how many rooms fit on a core before
+loop lag turns into dead air.
+
+Input: *.json files holding a call-result webhook payload ({"callId",
+"transcript": [{"role", "message", "timestamp"}, ...]}, timestamps in epoch
+ms) or a list of them, and *.jsonl files with one payload per line. A
+payload may carry a "patient" object shaped like call_scripts.json's
+(patientName, preferredLanguage, medicines, ...); without one the call is
+replayed as a --language patient with no medicine list.
+
+Usage:
+  python agent.py replay transcripts/
+  python agent.py replay transcripts/ --rooms 50 --calls 500 --speed 20
+  python agent.py replay transcripts/ --llm-ttft lognormal:280:700 --json replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+# Sets up the scratch environment and stand-ins before agent is imported
+import bench_calls  # noqa: E402
+
+import agent  # noqa: E402
+import fakes  # noqa: E402
+import language_packs  # noqa: E402
+
+logger = logging.getLogger("replay")
+
+# Longer gaps (patient left the phone, hold music) are capped
+MAX_PAUSE = 30.0
+
+
+def load_payloads(directory: str) -> list[tuple[str, dict]]:
+    """(source name, webhook payload) for every transcript under directory."""
+    payloads: list[tuple[str, dict]] = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                if name.endswith(".jsonl"):
+                    docs = [json.loads(line) for line in f if line.strip()]
+                elif name.endswith(".json"):
+                    doc = json.load(f)
+                    docs = doc if isinstance(doc, list) else [doc]
+                else:
+                    continue
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Skipping {path}: {e}")
+            continue
+        for i, doc in enumerate(docs):
+            if isinstance(doc, dict) and isinstance(doc.get("transcript"), list):
+                payloads.append((doc.get("callId") or f"{name}#{i}", doc))
+    return payloads
+
+
+def _groups(transcript: list[dict]) -> list[tuple[str, str, float | None, float | None]]:
+    """Consecutive turns by the same speaker merged: (role, text, first, last timestamp)."""
+    groups: list[tuple[str, str, float | None, float | None]] = []
+    for turn in transcript:
+        role = turn.get("role")
+        text = (turn.get("message") or "").strip()
+        if role not in ("agent", "user") or not text:
+            continue
+        ts = turn["timestamp"] / 1000 if turn.get("timestamp") else None
+        if groups and groups[-1][0] == role:
+            _, prev_text, first, _ = groups[-1]
+            groups[-1] = (role, f"{prev_text} {text}", first, ts)
+        else:
+            groups.append((role, text, ts, ts))
+    while groups and groups[0][0] != "agent":
+        groups.pop(0)  # the greeting comes first in a replay
+    return groups
+
+
+def to_script(name: str, payload: dict, language: str) -> dict | None:
+    """A call_scripts.json-shaped script for one archived call.
+
+    Turn timestamps are when the agent started speaking and when the
+    patient's final transcript arrived, so the patient's pause before
+    answering is the gap between them less both lines' speaking time.
+    """
+    groups = _groups(payload["transcript"])
+    turns: list[dict] = []
+    for i in range(0, len(groups), 2):
+        _, agent_text, agent_at, _ = groups[i]
+        turn: dict = {"agent": agent_text, "patient": None}
+        if i + 1 < len(groups):
+            _, patient_text, _, patient_at = groups[i + 1]
+            turn["patient"] = patient_text
+            if agent_at and patient_at:
+                gap = (
+                    patient_at - agent_at
+                    - fakes.speech_seconds(agent_text)
+                    - fakes.speech_seconds(patient_text)
+                )
+                turn["pause"] = min(max(gap, 0.0), MAX_PAUSE)
+        turns.append(turn)
+    if not turns:
+        return None
+    if turns[-1]["patient"] is not None:
+        # The patient spoke last (hung up on the agent); the stand-in LLM
+        # still needs a line to answer with before the call ends
+        turns.append({"agent": turns[-1]["agent"], "patient": None})
+    patient = payload.get("patient") or {}
+    return {
+        "name": name,
+        "patient": {
+            "patientName": "ji",
+            "preferredLanguage": language,
+            "medicines": [],
+            **patient,
+        },
+        "turns": turns,
+    }
+
+
+class ReplayBench(bench_calls.Bench):
+    """bench_calls.Bench over scripts built from archived transcripts."""
+
+    post_call_extraction = False
+
+    def __init__(self, args: argparse.Namespace, scripts: list[dict]) -> None:
+        self._replay_scripts = scripts
+        super().__init__(args)
+
+    def load_scripts(self) -> list[dict]:
+        return self._replay_scripts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="agent.py replay", description=__doc__.splitlines()[1])
+    parser.add_argument("directory", help="archived webhook payloads (*.json, *.jsonl)")
+    parser.add_argument("--rooms", type=int, default=20, help="concurrent rooms")
+    parser.add_argument("--calls", type=int, help="total calls (default: one per transcript)")
+    parser.add_argument(
+        "--speed", type=float, default=1.0,
+        help="time compression for speech and pauses (1 = original timing)",
+    )
+    parser.add_argument(
+        "--language", default=language_packs.DEFAULT_LANGUAGE,
+        help="language for payloads without patient data",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    latency = parser.add_argument_group(
+        "service latencies (fixed:MS | uniform:LO:HI | lognormal:MEDIAN:P95)"
+    )
+    latency.add_argument("--stt-latency", default="fixed:0")
+    latency.add_argument("--llm-ttft", default="fixed:0")
+    latency.add_argument("--llm-chunk", default="fixed:0")
+    latency.add_argument("--tts-ttfb", default="fixed:0")
+    latency.add_argument("--webhook-latency", default="fixed:0")
+    parser.add_argument("--no-hedge", action="store_true", help="no backup LLM/TTS requests")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show agent logs")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.ERROR)
+        agent.logger.setLevel(logging.ERROR)
+
+    scripts = [
+        script
+        for name, payload in load_payloads(args.directory)
+        if (script := to_script(name, payload, args.language)) is not None
+    ]
+    if not scripts:
+        print(f"no replayable transcripts in {args.directory}")
+        return 1
+    # Bench options replay doesn't expose: no extraction, patient pauses
+    # come from the transcripts (think is only a fallback)
+    bench_args = argparse.Namespace(
+        **vars(args),
+        scripts=None,
+        languages=None,
+        think="fixed:500",
+        backup_llm_ttft=None,
+        backup_tts_ttfb=None,
+        sarvam_latency="fixed:0",
+        sarvam_error_rate=0.0,
+        sarvam_truncate_rate=0.0,
+    )
+    if bench_args.calls is None:
+        bench_args.calls = len(scripts)
+    print(f"replaying {bench_args.calls} call(s) from {len(scripts)} transcript(s)")
+
+    result = asyncio.run(ReplayBench(bench_args, scripts).run())
+    bench_calls.print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["calls"]["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Job admission and load reporting for the agent worker.
+
+LiveKit's default load figure is host CPU only, and the default request
+handler accepts every dispatch. A morning dialing burst can therefore pile
+more live audio pipelines onto one instance than it can serve, and every
+call on it degrades together (choppy TTS, slow turns).
+
+Two halves, split across LiveKit's process model:
+
+  RoomMonitor (job process) — one per call. Samples the job process's CPU,
+      its event-loop lag and its open STT/TTS streams, and publishes them as
+      a small JSON file under ROOM_STATS_DIR (atomic replace), keyed by job
+      id. The file is removed when the job shuts down.
+
+  CapacityScheduler (main worker process) — reads those files to compute
+      load for WorkerOptions.load_fnc, normalised so 1.0 means "at budget"
+      on whichever dimension is tightest: host CPU, rooms, streams or loop
+      lag. admit() is called from request_fnc. It accepts while under
+      budget. When over budget it waits up to ADMISSION_DEFER_SECONDS for a
+      call to end, then rejects so LiveKit re-dispatches to another worker.
+
+Host CPU is read from one sampler thread per scheduler, so load_fnc and
+admit() see the same figure instead of each resetting psutil's shared
+cpu_percent() baseline for the other.
+
+The budgets are for the whole instance. In supervisor mode every worker
+process has its own scheduler over the same ROOM_STATS_DIR, so an accepted
+job that isn't reporting yet is recorded there as a pending placeholder
+(replaced by the job's own stats once its monitor publishes), and admit()
+checks and reserves under a file lock: two workers can't both take the
+last slot. load_fnc runs on a LiveKit executor thread and admit()'s checks
+on asyncio's default executor; the file lock covers those too.
+
+Budgets come from the environment; defaults are sized for one vCPU per
+ROOMS_PER_CPU concurrent calls.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import psutil
+
+logger = logging.getLogger("capacity")
+
+ROOM_STATS_DIR = os.environ.get(
+    "ROOM_STATS_DIR", os.path.join(tempfile.gettempdir(), "sarvam-agent-rooms")
+)
+ROOMS_PER_CPU = int(os.environ.get("ROOMS_PER_CPU", "4"))
+MAX_ROOMS = int(os.environ.get("MAX_ROOMS", str((os.cpu_count() or 1) * ROOMS_PER_CPU)))
+# Each call holds one STT stream and up to one TTS stream at a time
+MAX_STREAMS = int(os.environ.get("MAX_STREAMS", str(MAX_ROOMS * 2)))
+CPU_BUDGET = float(os.environ.get("CPU_BUDGET", "0.8"))  # host CPU fraction
+LOOP_LAG_BUDGET = float(os.environ.get("LOOP_LAG_BUDGET", "0.1"))  # seconds
+ADMISSION_DEFER_SECONDS = float(os.environ.get("ADMISSION_DEFER_SECONDS", "3"))
+# Accepted jobs count against the budget until their monitor reports in
+PENDING_TTL = 30.0
+STALE_AFTER = 10.0
+CPU_SAMPLE_INTERVAL = 1.0  # seconds
+
+
+def _publish(path: str, stats: dict) -> None:
+    """Write a stats file atomically (readers never see a partial file)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stats, f)
+    os.replace(tmp_path, path)
+
+
+class RoomMonitor:
+    """Publishes one call's resource usage for the main process's scheduler."""
+
+    def __init__(self, job_id: str, room: str, language: str, directory: str = ROOM_STATS_DIR):
+        self.job_id = job_id
+        self.room = room
+        self.language = language
+        os.makedirs(directory, exist_ok=True)
+        self._path = os.path.join(directory, f"{job_id}.json")
+        self._proc = psutil.Process()
+        self._proc.cpu_percent(None)  # prime: the first reading is always 0
+        self.streams = {"stt": 0, "tts": 0}
+        self.loop_lag = 0.0
+
+    @contextlib.contextmanager
+    def stream(self, kind: str):
+        """Count an open STT/TTS stream for as long as the block runs."""
+        self.streams[kind] += 1
+        try:
+            yield
+        finally:
+            self.streams[kind] -= 1
+
+    def sample(self, loop_lag: float) -> None:
+        """Record a loop-lag sample and publish the room's stats."""
+        self.loop_lag = loop_lag
+        stats = {
+            "job_id": self.job_id,
+            "pid": os.getpid(),
+            "room": self.room,
+            "language": self.language,
+            "cpu": self._proc.cpu_percent(None) / 100,
+            "loop_lag": loop_lag,
+            "streams": sum(self.streams.values()),
+            "updated": time.time(),
+        }
+        try:
+            _publish(self._path, stats)
+        except OSError as e:
+            logger.warning(f"Failed to publish room stats: {e}")
+
+    def close(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._path)
+
+
+class CapacityScheduler:
+    """Main-process view of all rooms on this instance."""
+
+    def __init__(
+        self,
+        max_rooms: int = MAX_ROOMS,
+        max_streams: int = MAX_STREAMS,
+        cpu_budget: float = CPU_BUDGET,
+        loop_lag_budget: float = LOOP_LAG_BUDGET,
+        directory: str = ROOM_STATS_DIR,
+    ) -> None:
+        self.max_rooms = max(1, max_rooms)
+        self.max_streams = max(1, max_streams)
+        self.cpu_budget = cpu_budget
+        self.loop_lag_budget = loop_lag_budget
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, "admission.lock")
+        self._cpu = 0.0  # host CPU fraction, from _sample_cpu
+        self._sampler: threading.Thread | None = None
+        self._sampler_lock = threading.Lock()
+
+    def _host_cpu(self) -> float:
+        """Latest host CPU reading; starts the sampler on first use, in the
+        process that uses it."""
+        with self._sampler_lock:
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(
+                    target=self._sample_cpu, name="capacity-cpu", daemon=True
+                )
+                self._sampler.start()
+        return self._cpu
+
+    def _sample_cpu(self) -> None:
+        # The only cpu_percent() caller in the process: each reading covers
+        # exactly the last interval
+        while True:
+            self._cpu = psutil.cpu_percent(CPU_SAMPLE_INTERVAL) / 100
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def rooms(self) -> list[dict]:
+        """Live rooms' latest stats; drops files left behind by dead jobs."""
+        rooms = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as f:
+                    stats = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            age = now - stats.get("updated", 0)
+            if (stats.get("pending") and age > PENDING_TTL) or (
+                age > STALE_AFTER and not psutil.pid_exists(stats.get("pid", -1))
+            ):
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+                continue
+            rooms.append(stats)
+        return rooms
+
+    def utilisation(self) -> dict[str, float]:
+        """Per-dimension usage, each normalised to its budget (1.0 = full)."""
+        return self._usage(self.rooms())
+
+    def _usage(self, rooms: list[dict]) -> dict[str, float]:
+        # Pending placeholders count as rooms; they have no streams or lag yet
+        return {
+            "cpu": self._host_cpu() / self.cpu_budget,
+            "rooms": len(rooms) / self.max_rooms,
+            "streams": sum(r.get("streams", 0) for r in rooms) / self.max_streams,
+            "loop_lag": max((r.get("loop_lag", 0.0) for r in rooms), default=0.0)
+            / self.loop_lag_budget,
+        }
+
+    def load(self) -> float:
+        """WorkerOptions.load_fnc — the tightest dimension, capped at 1.0."""
+        return min(max(self.utilisation().values()), 1.0)
+
+    def _reserve(self, job_id: str) -> tuple[bool, dict[str, float]]:
+        """Record job_id as pending if one more call fits."""
+        with self._locked():
+            usage = self._usage(self.rooms())
+            # Admitting one more call adds a room outright; the other
+            # dimensions are measured and only need to be under budget now
+            fits = usage["rooms"] + 1 / self.max_rooms <= 1.0 and all(
+                usage[k] < 1.0 for k in ("cpu", "streams", "loop_lag")
+            )
+            if fits:
+                _publish(
+                    os.path.join(self.directory, f"{job_id}.json"),
+                    {"job_id": job_id, "pid": os.getpid(), "pending": True, "updated": time.time()},
+                )
+        return fits, usage
+
+    async def admit(self, job_id: str, defer: float = ADMISSION_DEFER_SECONDS) -> bool:
+        """Decide whether to accept a dispatched job, waiting briefly if full."""
+        deadline = time.monotonic() + defer
+        while True:
+            fits, usage = await asyncio.to_thread(self._reserve, job_id)
+            if fits:
+                return True
+            if time.monotonic() >= deadline:
+                logger.warning(
+                    "Over capacity, rejecting job "
+                    + ", ".join(f"{k}={v:.2f}" for k, v in usage.items())
+                )
+                return False
+            await asyncio.sleep(0.25)
@@ -7,14 +7,40 @@ using Sarvam 105B via the REST API.
 
 Uses httpx directly to call Sarvam's OpenAI-compatible endpoint.
 
+Responses are streamed (SSE) and parsed field by field against a typed
+schema (extraction_schema.py): fields that completed before a truncation
+or a malformed value are kept, and only the missing ones are asked for
+again with a compact follow-up prompt.
+
+For bulk work (morning dialing windows, re-processing jobs) use
+extract_calls_batch(), which shares one pooled client (http_pool.py)
+across all requests, bounds concurrency, retries 429/5xx with backoff and
+yields results as they complete. set_rate_limit() caps Sarvam requests per
+second for the process. backfill.py is the command-line front end for
+re-extracting archived transcripts.
+
 Keep in sync with: apps/api/src/integrations/elevenlabs/elevenlabs-agent.service.ts (DATA EXTRACTION section)
 """
 
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import random
+import time
+from collections.abc import AsyncIterator, Iterable
+from urllib.parse import urlsplit
 
 import httpx
 
+import http_pool
+import worker_metrics
+from extraction_cache import ExtractionCache, cache_key
+from extraction_schema import FIELDS, FieldStream
+from lexicon import fast_extract
+from transcript_store import prompt_line
+
 logger = logging.getLogger("data-extractor")
 
 EXTRACTION_PROMPT = """Analyze this healthcare call transcript between a caretaker (Assistant) and an elderly patient (Patient).
@@ -63,11 +89,11 @@ Extract the following structured data:
 
 2. vitals_checked: Whether patient checked vitals today — "yes", "no", or "not_applicable"
 
-3. vitals: Actual vitals readings if reported, in format: {"glucose": <number>, "blood_pressure": {"systolic": <number>, "diastolic": <number>}}
+3. vitals: Actual vitals readings if reported, in format: {{"glucose": <number>, "blood_pressure": {{"systolic": <number>, "diastolic": <number>}}}}
    - Extract glucose in mg/dL (e.g., 145, 98)
-   - Extract BP in systolic/diastolic format (e.g., "130 over 80" → {"systolic": 130, "diastolic": 80})
+   - Extract BP in systolic/diastolic format (e.g., "130 over 80" → {{"systolic": 130, "diastolic": 80}})
    - If a value wasn't mentioned, use null for that field
-   - Example: {"glucose": 120, "blood_pressure": {"systolic": 130, "diastolic": 80}}
+   - Example: {{"glucose": 120, "blood_pressure": {{"systolic": 130, "diastolic": 80}}}}
 
 4. wellness: Patient's overall state — "good" (happy, healthy, normal), "okay" (fine but not great), "not_well" (complaints, pain, low energy, sad)
 
@@ -89,9 +115,40 @@ Transcript:
 Respond ONLY with valid JSON in this exact format (no markdown, no explanation):
 {{"medicine_responses": "...", "vitals_checked": "...", "vitals": {{"glucose": null, "blood_pressure": {{"systolic": null, "diastolic": null}}}}, "wellness": "...", "complaints": "...", "re_scheduled": "..."}}"""
 
-SARVAM_API_URL = "https://api.sarvam.ai/chat/completions"
+# Re-asks for just the fields the first answer didn't deliver (truncated at
+# max_tokens, malformed or invalid), instead of repeating the full prompt
+FOLLOW_UP_PROMPT = """Healthcare call transcript between a caretaker (Assistant) and an elderly patient (Patient):
+{transcript}
+
+Extract ONLY these fields:
+{fields}
+
+Respond ONLY with valid JSON containing exactly these keys (no markdown, no explanation)."""
+
+# In-call windows (incremental_extractor.py) send a few turns the lexicon
+# couldn't read, not a whole call: the per-language phrase lists in
+# EXTRACTION_PROMPT are what the lexicon already covers, so they'd be most
+# of every request's tokens for nothing
+WINDOW_PROMPT = """Excerpt from a healthcare call between a caretaker (Assistant) and an elderly patient (Patient).
+Medicines on this call: {medicines}
+
+{transcript}
+
+From the Patient's answers in this excerpt only, extract:
+{fields}
+
+Respond ONLY with valid JSON containing exactly these keys (no markdown, no explanation)."""
+
+# Overridable for benchmarks/bench_calls.py, which points it at a local stand-in
+SARVAM_API_URL = os.environ.get("SARVAM_API_URL", "https://api.sarvam.ai/chat/completions")
 SARVAM_MODEL = "sarvam-105b-instruct-v2"
 
+# Changes whenever the prompt text changes, so cached results from an older
+# prompt are never served after a schema/prompt fix
+PROMPT_VERSION = hashlib.sha256(
+    (EXTRACTION_PROMPT + FOLLOW_UP_PROMPT).encode("utf-8")
+).hexdigest()[:12]
+
 FALLBACK = {
     "medicine_responses": "",
     "vitals_checked": "unclear",
@@ -102,9 +159,199 @@ FALLBACK = {
 }
 
 
+# --- Batch extraction tuning ---
+# Max in-flight Sarvam requests per process. Sarvam rate-limits per key, so
+# going wider than this mostly converts throughput into 429s.
+EXTRACTION_CONCURRENCY = int(os.environ.get("EXTRACTION_CONCURRENCY", "8"))
+# Retries on 429/5xx/transport errors, with exponential backoff + jitter
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.5  # seconds; doubles per attempt
+RETRY_MAX_DELAY = 8.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Ask for an SSE stream and parse fields as they arrive (0 = one JSON body)
+EXTRACTION_STREAM = os.environ.get("EXTRACTION_STREAM", "1") == "1"
+MAX_TOKENS = 500
+FOLLOW_UP_MAX_TOKENS = 250
+WINDOW_MAX_TOKENS = 250
+# Sarvam requests per second across the process (retries and follow-ups
+# included); 0 = unlimited
+EXTRACTION_RATE_LIMIT = float(os.environ.get("EXTRACTION_RATE_LIMIT", "0"))
+
+# Result cache — in-memory LRU, plus a SQLite tier when EXTRACTION_CACHE_DB is set
+extraction_cache = ExtractionCache(
+    max_entries=int(os.environ.get("EXTRACTION_CACHE_SIZE", "1024")),
+    ttl=float(os.environ.get("EXTRACTION_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.environ.get("EXTRACTION_CACHE_DB") or None,
+)
+
+# Extraction requests share the process-wide pool (see http_pool.py), sized
+# so every batch worker can hold its own keep-alive connection to Sarvam
+http_pool.configure(
+    urlsplit(SARVAM_API_URL).netloc,
+    max_connections=EXTRACTION_CONCURRENCY,
+    timeout=30,
+)
+
+
+class RateLimiter:
+    """Spaces acquire() calls to at most `rate` per second, letting up to
+    `burst` through back to back after an idle spell."""
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        # No await between reading and advancing _next, so concurrent
+        # callers each get their own slot
+        self._next = max(self._next, now - (self.burst - 1) / self.rate)
+        delay = self._next - now
+        self._next += 1 / self.rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_rate_limiter: RateLimiter | None = None
+
+
+def set_rate_limit(rate: float, burst: int = 1) -> None:
+    """Cap Sarvam extraction requests at `rate` per second (0 = no cap)."""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rate, burst) if rate > 0 else None
+
+
+set_rate_limit(EXTRACTION_RATE_LIMIT)
+
+
+async def close_client() -> None:
+    """Close the pooled Sarvam client for this event loop (call on worker shutdown)."""
+    await http_pool.aclose(urlsplit(SARVAM_API_URL).netloc)
+
+
+def format_transcript(transcript: list[dict]) -> str:
+    return "\n".join(prompt_line(t["role"], t["message"]) for t in transcript)
+
+
+def _retry_delay(attempt: int, response: httpx.Response | None = None) -> float:
+    """Backoff for the given attempt, honouring Retry-After on 429s."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+    delay = min(RETRY_BASE_DELAY * (2 ** attempt), RETRY_MAX_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def _post_extraction(
+    client: httpx.AsyncClient,
+    prompt: str,
+    api_key: str,
+    max_tokens: int,
+) -> httpx.Response:
+    """POST the extraction request, retrying 429/5xx and transport errors.
+
+    The response is returned unread (streamed); the caller must close it.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        if _rate_limiter is not None:
+            await _rate_limiter.acquire()
+        request = client.build_request(
+            "POST",
+            SARVAM_API_URL,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            json={
+                "model": SARVAM_MODEL,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.1,
+                "max_tokens": max_tokens,
+                "stream": EXTRACTION_STREAM,
+            },
+        )
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TransportError as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning(f"Sarvam request failed ({e!r}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status_code not in RETRYABLE_STATUS or attempt == MAX_RETRIES:
+            return response
+        await response.aclose()
+        delay = _retry_delay(attempt, response)
+        logger.warning(
+            f"Sarvam API {response.status_code}, retry {attempt + 1}/{MAX_RETRIES} in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def _content_chunks(response: httpx.Response) -> AsyncIterator[str]:
+    """Model output text from an SSE stream, or from a plain JSON body."""
+    if not response.headers.get("content-type", "").startswith("text/event-stream"):
+        data = json.loads(await response.aread())
+        yield data["choices"][0]["message"]["content"]
+        return
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return
+        for choice in json.loads(payload).get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
+            if choice.get("finish_reason") == "length":
+                logger.warning("Sarvam extraction output truncated at max_tokens")
+
+
+async def _stream_fields(prompt: str, api_key: str, max_tokens: int) -> tuple[FieldStream, bool]:
+    """Run one extraction prompt. Returns a FieldStream holding every field
+    that completed (even if the request failed partway through), and
+    whether the model produced any output at all."""
+    fields = FieldStream()
+    output: list[str] = []
+    try:
+        response = await _post_extraction(
+            http_pool.client_for(SARVAM_API_URL), prompt, api_key, max_tokens
+        )
+        try:
+            if response.status_code != 200:
+                await response.aread()
+                logger.error(f"Sarvam API error {response.status_code}: {response.text[:300]}")
+                return fields, False
+            async for chunk in _content_chunks(response):
+                output.append(chunk)
+                fields.feed(chunk)
+                if fields.done:
+                    break
+        finally:
+            await response.aclose()
+    except Exception as e:
+        logger.error(f"Data extraction failed: {e!r}")
+    fields.close()
+    result_text = "".join(output)
+    logger.info(f"Sarvam extraction response: {result_text[:200]}")
+    if fields.missing() and result_text:
+        logger.warning(f"Extraction missing {fields.missing()}; raw response was: {result_text[:300]}")
+    return fields, bool(result_text)
+
+
 async def extract_call_data(
     transcript: list[dict],
     api_key: str,
+    medicines: list[str] | None = None,
 ) -> dict:
     """
     Extract structured data from a call transcript using Sarvam 105B REST API.
@@ -112,61 +359,170 @@ async def extract_call_data(
     Args:
         transcript: List of {role: 'agent'|'user', message: str}
         api_key: Sarvam API key
+        medicines: Medicine names from the call metadata. When given,
+            unambiguous transcripts are resolved locally without an API call.
 
     Returns:
         Dict with medicine_responses, vitals_checked, vitals (glucose & BP), wellness, complaints, re_scheduled
     """
+    result, source = await _resolve(transcript, api_key, medicines)
+    worker_metrics.record_extraction(source)
+    return result
+
+
+async def _resolve(
+    transcript: list[dict],
+    api_key: str,
+    medicines: list[str] | None,
+) -> tuple[dict, str]:
+    """extract_call_data() plus how the result was resolved: local, cache,
+    llm, partial (some fields hold FALLBACK values) or fallback."""
     if not transcript:
         logger.warning("Empty transcript, skipping extraction")
-        return FALLBACK.copy()
+        return FALLBACK.copy(), "fallback"
+
+    if medicines:
+        result = fast_extract(transcript, medicines)
+        if result is not None:
+            logger.info(f"Resolved extraction locally: {result['medicine_responses']}")
+            return result, "local"
+
+    transcript_text = format_transcript(transcript)
+    key = cache_key(transcript_text, SARVAM_MODEL, PROMPT_VERSION)
+    cached = (
+        await asyncio.to_thread(extraction_cache.get, key)
+        if extraction_cache.db_path
+        else extraction_cache.get(key)
+    )
+    if cached is not None:
+        logger.info("Extraction cache hit")
+        return cached, "cache"
+
+    result, missing = await _extract_fields(transcript_text, api_key)
+    if result is None:
+        return FALLBACK.copy(), "fallback"
+    if missing:
+        # Partly-fallback results aren't cached, so a later retry can fill them
+        return result, "partial"
+    await asyncio.to_thread(extraction_cache.put, key, result)  # SQLite write
+    return result, "llm"
+
+
+async def _extract_fields(transcript_text: str, api_key: str) -> tuple[dict | None, list[str]]:
+    """Extraction plus one follow-up round for missing fields.
+
+    Returns (result, fields filled from FALLBACK), or (None, all fields) if
+    nothing usable came back.
+    """
+    fields, answered = await _stream_fields(
+        EXTRACTION_PROMPT.format(transcript=transcript_text), api_key, MAX_TOKENS
+    )
+    missing = fields.missing()
+    if not answered:
+        return None, missing
+    if missing:
+        logger.info(f"Salvaged {len(fields.fields)} extraction field(s), asking again for {missing}")
+        follow_up, _ = await _stream_fields(
+            FOLLOW_UP_PROMPT.format(
+                transcript=transcript_text,
+                fields="\n".join(f"- {name}: {FIELDS[name].hint}" for name in missing),
+            ),
+            api_key,
+            FOLLOW_UP_MAX_TOKENS,
+        )
+        for name in missing:
+            if name in follow_up.fields:
+                fields.fields[name] = follow_up.fields[name]
+        missing = fields.missing()
+        worker_metrics.record_extraction_follow_up(complete=not missing)
+        if not fields.fields:
+            return None, missing
+        if missing:
+            logger.warning(f"Extraction fields {missing} unresolved, using fallback values")
+    return {name: fields.fields.get(name, FALLBACK[name]) for name in FIELDS}, missing
+
+
+async def request_window_extraction(
+    transcript_text: str, api_key: str, medicines: list[str]
+) -> dict | None:
+    """
+    Run WINDOW_PROMPT over a few already-formatted turns of a live call.
 
-    transcript_text = "\n".join(
-        f"{'Assistant' if t['role'] == 'agent' else 'Patient'}: {t['message']}"
-        for t in transcript
+    No fast path, cache, follow-up or fallback: returns only the fields that
+    came back valid (the caller merges them into what it already has), or
+    None if nothing usable did.
+    """
+    fields, _ = await _stream_fields(
+        WINDOW_PROMPT.format(
+            medicines=", ".join(medicines) or "none",
+            transcript=transcript_text,
+            fields="\n".join(f"- {name}: {field.hint}" for name, field in FIELDS.items()),
+        ),
+        api_key,
+        WINDOW_MAX_TOKENS,
     )
+    return fields.fields or None
+
+
+async def extract_calls_batch(
+    items: Iterable[tuple],
+    api_key: str,
+    concurrency: int = EXTRACTION_CONCURRENCY,
+) -> AsyncIterator[tuple[str, dict, str]]:
+    """
+    Extract many transcripts concurrently, yielding results as they complete.
 
+    Args:
+        items: Iterable of (call_id, transcript) or
+            (call_id, transcript, medicines) tuples. Consumed lazily, so a
+            generator over a large backlog never sits fully in memory.
+        api_key: Sarvam API key
+        concurrency: Max in-flight Sarvam requests
+
+    Yields:
+        (call_id, extracted_data, source) in completion order — not input
+        order. source is how the result was resolved: local, cache, llm,
+        partial or fallback as in the sarvam_extractions metric, or error
+        if extraction raised. Failed extractions yield FALLBACK, same as
+        extract_call_data().
+    """
+    source = iter(items)
+    concurrency = max(1, concurrency)
+    # Bounded, so workers wait for the consumer: results resolved locally or
+    # from the cache never await anything else, and an unbounded queue let
+    # one worker drain the whole input before the first result was yielded
+    results: asyncio.Queue[tuple[str, dict, str] | None] = asyncio.Queue(concurrency)
+
+    async def worker() -> None:
+        # Workers pull from the shared iterator; the for-loop never awaits
+        # between next() calls so there's no race on the generator.
+        try:
+            for call_id, transcript, *rest in source:
+                medicines = rest[0] if rest else None
+                try:
+                    result, how = await _resolve(transcript, api_key, medicines)
+                except Exception as e:
+                    # One bad transcript mustn't stop the worker (and with
+                    # it, a share of the batch)
+                    logger.error(f"Extraction for {call_id} failed: {e!r}")
+                    result, how = FALLBACK.copy(), "error"
+                worker_metrics.record_extraction(how)
+                await results.put((call_id, result, how))
+        except Exception as e:
+            logger.error(f"Reading batch input failed: {e!r}")
+        # Not in a finally: a cancelled worker may be blocked on a full queue
+        await results.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    remaining = len(workers)
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                SARVAM_API_URL,
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": SARVAM_MODEL,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": EXTRACTION_PROMPT.format(transcript=transcript_text)
-                        }
-                    ],
-                    "temperature": 0.1,
-                    "max_tokens": 500,
-                },
-            )
-
-        if response.status_code != 200:
-            logger.error(f"Sarvam API error {response.status_code}: {response.text[:300]}")
-            return FALLBACK.copy()
-
-        data = response.json()
-        result_text = data["choices"][0]["message"]["content"].strip()
-        logger.info(f"Sarvam extraction response: {result_text[:200]}")
-
-        # Strip markdown fences if present
-        if result_text.startswith("```"):
-            result_text = result_text.split("\n", 1)[1]
-            if result_text.endswith("```"):
-                result_text = result_text.rsplit("```", 1)[0]
-            result_text = result_text.strip()
-
-        return json.loads(result_text)
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse Gemini response as JSON: {e}")
-        logger.error(f"Raw response was: {result_text[:300]}")
-        return FALLBACK.copy()
-    except Exception as e:
-        logger.error(f"Data extraction failed: {e}")
-        return FALLBACK.copy()
+        while remaining:
+            item = await results.get()
+            if item is None:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
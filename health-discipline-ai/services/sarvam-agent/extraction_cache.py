@@ -0,0 +1,161 @@
+"""
+Content-addressed cache for post-call extraction results.
+
+Webhook retries, re-processing jobs and backfills send the same transcript
+through extraction again. Results are keyed on a hash of the normalized
+transcript plus the model and prompt version, so a repeat costs a dict lookup
+instead of a Sarvam 105B call — and changing EXTRACTION_PROMPT or the model
+naturally invalidates every old entry.
+
+Two tiers:
+  - In-memory LRU (always on, bounded by max_entries)
+  - Optional SQLite file, shared across processes and restarts
+
+Both tiers expire entries after ttl seconds.
+
+The SQLite connection is opened on first use, in the process that uses it:
+the module-level cache in data_extractor.py is created at import, before
+the supervisor forks its workers, and a SQLite connection must not be
+carried across a fork. put() writes to disk, so async callers run it in a
+thread.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("extraction-cache")
+
+# Connections opened before a fork. The child never touches them, and
+# closing them (even by garbage collection) could release the parent's locks.
+_inherited: list[sqlite3.Connection] = []
+
+
+def cache_key(transcript_text: str, model: str, prompt_version: str) -> str:
+    """Hash the transcript with whitespace/case normalized, scoped to model + prompt."""
+    normalized = " ".join(transcript_text.split()).casefold()
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, normalized):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """LRU + TTL cache of extraction results with an optional SQLite tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 7 * 24 * 3600,
+        db_path: str | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()  # memory tier
+        self._db_lock = threading.Lock()  # the connection
+        self._db: sqlite3.Connection | None = None
+        self._db_pid: int | None = None
+
+    def _conn(self) -> sqlite3.Connection | None:
+        """This process's connection, opened on first use (call with _db_lock held)."""
+        if self.db_path is None:
+            return None
+        if self._db is not None and self._db_pid == os.getpid():
+            return self._db
+        if self._db is not None:
+            _inherited.append(self._db)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db_pid = os.getpid()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "DELETE FROM extraction_cache WHERE created_at <= ?", (time.time() - self.ttl,)
+        )
+        self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    return copy.deepcopy(value)  # callers may mutate the result
+                del self._memory[key]
+
+        if self.db_path is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._conn().execute(
+                    "SELECT value, created_at FROM extraction_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read extraction cache: {e}")
+            return None
+        if row is None or now - row[1] >= self.ttl:
+            return None
+        with self._lock:
+            self._remember(key, row[1], json.loads(row[0]))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict) -> None:
+        now = time.time()
+        with self._lock:
+            # The caller keeps its dict; later edits to it mustn't reach the cache
+            self._remember(key, now, copy.deepcopy(value))
+        if self.db_path is None:
+            return
+        try:
+            with self._db_lock:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO extraction_cache (key, value, created_at)"
+                    " VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now),
+                )
+                db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to persist extraction cache entry: {e}")
+
+    def _remember(self, key: str, created_at: float, value: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers. Returns rows removed from disk."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for key in [k for k, (t, _) in self._memory.items() if t <= cutoff]:
+                del self._memory[key]
+        if self.db_path is None:
+            return 0
+        with self._db_lock:
+            db = self._conn()
+            cur = db.execute("DELETE FROM extraction_cache WHERE created_at <= ?", (cutoff,))
+            db.commit()
+            return cur.rowcount
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None and self._db_pid == os.getpid():
+                self._db.close()
+            self._db = None
@@ -0,0 +1,239 @@
+"""
+Typed schema and incremental parser for the extraction JSON.
+
+The extraction model answers with one flat JSON object (see
+data_extractor.EXTRACTION_PROMPT). Parsing it with a single json.loads
+throws the whole answer away when the model wraps it in markdown or prose,
+or when it runs into max_tokens halfway through. FieldStream instead reads
+the output as it streams in and hands back each top-level field as soon as
+its value closes, checked and normalized against FIELDS. A truncated answer
+still yields every field that completed; data_extractor asks again for the
+rest only.
+
+Keep in sync with: data_extractor.py EXTRACTION_PROMPT
+"""
+
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger("extraction-schema")
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, list):
+        return ", ".join(str(v).strip() for v in value if v is not None)
+    if not isinstance(value, str):
+        raise ValueError(f"expected a string, got {type(value).__name__}")
+    return value.strip()
+
+
+def _choice(*allowed: str) -> Callable[[Any], str]:
+    def coerce(value: Any) -> str:
+        text = _text(value).lower()
+        if text not in allowed:
+            raise ValueError(f"expected one of {allowed}, got {text!r}")
+        return text
+    return coerce
+
+
+def _number(value: Any) -> float | int | None:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().lower()
+    if text in ("", "null", "none"):
+        return None
+    number = float(text)  # ValueError for anything that isn't a reading
+    return int(number) if number.is_integer() else number
+
+
+def _vitals(value: Any) -> dict:
+    if not isinstance(value, dict):
+        raise ValueError(f"expected an object, got {type(value).__name__}")
+    bp = value.get("blood_pressure") or {}
+    if not isinstance(bp, dict):
+        raise ValueError("blood_pressure is not an object")
+    return {
+        "glucose": _number(value.get("glucose")),
+        "blood_pressure": {
+            "systolic": _number(bp.get("systolic")),
+            "diastolic": _number(bp.get("diastolic")),
+        },
+    }
+
+
+def _complaints(value: Any) -> str:
+    return _text(value) if value is not None else "none"
+
+
+def _flag(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return _choice("true", "false")(value)
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    coerce: Callable[[Any], Any]  # raises ValueError/TypeError on a bad value
+    hint: str  # one-line instruction for the follow-up prompt
+
+
+FIELDS: dict[str, Field] = {
+    f.name: f
+    for f in (
+        Field(
+            "medicine_responses",
+            _text,
+            '"medicine_name:taken|not_taken|unclear" for each medicine discussed, '
+            'comma-separated (not yet time to take it = not_taken; took all = every one taken)',
+        ),
+        Field(
+            "vitals_checked",
+            _choice("yes", "no", "not_applicable", "unclear"),
+            '"yes", "no" or "not_applicable" — whether vitals were checked today',
+        ),
+        Field(
+            "vitals",
+            _vitals,
+            '{"glucose": <mg/dL or null>, "blood_pressure": '
+            '{"systolic": <number or null>, "diastolic": <number or null>}}',
+        ),
+        Field(
+            "wellness",
+            _choice("good", "okay", "not_well", "unclear"),
+            '"good", "okay" or "not_well"',
+        ),
+        Field("complaints", _complaints, 'health complaints in English, comma-separated, or "none"'),
+        Field(
+            "re_scheduled",
+            _flag,
+            '"true" if the patient asked to be called back later or was busy, else "false"',
+        ),
+    )
+}
+
+
+def coerce_field(name: str, value: Any) -> tuple[bool, Any]:
+    """(True, normalized value), or (False, None) for unknown keys and bad values."""
+    field = FIELDS.get(name)
+    if field is None:
+        return False, None
+    try:
+        return True, field.coerce(value)
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Discarding extraction field {name}: {e}")
+        return False, None
+
+
+# FieldStream states
+_SEEK_OBJECT, _SEEK_KEY, _KEY, _SEEK_COLON, _VALUE, _DONE = range(6)
+
+
+class FieldStream:
+    """Incremental parser for the top level of a streamed JSON object.
+
+    feed() takes model output in arbitrary chunks and returns the fields
+    whose values completed in that chunk, already coerced to FIELDS. Text
+    before the opening brace (prose, ```json fences) and after the closing
+    one is ignored. Values that fail to parse or validate are dropped, so
+    the caller sees them as missing.
+    """
+
+    def __init__(self) -> None:
+        self.fields: dict[str, Any] = {}
+        self._state = _SEEK_OBJECT
+        self._raw: list[str] = []
+        self._key = ""
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        """The object's closing brace has been seen."""
+        return self._state == _DONE
+
+    def missing(self) -> list[str]:
+        return [name for name in FIELDS if name not in self.fields]
+
+    def _emit(self, raw: str, completed: dict[str, Any]) -> None:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding malformed extraction field {self._key}: {raw[:80]!r}")
+            return
+        ok, value = coerce_field(self._key, value)
+        if ok:
+            self.fields[self._key] = value
+            completed[self._key] = value
+
+    def feed(self, chunk: str) -> dict[str, Any]:
+        completed: dict[str, Any] = {}
+        for ch in chunk:
+            state = self._state
+            if state == _DONE:
+                break
+            if state == _SEEK_OBJECT:
+                if ch == "{":
+                    self._state = _SEEK_KEY
+            elif state == _SEEK_KEY:
+                if ch == '"':
+                    self._raw = []
+                    self._state = _KEY
+                elif ch == "}":
+                    self._state = _DONE
+            elif state == _KEY:
+                if self._escape:
+                    self._escape = False
+                    self._raw.append(ch)
+                elif ch == "\\":
+                    self._escape = True
+                    self._raw.append(ch)
+                elif ch == '"':
+                    self._key = json.loads('"' + "".join(self._raw) + '"')
+                    self._state = _SEEK_COLON
+                else:
+                    self._raw.append(ch)
+            elif state == _SEEK_COLON:
+                if ch == ":":
+                    self._raw = []
+                    self._depth = 0
+                    self._state = _VALUE
+            else:  # _VALUE
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif ch == "\\":
+                        self._escape = True
+                    elif ch == '"':
+                        self._in_string = False
+                elif ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]" and self._depth > 0:
+                    self._depth -= 1
+                elif self._depth == 0 and ch in ",}":
+                    self._emit("".join(self._raw), completed)
+                    self._state = _SEEK_KEY if ch == "," else _DONE
+                    continue
+                self._raw.append(ch)
+        return completed
+
+    def close(self) -> dict[str, Any]:
+        """End of output: keep a last value that is complete but unterminated
+        (the stream stopped right before its comma or closing brace)."""
+        completed: dict[str, Any] = {}
+        if self._state == _VALUE and not self._in_string and self._depth == 0:
+            raw = "".join(self._raw).strip()
+            # A bare number may have been cut mid-digits; only take values
+            # whose last character proves they ended
+            if raw.endswith(('"', "}", "]", "true", "false", "null")):
+                self._emit(raw, completed)
+        self._state = _DONE
+        return completed
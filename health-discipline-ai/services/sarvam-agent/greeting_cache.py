@@ -0,0 +1,293 @@
+"""
+On-disk cache of pre-synthesized greeting and stock-phrase audio.
+
+The opening line is almost always "<greeting> <name>!" (see
+prompt.build_first_message), and the same patient is dialed several times a
+day. Synthesizing it through Gemini + Sarvam TTS on every call puts a full
+LLM+TTS round trip on the most latency-sensitive moment of the call. Instead
+we synthesize it once (while the phone rings) and replay the PCM straight
+from disk when the participant joins.
+
+Storage layout (one directory, shared by every job process on the instance):
+  clips.pcm   — raw little-endian int16 mono PCM, clips appended back to
+                back (clips-<generation>.pcm after a compaction)
+  index.json  — {"file": <current clips file>,
+                 "clips": {key: {"offset", "length", "sample_rate", "used"}}}
+
+The clips file is append-only, so readers memory-map it and slice clips
+without copying; offsets already in the index never move. Writers take an
+flock on clips.lock and replace index.json atomically.
+
+Greetings carry the patient's name, so the cache is bounded: once the clips
+file passes max_bytes, the least recently used clips are dropped by copying
+the rest into a new generation, switching the index to it and deleting the
+old file. Readers still playing from the old mapping keep it alive; one
+that opens the old name after the switch just misses. "used" is refreshed
+at most every TOUCH_INTERVAL, so a cache hit rarely rewrites the index. The
+clip text itself is not stored.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+
+from livekit import rtc
+
+logger = logging.getLogger("greeting-cache")
+
+FRAME_MS = 20
+MAX_BYTES = int(float(os.environ.get("GREETING_CACHE_MAX_MB", "256")) * (1 << 20))
+# Compaction keeps the most recently used clips up to this share of max_bytes
+COMPACT_TO = 0.75
+TOUCH_INTERVAL = 6 * 3600
+
+
+def clip_key(lang: str, speaker: str, pace: float, text: str) -> str:
+    raw = f"{lang}\0{speaker}\0{pace:.2f}\0{' '.join(text.split())}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class GreetingAudioCache:
+    """Memory-mapped store of synthesized clips keyed by language/speaker/pace/text.
+
+    speaker maps a language code to the TTS speaker that voices it, so a
+    change of voice for one language invalidates only that language's clips.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        speaker: Callable[[str], str],
+        pace: float,
+        max_bytes: int = MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.speaker = speaker
+        self.pace = pace
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, "index.json")
+        self._lock_path = os.path.join(directory, "clips.lock")
+        self._pcm_name = "clips.pcm"
+        self._index: dict[str, dict] = {}
+        self._index_mtime = 0.0
+        self._map: mmap.mmap | None = None
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._touches: set[asyncio.Task] = set()
+
+    @property
+    def _pcm_path(self) -> str:
+        return os.path.join(self.directory, self._pcm_name)
+
+    def _reload_index(self) -> None:
+        try:
+            mtime = os.path.getmtime(self._index_path)
+        except FileNotFoundError:
+            return
+        if mtime == self._index_mtime:
+            return
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                doc = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to load greeting index: {e}")
+            return
+        if "clips" not in doc:
+            doc = {"file": "clips.pcm", "clips": doc}  # written before compaction existed
+        if doc["file"] != self._pcm_name:
+            self._map = None  # compacted into a new generation
+            self._pcm_name = doc["file"]
+        self._index = doc["clips"]
+        self._index_mtime = mtime
+
+    def _write_index(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"file": self._pcm_name, "clips": self._index}, f)
+        os.replace(tmp_path, self._index_path)
+
+    def _view(self, entry: dict) -> memoryview | None:
+        end = entry["offset"] + entry["length"]
+        if self._map is None or len(self._map) < end:
+            # Another process appended since we mapped — remap the larger file
+            try:
+                with open(self._pcm_path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size < end:
+                        return None
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to map greeting clips: {e}")
+                return None
+        return memoryview(self._map)[entry["offset"]:end]
+
+    def preload(self) -> int:
+        """Load the index and map the clip file up front (prewarm), so the
+        first call's greeting doesn't pay for it. Returns the clip count."""
+        self._reload_index()
+        if self._index:
+            end = max(e["offset"] + e["length"] for e in self._index.values())
+            self._view({"offset": 0, "length": end})
+            if self._map is not None:
+                self._map.madvise(mmap.MADV_WILLNEED)
+        return len(self._index)
+
+    def get(self, lang: str, text: str) -> tuple[memoryview, int] | None:
+        """Return (pcm, sample_rate) for a cached clip, or None."""
+        self._reload_index()
+        key = clip_key(lang, self.speaker(lang), self.pace, text)
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        pcm = self._view(entry)
+        if pcm is None:
+            return None
+        self._touch_soon(key)
+        return pcm, entry["sample_rate"]
+
+    def _append(self, key: str, pcm: bytes, sample_rate: int) -> None:
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._index_mtime = 0.0
+            self._reload_index()
+            if key in self._index:
+                return
+            with open(self._pcm_path, "ab") as f:
+                offset = f.tell()
+                f.write(pcm)
+            self._index[key] = {
+                "offset": offset,
+                "length": len(pcm),
+                "sample_rate": sample_rate,
+                "used": time.time(),
+            }
+            if offset + len(pcm) <= self.max_bytes:
+                self._write_index()
+                return
+            old_path = self._pcm_path
+            self._compact()
+        os.unlink(old_path)
+
+    def _compact(self) -> None:
+        """Copy the most recently used clips into a new clips file and point
+        the index at it (under the clips lock; the caller deletes the old file)."""
+        budget = self.max_bytes * COMPACT_TO
+        kept: dict[str, dict] = {}
+        total = 0
+        for key, entry in sorted(
+            self._index.items(), key=lambda kv: kv[1].get("used", 0), reverse=True
+        ):
+            if total + entry["length"] > budget:
+                break
+            kept[key] = entry
+            total += entry["length"]
+        name = f"clips-{time.time_ns():x}.pcm"
+        new_path = os.path.join(self.directory, name)
+        with open(self._pcm_path, "rb") as src, open(new_path, "wb") as dst:
+            for entry in kept.values():
+                src.seek(entry["offset"])
+                data = src.read(entry["length"])
+                entry["offset"] = dst.tell()
+                dst.write(data)
+        logger.info(
+            f"Compacted greeting clips: kept {len(kept)}/{len(self._index)} ({total} bytes)"
+        )
+        self._pcm_name = name
+        self._index = kept
+        self._map = None
+        self._write_index()
+
+    def _touch(self, key: str) -> None:
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._index_mtime = 0.0
+            self._reload_index()
+            if key in self._index:
+                self._index[key]["used"] = time.time()
+                self._write_index()
+
+    def _touch_soon(self, key: str) -> None:
+        """Mark a cache hit as recently used, off the event loop and at most
+        once per TOUCH_INTERVAL."""
+        entry = self._index.get(key)
+        if entry is None or time.time() - entry.get("used", 0) < TOUCH_INTERVAL:
+            return
+        entry["used"] = time.time()  # this process won't touch it again meanwhile
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._touch(key)  # called outside the event loop (tools, tests)
+            return
+        task = loop.create_task(asyncio.to_thread(self._touch, key))
+        self._touches.add(task)
+        task.add_done_callback(self._touches.discard)
+        task.add_done_callback(_log_touch_error)
+
+    async def _synthesize(self, tts, lang: str, text: str) -> None:
+        chunks: list[bytes] = []
+        sample_rate = tts.sample_rate
+        async with tts.synthesize(text) as stream:
+            async for audio in stream:
+                chunks.append(bytes(audio.frame.data.cast("B")))
+                sample_rate = audio.frame.sample_rate
+        pcm = b"".join(chunks)
+        if not pcm:
+            logger.warning(f"TTS returned no audio for greeting clip '{text[:40]}'")
+            return
+        key = clip_key(lang, self.speaker(lang), self.pace, text)
+        await asyncio.to_thread(self._append, key, pcm, sample_rate)
+        logger.info(f"Cached greeting clip '{text[:40]}' ({len(pcm)} bytes)")
+
+    def ensure(self, tts, lang: str, text: str) -> asyncio.Task | None:
+        """Start synthesizing text into the cache unless it's already there.
+
+        Returns the in-flight task (await it to know the clip is ready), or
+        None if the clip is already cached.
+        """
+        if self.get(lang, text) is not None:
+            return None
+        key = clip_key(lang, self.speaker(lang), self.pace, text)
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._synthesize(tts, lang, text))
+            task.add_done_callback(lambda t: self._inflight.pop(key, None))
+            task.add_done_callback(_log_task_error)
+            self._inflight[key] = task
+        return task
+
+    async def warm(self, tts, lang: str, texts: Iterable[str]) -> None:
+        """Sequentially synthesize any missing clips (low priority background work)."""
+        for text in texts:
+            task = self.ensure(tts, lang, text)
+            if task is not None:
+                await asyncio.gather(task, return_exceptions=True)
+
+
+def _log_task_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception():
+        logger.error(f"Greeting synthesis failed: {task.exception()}")
+
+
+def _log_touch_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception():
+        logger.error(f"Failed to update greeting clip usage: {task.exception()}")
+
+
+async def pcm_frames(pcm: memoryview, sample_rate: int) -> AsyncIterator[rtc.AudioFrame]:
+    """Slice int16 mono PCM into 20ms AudioFrames for session.say(audio=...)."""
+    samples_per_frame = sample_rate * FRAME_MS // 1000
+    frame_bytes = samples_per_frame * 2
+    for start in range(0, len(pcm), frame_bytes):
+        chunk = pcm[start:start + frame_bytes]
+        yield rtc.AudioFrame(
+            data=chunk,
+            sample_rate=sample_rate,
+            num_channels=1,
+            samples_per_channel=len(chunk) // 2,
+        )
@@ -0,0 +1,102 @@
+"""
+Cloud Run health check and Prometheus metrics server.
+
+Cloud Run requires an HTTP endpoint. This runs in a background thread
+while the LiveKit agent worker runs in the main thread. GET /metrics
+serves Prometheus metrics merged across all job processes (see
+worker_metrics.py); GET /ready returns 503 until the worker has finished
+starting up; any other path is the liveness check.
+
+Only the standard library and worker_metrics are imported here, so
+agent.py can bind the port before its ~2s of livekit/plugin imports (see
+`python agent.py startup-profile`). In supervisor mode only the socket is
+bound that early; the serving thread starts after the workers are forked,
+and each worker closes its inherited copy of the socket.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import worker_metrics
+
+logger = logging.getLogger("health-server")
+
+_started_at = time.monotonic()
+_ready_after: float | None = None
+_server: ThreadingHTTPServer | None = None
+
+
+def mark_ready() -> None:
+    """Flip /ready to 200 — called once imports and background services are up."""
+    global _ready_after
+    if _ready_after is None:
+        _ready_after = time.monotonic() - _started_at
+        logger.info(f"Worker ready {_ready_after * 1000:.0f}ms after health server start")
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        status = 200
+        if path == "/metrics":
+            try:
+                body, content_type = worker_metrics.render()
+            except Exception as e:
+                logger.error(f"Failed to render metrics: {e}")
+                self.send_error(500)
+                return
+        elif path == "/ready":
+            ready = _ready_after is not None
+            status = 200 if ready else 503
+            body = json.dumps(
+                {"status": "ready" if ready else "starting", "service": "sarvam-agent-worker"}
+            ).encode()
+            content_type = "application/json"
+        else:
+            body = b'{"status":"ok","service":"sarvam-agent-worker"}'
+            content_type = "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Silence per-request logs
+
+
+_serving = False
+
+
+def bind(port: int | None = None) -> ThreadingHTTPServer:
+    """Bind the port without serving yet; connections queue until start(). Idempotent."""
+    global _server
+    if _server is None:
+        port = int(os.environ.get("PORT", 8080)) if port is None else port
+        _server = ThreadingHTTPServer(("0.0.0.0", port), HealthHandler)
+        _server.daemon_threads = True
+    return _server
+
+
+def start(port: int | None = None) -> ThreadingHTTPServer:
+    """Bind the port (if not bound yet) and serve from a daemon thread. Idempotent."""
+    global _serving
+    server = bind(port)
+    if not _serving:
+        _serving = True
+        threading.Thread(target=server.serve_forever, name="health-server", daemon=True).start()
+        logger.info(f"Health check server listening on :{server.server_address[1]}")
+    return server
+
+
+def close_inherited() -> None:
+    """Close a forked child's copy of the listening socket (never served in the child)."""
+    global _server, _serving
+    if _server is not None:
+        _server.server_close()
+        _server = None
+        _serving = False
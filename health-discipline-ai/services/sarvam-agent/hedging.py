@@ -0,0 +1,290 @@
+"""
+Hedged LLM/TTS requests with per-provider circuit breakers.
+
+A latency spike on Gemini or Sarvam TTS is dead air for the patient, and
+LiveKit's own fallback adapters only switch providers on errors. Instead,
+MedicineCheckAgent runs each turn's LLM and TTS streams through hedge():
+if the primary hasn't produced its first token / first audio within the
+language's deadline (LanguagePack.llm_hedge_after / tts_hedge_after), a
+backup request starts alongside it and whichever produces output first is
+used; the other is cancelled. Only the first item is raced — once a stream
+is chosen the turn stays on it.
+
+Each side has a CircuitBreaker. A primary that keeps failing or missing its
+deadline is skipped (straight to the backup) for COOLDOWN seconds, then
+given a single trial request; an open backup breaker stops hedging until
+its own trial succeeds. The breaker stays open while the trial is out.
+Breakers are per job process, so they protect the turns of the call in
+progress.
+
+The backup TTS isn't connected ahead of time (see PluginSet.connect): its
+connection opens when a hedge first starts it.
+
+Outcomes go to sarvam_hedges{kind, language, outcome}:
+  primary      — primary answered within the deadline (no hedge)
+  primary_won  — hedge fired, primary still answered first
+  backup_won   — hedge fired and the backup answered first
+  backup_only  — primary breaker open, backup used directly
+  failed       — nothing answered
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import TypeVar
+
+import worker_metrics
+
+logger = logging.getLogger("hedging")
+
+T = TypeVar("T")
+
+# HEDGING=0 disables backup requests (plugins are built without backups)
+HEDGING_ENABLED = os.environ.get("HEDGING", "1") == "1"
+FAILURE_THRESHOLD = int(os.environ.get("HEDGE_FAILURE_THRESHOLD", "3"))
+COOLDOWN = float(os.environ.get("HEDGE_COOLDOWN", "30"))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: open after `threshold` failures, half-open
+    (one trial request) after `cooldown` seconds. A trial that never reports
+    back (its turn was interrupted) is written off after another cooldown."""
+
+    def __init__(
+        self, name: str, threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN
+    ) -> None:
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_at: float | None = None  # half-open trial in flight since
+
+    def available(self) -> bool:
+        """Whether allow() could pass now (doesn't take the trial)."""
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.cooldown:
+            return False
+        return self.trial_at is None or now - self.trial_at >= self.cooldown
+
+    def allow(self) -> bool:
+        """Whether to send a request; once half-open, only the first caller
+        gets through (the trial) until record() or release()."""
+        if not self.available():
+            return False
+        if self.opened_at is not None:
+            self.trial_at = time.monotonic()
+        return True
+
+    def release(self, trial_at: float) -> None:
+        """Give back the trial started at `trial_at` if it ended without a
+        verdict (a later trial, or a recorded one, is left alone)."""
+        if self.trial_at == trial_at:
+            self.trial_at = None
+
+    def record(self, ok: bool) -> None:
+        trial = self.trial_at is not None
+        self.trial_at = None
+        if ok:
+            if self.opened_at is not None:
+                logger.info(f"Circuit {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.failures >= self.threshold and (
+            self.opened_at is None or trial  # failed its half-open trial
+        ):
+            logger.warning(f"Circuit {self.name} open after {self.failures} failures")
+            self.opened_at = time.monotonic()
+            worker_metrics.record_circuit_open(self.name)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker(name: str) -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+class _Contender:
+    """One stream in the race, with its first item being fetched."""
+
+    def __init__(self, role: str, stream: AsyncIterator) -> None:
+        self.role = role
+        self.stream = stream
+        self.first = asyncio.ensure_future(anext(stream))
+
+    async def aclose(self) -> None:
+        if not self.first.done():
+            self.first.cancel()
+            await asyncio.gather(self.first, return_exceptions=True)
+        aclose = getattr(self.stream, "aclose", None)
+        if aclose is not None:
+            try:
+                await aclose()
+            except Exception as e:
+                logger.debug(f"Closing {self.role} stream failed: {e!r}")
+
+
+async def hedge(
+    kind: str,
+    language: str,
+    deadline: float,
+    primary: Callable[[], AsyncIterator[T]],
+    backup: Callable[[], AsyncIterator[T]] | None,
+    clock_start: asyncio.Event | None = None,
+) -> AsyncIterator[T]:
+    """Yield the primary stream, or the backup if it answers first once the
+    primary has missed `deadline` seconds (counted from when `clock_start`
+    is set, e.g. the first text reaching TTS, or else from the call)."""
+    primary_breaker = breaker(f"{kind}:primary")
+    backup_breaker = breaker(f"{kind}:backup")
+    trials: dict[CircuitBreaker, float] = {}  # half-open trials this call took
+
+    def allow(b: CircuitBreaker) -> bool:
+        if not b.allow():
+            return False
+        if b.trial_at is not None:
+            trials[b] = b.trial_at
+        return True
+
+    direct = False
+    if backup is not None and backup_breaker.available():
+        direct = not allow(primary_breaker)
+        if direct and not allow(backup_breaker):
+            backup = None  # both open; the primary is all there is
+    else:
+        backup = None
+    if backup is None:
+        async for item in primary():
+            yield item
+        return
+
+    racing: list[_Contender] = []
+    winner: _Contender | None = None
+
+    def start_backup() -> None:
+        # The backup's half-open trial is only taken once it's really sent
+        if direct or allow(backup_breaker):
+            racing.append(_Contender("backup", backup()))
+
+    try:
+        if direct:
+            start_backup()
+        else:
+            racing.append(_Contender("primary", primary()))
+            first = racing[0].first
+            if clock_start is not None:
+                start = asyncio.ensure_future(clock_start.wait())
+                await asyncio.wait({first, start}, return_when=asyncio.FIRST_COMPLETED)
+                if not start.done():
+                    start.cancel()
+            await asyncio.wait({first}, timeout=deadline)
+            if not first.done():
+                logger.info(f"{kind} primary missed its {deadline:.2f}s deadline, hedging")
+                start_backup()
+            elif _failed(first):
+                start_backup()
+
+        pending = {c.first: c for c in racing}
+        while pending and winner is None:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                contender = pending.pop(future)
+                if not _failed(future):
+                    winner = contender
+                    break
+                logger.warning(f"{kind} {contender.role} failed: {_error(future)!r}")
+                breaker(f"{kind}:{contender.role}").record(False)
+        if winner is None:
+            raise _error(racing[0].first)
+
+        breaker(f"{kind}:{winner.role}").record(True)
+        if winner.role == "backup" and not direct:
+            primary_breaker.record(False)  # too slow counts against it
+        for contender in racing:
+            if contender is not winner:
+                await contender.aclose()
+        worker_metrics.record_hedge(
+            kind,
+            language,
+            "backup_only" if direct else "primary" if len(racing) == 1 else f"{winner.role}_won",
+        )
+
+        if isinstance(winner.first.exception(), StopAsyncIteration):
+            return
+        yield winner.first.result()
+        async for item in winner.stream:
+            yield item
+    finally:
+        if winner is None:
+            worker_metrics.record_hedge(kind, language, "failed")
+        # A trial that lost the race or was interrupted gets no verdict
+        for b, trial_at in trials.items():
+            b.release(trial_at)
+        for contender in racing:
+            await contender.aclose()
+
+
+def _error(first: asyncio.Future) -> BaseException:
+    """What a failed first item raised (exception() itself raises if cancelled)."""
+    if first.cancelled():
+        return RuntimeError("request cancelled before its first item")
+    return first.exception()
+
+
+def _failed(first: asyncio.Future) -> bool:
+    """The stream raised before its first item (ending empty isn't a failure)."""
+    if first.cancelled():
+        return True
+    error = first.exception()
+    return error is not None and not isinstance(error, StopAsyncIteration)
+
+
+class TextTee:
+    """Replays one text stream to any number of readers, so a hedged TTS
+    request can start late and still get the full reply text."""
+
+    def __init__(self, source: AsyncIterator[str]) -> None:
+        self._chunks: list[str] = []
+        self._closed = False
+        self._changed = asyncio.Condition()
+        self.first_text = asyncio.Event()
+        self._pump = asyncio.create_task(self._run(source))
+
+    async def _run(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                async with self._changed:
+                    self._chunks.append(chunk)
+                    self.first_text.set()
+                    self._changed.notify_all()
+        finally:
+            async with self._changed:
+                self._closed = True
+                self.first_text.set()
+                self._changed.notify_all()
+
+    async def reader(self) -> AsyncIterator[str]:
+        i = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: i < len(self._chunks) or self._closed)
+                chunks = self._chunks[i:]
+                closed = self._closed
+            for chunk in chunks:
+                yield chunk
+            i += len(chunks)
+            if closed and i >= len(self._chunks):
+                return
+
+    async def aclose(self) -> None:
+        self._pump.cancel()
+        await asyncio.gather(self._pump, return_exceptions=True)
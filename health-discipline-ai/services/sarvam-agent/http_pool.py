@@ -0,0 +1,103 @@
+"""
+Process-wide pooled HTTP clients.
+
+Every outbound HTTP call in the worker — Sarvam extraction and the NestJS
+webhooks — goes through here, so repeated requests to the same host reuse
+warm keep-alive connections instead of paying a TCP+TLS handshake each time.
+
+  - One httpx.AsyncClient per (event loop, host). httpx pools are bound to
+    the loop they were first used on, and the main process runs the webhook
+    sender on its own loop, so each loop gets its own clients.
+  - Per-host connection limits: configure() sets them for known hosts
+    (e.g. the Sarvam API, sized to the extraction concurrency); other hosts
+    get the HTTP_POOL_* defaults.
+  - HTTP/2 is negotiated when the optional `h2` package is installed
+    (pip install httpx[http2]), multiplexing requests over one connection.
+  - aclose() is the shutdown hook: job processes register it with
+    ctx.add_shutdown_callback, the webhook sender calls it when it stops.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("http-pool")
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class HostLimits:
+    max_connections: int = int(os.environ.get("HTTP_POOL_MAX_CONNECTIONS", "10"))
+    max_keepalive: int = int(os.environ.get("HTTP_POOL_MAX_KEEPALIVE", "10"))
+    keepalive_expiry: float = float(os.environ.get("HTTP_POOL_KEEPALIVE_EXPIRY", "60"))
+    timeout: float = float(os.environ.get("HTTP_POOL_TIMEOUT", "15"))
+
+
+_DEFAULT_LIMITS = HostLimits()
+_host_limits: dict[str, HostLimits] = {}
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def configure(
+    host: str,
+    *,
+    max_connections: int,
+    max_keepalive: int | None = None,
+    timeout: float = _DEFAULT_LIMITS.timeout,
+) -> None:
+    """Set pool limits for a host. Applies to clients created afterwards."""
+    _host_limits[host] = HostLimits(
+        max_connections=max_connections,
+        max_keepalive=max_keepalive if max_keepalive is not None else max_connections,
+        timeout=timeout,
+    )
+
+
+def _build(host: str) -> httpx.AsyncClient:
+    limits = _host_limits.get(host, _DEFAULT_LIMITS)
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=limits.timeout,
+        limits=httpx.Limits(
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive,
+            keepalive_expiry=limits.keepalive_expiry,
+        ),
+    )
+
+
+def client_for(url: str) -> httpx.AsyncClient:
+    """Pooled client for url's host, bound to the running event loop."""
+    host = urlsplit(url).netloc
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _clients.setdefault(loop, {})
+        client = clients.get(host)
+        if client is None or client.is_closed:
+            client = clients[host] = _build(host)
+    return client
+
+
+async def aclose(host: str | None = None) -> None:
+    """Close this loop's pooled clients (all hosts, or just one)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _clients.get(loop, {})
+        hosts = [host] if host is not None else list(clients)
+        closing = [clients.pop(h) for h in hosts if h in clients]
+    for client in closing:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client: {e}")
@@ -0,0 +1,189 @@
+"""
+In-call incremental extraction.
+
+Instead of sending the whole transcript to Sarvam 105B after hangup, the
+result is built up while the call is running:
+
+  - Every committed turn (conversation_item_added) goes through the lexicon
+    TurnTracker, which resolves the usual "haan le liya" / "sab le liya" /
+    "theek hoon" answers locally, turn by turn.
+  - A patient turn the lexicon can't fully read (any word outside its
+    phrase lists — complaints included —, vitals numbers, "not well",
+    reschedule, an unclear answer to a medicine question) marks the call
+    dirty and, with INCREMENTAL_EXTRACTION=1, starts a small windowed LLM
+    pass (data_extractor.WINDOW_PROMPT) over just the recent turns. At most
+    one window is in flight per call; turns that escalate meanwhile are
+    covered by the next window.
+  - Window results are merged field by field. A lexicon answer given after
+    the window ended is newer, so it wins over the window's value. The
+    window's wellness reads the escalated turns it was started for, so it
+    only replaces the lexicon's wellness when one of those came later.
+
+The result rides along in the post-call webhook as "extraction"; the
+backend still runs its own transcript parser and doesn't read it yet, so
+the windows are off by default — without them the field carries only what
+the lexicon resolved, at no Sarvam cost. Turn them on once the backend
+consumes it.
+
+finish() never waits: a window still in flight when the session closes is
+cancelled and the webhook goes out with what has settled. The LLM work is
+spread across the call instead of spiking when many calls end together.
+"""
+
+import asyncio
+import logging
+import os
+
+import worker_metrics
+from data_extractor import FALLBACK, request_window_extraction
+from lexicon import TurnTracker
+from transcript_store import TranscriptStore, Turn
+
+logger = logging.getLogger("incremental-extractor")
+
+# In-call LLM windows; off until the backend reads the "extraction" field
+WINDOWS_ENABLED = os.environ.get("INCREMENTAL_EXTRACTION", "0") == "1"
+# Turns of context before the first escalated turn in each LLM window
+WINDOW_CONTEXT_TURNS = int(os.environ.get("EXTRACTION_WINDOW_CONTEXT", "4"))
+
+_MED_STATUSES = {"taken", "not_taken"}
+
+
+class IncrementalExtractor:
+    """Builds the extract_call_data() result for one call as turns arrive."""
+
+    def __init__(
+        self, medicines: list[str], api_key: str | None, store: TranscriptStore
+    ) -> None:
+        self.medicines = medicines
+        self._api_key = api_key
+        self._tracker = TurnTracker(medicines)
+        self._store = store
+        self._dirty_from: int | None = None  # first escalated turn not yet sent
+        self._dirty_to = 0  # latest escalated turn (1-based count)
+        self._window: asyncio.Task | None = None
+        self.windows = 0
+
+        # Fields only the LLM fills in; turn index of the window that set them
+        self._llm_status: dict[str, tuple[str, int]] = {}
+        self._wellness: tuple[str, int] | None = None
+        self._vitals_checked: tuple[str, int] | None = None
+        self._glucose = None
+        self._bp = {"systolic": None, "diastolic": None}
+        self._complaints: list[str] = []
+        self._rescheduled = False
+
+    def add_turn(self, turn: Turn) -> None:
+        """Feed the turn just appended to the store (sync — call from the
+        session event handler)."""
+        # feed() is False for any patient turn with words outside the lexicon
+        ok = self._tracker.feed(turn.role.value, turn.text)
+        if turn.role.value == "user" and (not ok or self._tracker.unclear):
+            if self._dirty_from is None:
+                self._dirty_from = len(self._store) - 1
+            self._dirty_to = len(self._store)
+            self._maybe_start_window()
+
+    def _maybe_start_window(self) -> None:
+        if self._dirty_from is None or not self._api_key or not WINDOWS_ENABLED:
+            return
+        if self._window is not None and not self._window.done():
+            return  # the done-callback picks up the new dirty turns
+        start = max(0, self._dirty_from - WINDOW_CONTEXT_TURNS)
+        end = len(self._store)
+        self._dirty_from = None
+        self._window = asyncio.create_task(self._run_window(start, end, self._dirty_to))
+        self._window.add_done_callback(self._window_done)
+
+    def _window_done(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error("Extraction window crashed", exc_info=task.exception())
+        self._maybe_start_window()
+
+    async def _run_window(self, start: int, end: int, escalated: int) -> None:
+        self.windows += 1
+        text = self._store.prompt_text(start, end)
+        result = await request_window_extraction(text, self._api_key, self.medicines)
+        if result is None:
+            logger.warning(f"Extraction window turns {start}-{end} failed")
+            return
+        self._merge(result, end, escalated)
+
+    def _merge(self, result: dict, turn: int, escalated: int) -> None:
+        """Apply a window result covering turns up to `turn` whose latest
+        escalated turn was `escalated` (both 1-based counts)."""
+        for pair in str(result.get("medicine_responses") or "").split(","):
+            name, _, status = pair.rpartition(":")
+            name, status = name.strip(), status.strip()
+            match = next((m for m in self.medicines if m.lower() == name.lower()), None)
+            if match and status in _MED_STATUSES:
+                if self._tracker.updated.get(f"med:{match}", 0) <= turn:
+                    self._llm_status[match] = (status, turn)
+
+        wellness = result.get("wellness")
+        if wellness and wellness != "unclear":
+            self._wellness = (wellness, escalated)
+        checked = result.get("vitals_checked")
+        if checked in ("yes", "no"):
+            self._vitals_checked = (checked, turn)
+
+        vitals = result.get("vitals") or {}
+        if vitals.get("glucose") is not None:
+            self._glucose = vitals["glucose"]
+        for k, v in (vitals.get("blood_pressure") or {}).items():
+            if k in self._bp and v is not None:
+                self._bp[k] = v
+
+        # Overlapping windows repeat earlier complaints; keep each one once
+        for complaint in str(result.get("complaints") or "").split(","):
+            complaint = complaint.strip()
+            if complaint and complaint.lower() != "none" and complaint not in self._complaints:
+                self._complaints.append(complaint)
+        if str(result.get("re_scheduled")).lower() == "true":
+            self._rescheduled = True
+
+    def _pick(self, tracker_value, tracker_key: str, llm: tuple | None):
+        """Newer of the lexicon's value and the LLM window's value."""
+        if llm is not None and self._tracker.updated.get(tracker_key, 0) <= llm[1]:
+            return llm[0]
+        return tracker_value
+
+    def snapshot(self) -> dict:
+        """Current best result, in the extract_call_data() shape."""
+        if not self._tracker.turns:
+            return FALLBACK.copy()
+        tracker = self._tracker
+        responses = []
+        for name in self.medicines:
+            status = self._pick(
+                tracker.status.get(name, "unclear"), f"med:{name}", self._llm_status.get(name)
+            )
+            responses.append(f"{name}:{status}")
+
+        vitals_default = "unclear" if tracker.vitals_asked else "not_applicable"
+        if tracker.vitals_checked != "not_applicable":
+            vitals_default = tracker.vitals_checked
+        return {
+            "medicine_responses": ",".join(responses),
+            "vitals_checked": self._pick(vitals_default, "vitals_checked", self._vitals_checked),
+            "vitals": {"glucose": self._glucose, "blood_pressure": dict(self._bp)},
+            "wellness": self._pick(tracker.wellness or "unclear", "wellness", self._wellness),
+            "complaints": ", ".join(self._complaints) or "none",
+            "re_scheduled": "true" if self._rescheduled else "false",
+        }
+
+    def finish(self) -> dict:
+        """Final result for the webhook. Doesn't wait: a window still in
+        flight is cancelled and its turns keep the lexicon's reading."""
+        if self._window is not None and not self._window.done():
+            logger.info("Extraction window still running at close, using snapshot")
+            self._window.cancel()
+        worker_metrics.record_extraction("incremental")
+        result = self.snapshot()
+        logger.info(
+            f"Incremental extraction: {result['medicine_responses']} "
+            f"({self.windows} LLM window(s), {self._tracker.turns} turns)"
+        )
+        return result
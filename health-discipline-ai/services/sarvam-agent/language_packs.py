@@ -0,0 +1,344 @@
+"""
+Language packs: everything per-language in one registry.
+
+One LanguagePack per supported language code ("hi", "ta", ...) holds the
+Sarvam STT/TTS codes and speaker, the name the system prompt uses, the
+greeting and stock phrases, the extraction lexicon, endpointing delays and
+hedging deadlines.
+agent.py (plugins, session tuning, greeting cache), prompt.py and lexicon.py
+all read it from here, so adding a language or fixing a code is one edit.
+
+Packs are built once at import. LANGUAGE_PACKS_FILE may point to a JSON
+overlay with the same shape as _BUILTIN, to tune or add languages without a
+code change, e.g. {"ta": {"min_endpointing_delay": 0.5}}. An overlay field
+replaces the built-in one; lexicon categories are replaced individually.
+
+A code with no pack (or a missing preferredLanguage) gets the DEFAULT_LANGUAGE
+pack everywhere — prompt, STT, TTS — instead of STT auto-detection.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("language-packs")
+
+DEFAULT_LANGUAGE = "hi"
+DEFAULT_SPEAKER = "simran"  # Energetic, cheery female voice
+DEFAULT_MIN_ENDPOINTING_DELAY = 0.3
+DEFAULT_MAX_ENDPOINTING_DELAY = 3.5
+# Time to first LLM token / first TTS audio before a backup request is raced
+# against the primary (see hedging.py)
+DEFAULT_LLM_HEDGE_AFTER = 1.0
+DEFAULT_TTS_HEDGE_AFTER = 0.8
+
+# Lexicon phrase categories (see lexicon.py). Romanized phrases mirror
+# EXTRACTION_PROMPT; native-script variants are there because Sarvam STT
+# (mode="transcribe") returns the patient's own script. "filler" words carry
+# no answer (particles, forms of address); a patient turn with any word
+# outside these lists goes to the LLM.
+_BUILTIN: dict[str, dict] = {
+    "hi": {
+        "name": "Hindi",
+        "greeting": "Namaste",
+        "stt_language": "hi-IN",
+        "tts_language": "hi-IN",
+        "stock_phrases": ["अच्छा, ठीक है।", "बहुत बढ़िया!", "कोई बात नहीं।"],
+        "lexicon": {
+            "taken": [
+                "haan", "han", "le liya", "kha liya", "li hai", "liya tha", "le li", "kha li",
+                "हाँ", "हां", "ले लिया", "खा लिया", "ली है", "लिया था", "ले ली", "खा ली",
+            ],
+            "taken_all": [
+                "sab le liya", "saari le li", "sab kha li", "saare tablets le liye",
+                "सब ले लिया", "सारी ले ली", "सब खा ली", "सारे टैबलेट ले लिए",
+            ],
+            "not_taken": [
+                "nahi", "nahi liya", "nahi li", "bhool gaya", "bhool gayi", "nahi khayi",
+                "नहीं", "नहीं लिया", "नहीं ली", "भूल गया", "भूल गयी", "भूल गई", "नहीं खाई",
+            ],
+            "not_time_yet": [
+                "abhi time nahi hua", "abhi raat nahi hui", "baad mein lungi", "baad mein lunga",
+                "raat ko lungi", "raat ko lunga", "woh toh raat ki hai",
+                "अभी टाइम नहीं हुआ", "बाद में लूंगी", "बाद में लूंगा", "रात को लूंगी",
+                "रात को लूंगा",
+            ],
+            "reschedule": [
+                "baad mein call karo", "abhi busy hoon", "phone rakhti hoon",
+                "बाद में कॉल करो", "अभी बिज़ी हूँ",
+            ],
+            "feeling_good": [
+                "theek hoon", "thik hoon", "accha hoon", "achha hoon", "sab theek hai", "badhiya",
+                "ठीक हूँ", "ठीक हूं", "अच्छा हूँ", "सब ठीक है", "बढ़िया",
+            ],
+            "not_well": [
+                "dard", "bukhar", "chakkar", "kamzori", "khansi", "takleef", "tabiyat kharab",
+                "दर्द", "बुखार", "चक्कर", "कमज़ोरी", "खांसी", "तकलीफ",
+            ],
+            "dont_know": [
+                "yaad nahi", "pata nahi", "maloom nahi", "yaad nahi aa raha",
+                "याद नहीं", "पता नहीं", "मालूम नहीं",
+            ],
+            "filler": [
+                "ji", "beta", "beti", "main", "maine", "hoon", "hai", "bhi", "toh", "to",
+                "जी", "बेटा", "बेटी", "मैं", "मैंने", "हूँ", "हूं", "है", "भी", "तो",
+            ],
+        },
+    },
+    "te": {
+        "name": "Telugu",
+        "greeting": "Namaskaram",
+        "stt_language": "te-IN",
+        "tts_language": "te-IN",
+        "min_endpointing_delay": 0.4,
+        "stock_phrases": ["సరే, మంచిది.", "చాలా బాగుంది!", "పర్వాలేదు."],
+        "lexicon": {
+            "taken": [
+                "veskunna", "teeskunna", "veskunnanu", "thinna",
+                "వేసుకున్నా", "తీసుకున్నా", "వేసుకున్నాను",
+            ],
+            "taken_all": [
+                "anni veskunna", "anni tablets veskunna", "anni teeskunna", "annee thinna",
+                "అన్నీ వేసుకున్నా", "అన్నీ తీసుకున్నా",
+            ],
+            "not_taken": [
+                "ledhu", "veskoledhu", "marchipoya", "teeskoledhu", "thinnaledhu",
+                "లేదు", "వేసుకోలేదు", "మర్చిపోయా", "తీసుకోలేదు",
+            ],
+            "not_time_yet": [
+                "inka time kaale", "inka time avvaledhu", "tarvata vestanu", "adi night tablet",
+            ],
+            "reschedule": ["tarvata call cheyandi", "ippudu busy"],
+            "feeling_good": ["bagunnanu", "bagunna", "బాగున్నాను", "బాగున్నా"],
+            "not_well": ["noppi", "jwaram", "నొప్పి", "జ్వరం"],
+            "dont_know": ["gurthu ledhu", "teliyadu", "గుర్తు లేదు", "తెలియదు"],
+            "filler": ["amma", "andi", "nenu", "అమ్మ", "అండి", "నేను"],
+        },
+    },
+    "ta": {
+        "name": "Tamil",
+        "greeting": "Vanakkam",
+        "stt_language": "ta-IN",
+        "tts_language": "ta-IN",
+        # Long agglutinated words with pauses inside them: wait a little
+        # longer before treating silence as the end of the turn
+        "min_endpointing_delay": 0.45,
+        "stock_phrases": ["சரி, நல்லது.", "ரொம்ப நல்லது!", "பரவாயில்லை."],
+        "lexicon": {
+            "taken": [
+                "aama", "eduthuten", "eduthukitten", "saptten", "saapten",
+                "ஆமா", "எடுத்துட்டேன்", "சாப்பிட்டேன்",
+            ],
+            "taken_all": [
+                "ellam eduthuten", "ellam saapten", "ellam eduthukitten",
+                "எல்லாம் எடுத்துட்டேன்", "எல்லாம் சாப்பிட்டேன்",
+            ],
+            "not_taken": [
+                "illa", "edukala", "marandhuten", "saapidala",
+                "இல்ல", "இல்லை", "எடுக்கல", "மறந்துட்டேன்",
+            ],
+            "not_time_yet": ["innum time aagala", "appuram edupeen", "adhu night tablet"],
+            "reschedule": ["appuram call pannunga", "ippodhu busy"],
+            "feeling_good": ["nalla irukken", "nalla iruken", "நல்லா இருக்கேன்"],
+            "not_well": ["vali", "kaichal", "வலி", "காய்ச்சல்"],
+            "dont_know": ["theriyala", "nyabagam illa", "தெரியல", "ஞாபகம் இல்ல"],
+            "filler": ["amma", "ah", "naan", "அம்மா", "நான்"],
+        },
+    },
+    "kn": {
+        "name": "Kannada",
+        "greeting": "Namaskara",
+        "stt_language": "kn-IN",
+        "tts_language": "kn-IN",
+        "min_endpointing_delay": 0.4,
+        "stock_phrases": ["ಸರಿ, ಒಳ್ಳೆಯದು.", "ತುಂಬಾ ಒಳ್ಳೆಯದು!", "ಪರವಾಗಿಲ್ಲ."],
+        "lexicon": {
+            "taken": ["thogondidini", "thogondenu", "ತೊಗೊಂಡಿದೀನಿ"],
+            "taken_all": ["ella thogondidini", "ella tablets thogondidini", "ಎಲ್ಲ ತೊಗೊಂಡಿದೀನಿ"],
+            "not_taken": ["illa", "thogondilla", "marethidini", "ಇಲ್ಲ"],
+            "not_time_yet": ["innu time aagilla", "mele thogothini"],
+            "reschedule": ["amele call maadi", "iga busy"],
+            "feeling_good": ["chennagiddini", "ಚೆನ್ನಾಗಿದ್ದೀನಿ"],
+            "not_well": ["novu", "jwara", "ನೋವು", "ಜ್ವರ"],
+            "dont_know": ["gottilla", "nenapilla", "ಗೊತ್ತಿಲ್ಲ", "ನೆನಪಿಲ್ಲ"],
+            "filler": ["amma", "naanu", "ಅಮ್ಮ", "ನಾನು"],
+        },
+    },
+    "ml": {
+        "name": "Malayalam",
+        "greeting": "Namaskaram",
+        "stt_language": "ml-IN",
+        "tts_language": "ml-IN",
+        # Long agglutinated words with pauses inside them: wait a little
+        # longer before treating silence as the end of the turn
+        "min_endpointing_delay": 0.45,
+    },
+    "bn": {
+        "name": "Bengali",
+        "greeting": "Nomoshkar",
+        "stt_language": "bn-IN",
+        "tts_language": "bn-IN",
+        "stock_phrases": ["আচ্ছা, ঠিক আছে।", "খুব ভালো!", "কোনো ব্যাপার না।"],
+        "lexicon": {
+            "taken": ["kheye niyechi", "niyechi", "খেয়ে নিয়েছি", "নিয়েছি"],
+            "taken_all": ["sob kheye niyechi", "sob niyechi", "সব খেয়ে নিয়েছি", "সব নিয়েছি"],
+            "not_taken": ["na", "khaini", "bhule gechi", "খাইনি", "ভুলে গেছি"],
+            "not_time_yet": ["ekhono shomoy hoyni", "pore khabo"],
+            "reschedule": ["pore call korun", "ekhon busy"],
+            "feeling_good": ["bhalo achi", "ভালো আছি"],
+            "not_well": ["byatha", "jor", "ব্যথা", "জ্বর"],
+            "dont_know": ["mone nei", "jani na", "মনে নেই", "জানি না"],
+            "filler": ["ami", "maa", "আমি"],
+        },
+    },
+    "mr": {
+        "name": "Marathi",
+        "greeting": "Namaskar",
+        "stt_language": "mr-IN",
+        "tts_language": "mr-IN",
+        "stock_phrases": ["बरं, ठीक आहे.", "खूप छान!", "काही हरकत नाही."],
+        "lexicon": {
+            "taken": ["ghetla", "ghetli", "khalla", "khalli", "घेतला", "घेतली"],
+            "taken_all": ["sagla ghetla", "sagli ghetli", "सगळ्या घेतल्या"],
+            "not_taken": ["nahi", "ghetla nahi", "visarlo", "नाही", "घेतला नाही", "विसरलो"],
+            "not_time_yet": ["ajun time nahi zhala", "nantar ghein"],
+            "reschedule": ["nantar call kara", "ata busy aahe"],
+            "feeling_good": ["bara aahe", "chhan aahe", "बरा आहे", "छान आहे"],
+            "not_well": ["dukhtay", "taap", "दुखतंय", "ताप"],
+            "dont_know": ["aathvat nahi", "mahit nahi", "आठवत नाही", "माहित नाही"],
+            "filler": ["mi", "मी"],
+        },
+    },
+    "gu": {
+        "name": "Gujarati",
+        "greeting": "Namaste",
+        "stt_language": "gu-IN",
+        "tts_language": "gu-IN",
+    },
+    "pa": {
+        "name": "Punjabi",
+        "greeting": "Sat Sri Akaal",
+        "stt_language": "pa-IN",
+        "tts_language": "pa-IN",
+    },
+    "ur": {
+        "name": "Urdu",
+        "greeting": "Assalaam Alaikum",
+        # Sarvam has no Urdu models; spoken Urdu is transcribed and voiced
+        # as Hindustani, while Gemini is still told to speak Urdu
+        "stt_language": "hi-IN",
+        "tts_language": "hi-IN",
+        "stock_phrases": ["अच्छा, ठीक है।", "बहुत ख़ूब!", "कोई बात नहीं।"],
+        # On top of the Hindi phrases, which match romanized Urdu as well
+        "lexicon": {
+            "not_taken": ["nahin", "nahin li", "nahin khayi"],
+            "feeling_good": ["khairiyat se hoon", "alhamdulillah theek hoon"],
+            "not_well": ["tabiyat theek nahin", "tabiyat kharab hai"],
+            "dont_know": ["yaad nahin", "pata nahin", "maloom nahin"],
+        },
+    },
+    "en": {
+        "name": "English",
+        "greeting": "Hello",
+        "stt_language": "en-IN",
+        "tts_language": "en-IN",
+        "stock_phrases": ["Okay, that's good.", "Very good!", "No problem."],
+        "lexicon": {
+            "taken": ["yes", "taken", "i took it"],
+            "taken_all": ["took all", "taken all", "all taken", "i took everything"],
+            "not_taken": ["no", "didn't take", "missed", "forgot"],
+            "not_time_yet": [
+                "not time yet", "will take later", "haven't taken yet", "that's for night",
+            ],
+            "reschedule": ["call me later", "i am busy", "not now"],
+            "feeling_good": [
+                "i am fine", "i'm fine", "doing well", "i am good", "i'm good", "all good",
+            ],
+            "not_well": ["pain", "fever", "dizzy", "weak", "cough", "not well", "not feeling well"],
+            "dont_know": [
+                "don't remember", "do not remember", "can't remember", "no idea", "not sure",
+                "don't know", "i don't know",
+            ],
+            "filler": ["i", "am", "it", "sir", "madam", "ok", "okay", "ji"],
+        },
+    },
+}
+
+
+@dataclass(frozen=True)
+class LanguagePack:
+    code: str
+    name: str  # as the system prompt names it ("Speak ONLY in {name}")
+    stt_language: str  # Sarvam STT language code
+    tts_language: str  # Sarvam TTS target_language_code
+    greeting: str
+    tts_speaker: str = DEFAULT_SPEAKER
+    # Pre-synthesized acknowledgements, in this order: neutral ("okay"),
+    # positive ("very good"), reassuring ("no problem") — see response_cache.py
+    stock_phrases: tuple[str, ...] = ()
+    lexicon: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    # In STT turn detection these are added on top of Sarvam's own
+    # end-of-speech signal (~70ms)
+    min_endpointing_delay: float = DEFAULT_MIN_ENDPOINTING_DELAY
+    max_endpointing_delay: float = DEFAULT_MAX_ENDPOINTING_DELAY
+    llm_hedge_after: float = DEFAULT_LLM_HEDGE_AFTER
+    tts_hedge_after: float = DEFAULT_TTS_HEDGE_AFTER
+
+
+def _merge(base: dict, overlay: dict) -> dict:
+    merged = {**base, **overlay}
+    if "lexicon" in base and "lexicon" in overlay:
+        merged["lexicon"] = {**base["lexicon"], **overlay["lexicon"]}
+    return merged
+
+
+def _load_overlay(path: str) -> dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            overlay = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Ignoring language pack overlay {path}: {e}")
+        return {}
+    if not isinstance(overlay, dict):
+        logger.error(f"Ignoring language pack overlay {path}: expected an object of languages")
+        return {}
+    return overlay
+
+
+def _build(builtin: dict[str, dict], overlay: dict[str, dict]) -> dict[str, LanguagePack]:
+    packs: dict[str, LanguagePack] = {}
+    for code in [*builtin, *(c for c in overlay if c not in builtin)]:
+        spec = _merge(builtin.get(code, {}), overlay.get(code, {}))
+        try:
+            packs[code] = LanguagePack(
+                code=code,
+                **{
+                    **spec,
+                    "stock_phrases": tuple(spec.get("stock_phrases", ())),
+                    "lexicon": {k: tuple(v) for k, v in spec.get("lexicon", {}).items()},
+                },
+            )
+        except TypeError as e:
+            logger.error(f"Skipping language pack '{code}': {e}")
+    return packs
+
+
+PACKS: dict[str, LanguagePack] = _build(
+    _BUILTIN,
+    _load_overlay(os.environ["LANGUAGE_PACKS_FILE"])
+    if os.environ.get("LANGUAGE_PACKS_FILE")
+    else {},
+)
+_warned: set[str] = set()
+
+
+def get(code: str | None) -> LanguagePack:
+    """The pack for a language code, or the DEFAULT_LANGUAGE pack."""
+    pack = PACKS.get(code or DEFAULT_LANGUAGE)
+    if pack is not None:
+        return pack
+    if code not in _warned:
+        _warned.add(code)
+        logger.warning(f"No language pack for '{code}', using '{DEFAULT_LANGUAGE}'")
+    return PACKS[DEFAULT_LANGUAGE]
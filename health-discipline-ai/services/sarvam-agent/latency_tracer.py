@@ -0,0 +1,189 @@
+"""
+Per-turn latency tracing for the voice pipeline.
+
+Each patient turn is traced from the moment they stop speaking through the
+stages that make up the silence they hear:
+
+  stt_final        user stops speaking → final STT transcript
+  endpointing      end-of-utterance delay before the turn is committed
+  llm_ttft         Gemini time-to-first-token (from LiveKit LLM metrics)
+  first_token      user stops speaking → first sanitized token out of llm_node
+  tts_first_audio  Sarvam TTS time-to-first-byte (from LiveKit TTS metrics)
+  playout_start    user stops speaking → agent starts speaking (what the patient feels)
+
+Values are recorded twice: into process-wide histograms keyed by
+(stage, language) for capacity/tuning dashboards (also exported to
+Prometheus, see worker_metrics.py), and into per-call histograms whose
+percentiles go out with the post-call webhook.
+"""
+
+import logging
+import threading
+import time
+
+import worker_metrics
+
+logger = logging.getLogger("latency")
+
+STT_FINAL = "stt_final"
+ENDPOINTING = "endpointing"
+LLM_TTFT = "llm_ttft"
+FIRST_TOKEN = "first_token"
+TTS_FIRST_AUDIO = "tts_first_audio"
+PLAYOUT_START = "playout_start"
+
+STAGES = (STT_FINAL, ENDPOINTING, LLM_TTFT, FIRST_TOKEN, TTS_FIRST_AUDIO, PLAYOUT_START)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of millisecond values.
+
+    Values below 2 * SUB_BUCKETS ms are exact; above that each power of two
+    is split into SUB_BUCKETS buckets, bounding relative error to ~3% at any
+    magnitude with a few hundred sparse counters.
+    """
+
+    SUB_BUCKETS = 32
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        shift = max(value.bit_length() - 6, 0)  # 6 = log2(2 * SUB_BUCKETS)
+        return shift * cls.SUB_BUCKETS + (value >> shift)
+
+    @classmethod
+    def _bucket_value(cls, index: int) -> float:
+        """Midpoint of a bucket, in ms."""
+        if index < 2 * cls.SUB_BUCKETS:
+            return float(index)
+        shift = index // cls.SUB_BUCKETS - 1
+        sub = index - shift * cls.SUB_BUCKETS
+        return ((sub << shift) + ((sub + 1) << shift) - 1) / 2
+
+    def record(self, ms: float) -> None:
+        ms = max(ms, 0.0)
+        idx = self._index(int(ms))
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                return min(self._bucket_value(idx), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "p50": round(self.percentile(50)),
+            "p95": round(self.percentile(95)),
+            "p99": round(self.percentile(99)),
+            "max": round(self.max),
+            "mean": round(self.total / self.count) if self.count else 0,
+        }
+
+
+# Process-wide histograms keyed by (stage, language)
+_histograms: dict[tuple[str, str], LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def record(stage: str, language: str, ms: float) -> None:
+    with _histograms_lock:
+        hist = _histograms.get((stage, language))
+        if hist is None:
+            hist = _histograms[(stage, language)] = LatencyHistogram()
+        hist.record(ms)
+    worker_metrics.record_turn_latency(stage, language, ms)
+
+
+def snapshot() -> dict[tuple[str, str], LatencyHistogram]:
+    """Copy of the process-wide histograms (safe to read from another thread)."""
+    with _histograms_lock:
+        copies = {}
+        for key, hist in _histograms.items():
+            copy = LatencyHistogram()
+            copy.merge(hist)
+            copies[key] = copy
+        return copies
+
+
+class TurnTracer:
+    """Collects per-turn stage latencies for one call."""
+
+    def __init__(self, language: str) -> None:
+        self.language = language
+        self.turns = 0
+        self._speech_end = 0.0
+        self._marked: set[str] = set()
+        self._call: dict[str, LatencyHistogram] = {}
+
+    def _mark(self, stage: str, ms: float) -> None:
+        # One value per stage per turn; ignore events before the first user turn
+        # (e.g. the greeting) and late duplicates (preemptive generation retries)
+        if not self._speech_end or stage in self._marked:
+            return
+        self._marked.add(stage)
+        self._call.setdefault(stage, LatencyHistogram()).record(ms)
+        record(stage, self.language, ms)
+
+    def _since_speech_end(self, ts: float | None) -> float:
+        return ((ts or time.time()) - self._speech_end) * 1000
+
+    def user_speech_ended(self, ts: float | None = None) -> None:
+        self._speech_end = ts or time.time()
+        self._marked = set()
+        self.turns += 1
+
+    def stt_final(self, ts: float | None = None) -> None:
+        self._mark(STT_FINAL, self._since_speech_end(ts))
+
+    def endpointing(self, delay_s: float) -> None:
+        self._mark(ENDPOINTING, delay_s * 1000)
+
+    def llm_ttft(self, ttft_s: float) -> None:
+        self._mark(LLM_TTFT, ttft_s * 1000)
+
+    def first_token(self) -> None:
+        if FIRST_TOKEN not in self._marked:
+            self._mark(FIRST_TOKEN, self._since_speech_end(None))
+
+    def tts_first_audio(self, ttfb_s: float) -> None:
+        self._mark(TTS_FIRST_AUDIO, ttfb_s * 1000)
+
+    def playout_started(self, ts: float | None = None) -> float | None:
+        """Mark agent speech start; returns the end-to-end turn latency in ms."""
+        if not self._speech_end or PLAYOUT_START in self._marked:
+            return None
+        latency_ms = self._since_speech_end(ts)
+        self._mark(PLAYOUT_START, latency_ms)
+        return latency_ms
+
+    def summary(self) -> dict:
+        """Per-call percentiles for the webhook payload."""
+        return {
+            "turns": self.turns,
+            **{stage: self._call[stage].summary() for stage in STAGES if stage in self._call},
+        }
@@ -0,0 +1,273 @@
+"""
+Rule-based fast path for post-call extraction.
+
+Most calls are simple confirmations ("sab le liya", a clear "haan" after each
+medicine question, "theek hoon"). For those, sending the whole transcript to
+Sarvam 105B is seconds of latency and paid tokens for an answer we can read
+off the transcript locally.
+
+This module compiles the taken / taken-all / not-taken / not-time-yet phrase
+lists from EXTRACTION_PROMPT into a single precomputed regex and resolves a
+transcript only when every field is unambiguous. Every patient turn has to
+be fully covered by lexicon phrases, filler words and medicine names: a
+single unknown word may be a complaint or a qualifier ("haan, ek li"), so
+it escalates. So does anything else we can't read with certainty (vitals
+numbers, reschedule requests, conflicting answers, a yes/no to a question
+about several medicines that doesn't name one) — None tells the caller to
+ask the LLM. "Don't remember" answers are recorded as unclear.
+
+The same rules run turn by turn during the call (TurnTracker, used by
+incremental_extractor.py), so most of the result is known before hangup.
+
+Keep in sync with: data_extractor.py EXTRACTION_PROMPT (phrase lists are in
+language_packs.py)
+"""
+
+import re
+
+import language_packs
+
+TAKEN = "taken"
+TAKEN_ALL = "taken_all"
+NOT_TAKEN = "not_taken"
+NOT_TIME_YET = "not_time_yet"
+RESCHEDULE = "reschedule"
+FEELING_GOOD = "feeling_good"
+NOT_WELL = "not_well"
+DONT_KNOW = "dont_know"
+FILLER = "filler"  # matched only so coverage can discount it; never classified
+UNCLEAR = "unclear"
+
+# Per-language phrase lists live in the language packs (language_packs.py),
+# keyed by the category names above
+LEXICON: dict[str, dict[str, tuple[str, ...]]] = {
+    code: pack.lexicon for code, pack in language_packs.PACKS.items()
+}
+
+# Words that mark an agent turn as the vitals question. Only used to decide
+# whether a "no" answers vitals rather than a medicine.
+VITALS_KEYWORDS = [
+    "glucometer", "sugar", "glucose", "bp", "blood pressure",
+    "शुगर", "बीपी", "ग्लूकोमीटर",
+]
+
+# Whole-phrase boundaries. \b alone breaks inside Indic words because vowel
+# signs (matras) aren't \w, so treat the Indic blocks as word characters too.
+_WORD_CHARS = "\\w\u0900-\u0DFF"
+# Punctuation (incl. danda) → space, so "haan, le liya।" tokenizes cleanly
+_PUNCT_TABLE = str.maketrans({c: " " for c in ".,!?;:।॥\"()[]{}-"})
+_DIGIT_RE = re.compile(r"\d")
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().translate(_PUNCT_TABLE).split())
+
+
+def _compile(phrases: dict[str, str]) -> re.Pattern:
+    # Longest-first so "nahi liya" wins over "nahi" and "sab le liya" over "le liya"
+    alternation = "|".join(
+        re.escape(p) for p in sorted(phrases, key=len, reverse=True)
+    )
+    return re.compile(rf"(?<![{_WORD_CHARS}])(?:{alternation})(?![{_WORD_CHARS}])")
+
+
+def _build_phrase_table() -> dict[str, str]:
+    table: dict[str, str] = {}
+    for categories in LEXICON.values():
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                # First language wins on collisions ("illa" is both ta and kn,
+                # same meaning) — categories never disagree across languages
+                table.setdefault(normalize(phrase), category)
+    return table
+
+
+# Precomputed once at import — matching is a single regex scan per turn
+PHRASE_CATEGORY = _build_phrase_table()
+_PHRASE_RE = _compile(PHRASE_CATEGORY)
+_VITALS_RE = _compile({normalize(k): "vitals" for k in VITALS_KEYWORDS})
+
+
+def classify(text: str) -> set[str]:
+    """Return the set of lexicon categories matched in one utterance."""
+    return {
+        PHRASE_CATEGORY[m.group(0)]
+        for m in _PHRASE_RE.finditer(normalize(text))
+    } - {FILLER}
+
+
+def _medicine_patterns(medicines: list[str]) -> list[re.Pattern]:
+    """Match the full name or its leading word ("Metformin 500mg" → "metformin")."""
+    patterns = []
+    for name in medicines:
+        norm = normalize(name)
+        variants = {norm}
+        head = norm.split(" ", 1)[0]
+        if len(head) >= 4:
+            variants.add(head)
+        patterns.append(_compile({v: name for v in variants if v}))
+    return patterns
+
+
+_ANSWERS = {TAKEN, TAKEN_ALL, NOT_TAKEN, NOT_TIME_YET}
+
+
+def _answer_status(categories: set[str]) -> str | None:
+    """Reduce one answer's categories to a medicine status, or None if unclear."""
+    if NOT_TIME_YET in categories:
+        categories = (categories - {NOT_TIME_YET}) | {NOT_TAKEN}
+    decisive = categories & {TAKEN, NOT_TAKEN}
+    if len(decisive) != 1:
+        return None  # nothing decisive, or "haan ... nahi" in the same breath
+    return TAKEN if TAKEN in decisive else NOT_TAKEN
+
+
+class TurnTracker:
+    """Per-turn lexicon state machine shared by fast_extract() and the in-call
+    IncrementalExtractor.
+
+    feed() applies one turn and returns False when the turn needs the LLM:
+    words the lexicon doesn't cover, numbers, reschedule, feeling unwell, a
+    conflicting answer, or a medicine answer we can't pin to one medicine.
+    After a user turn, `unclear` is True if a pending medicine question got
+    an answer we couldn't read. `updated` records the turn index at which each
+    field ("med:<name>", "wellness", "vitals_checked") was last set, so
+    results from a later LLM pass can tell which values are newer.
+    """
+
+    def __init__(self, medicines: list[str]) -> None:
+        self.medicines = medicines
+        self._med_patterns = _medicine_patterns(medicines)
+        self.status: dict[str, str] = {}
+        self.pending: list[str] = []  # medicines asked about in the last agent turn
+        self.vitals_pending = False
+        self.vitals_asked = False
+        self.vitals_checked = "not_applicable"
+        self.wellness: str | None = None
+        self.unclear = False
+        self.turns = 0
+        self.updated: dict[str, int] = {}
+
+    def _set_status(self, name: str, value: str) -> None:
+        self.status[name] = value
+        self.updated[f"med:{name}"] = self.turns
+
+    def feed(self, role: str, text: str) -> bool:
+        self.turns += 1
+        self.unclear = False
+        if role == "agent":
+            norm = normalize(text)
+            self.pending = [
+                name for name, pat in zip(self.medicines, self._med_patterns)
+                if pat.search(norm)
+            ]
+            self.vitals_pending = bool(_VITALS_RE.search(norm))
+            self.vitals_asked = self.vitals_asked or self.vitals_pending
+            return True
+
+        # Numbers mean vitals readings (or doses) — leave those to the LLM
+        if _DIGIT_RE.search(text):
+            return False
+        norm = normalize(text)
+        named = [
+            name for name, pat in zip(self.medicines, self._med_patterns) if pat.search(norm)
+        ]
+        if not self._covered(norm):
+            return False
+        categories = classify(text)
+        if RESCHEDULE in categories or NOT_WELL in categories:
+            return False
+        # "Metformin li aur sugar check kiya?" — a yes/no can't be split
+        # between the medicine and the vitals question
+        if self.vitals_pending and self.pending:
+            return False
+        if FEELING_GOOD in categories:
+            self.wellness = "good"
+            self.updated["wellness"] = self.turns
+
+        if TAKEN_ALL in categories:
+            if categories & {NOT_TAKEN, DONT_KNOW}:
+                return False
+            for name in self.medicines:
+                self._set_status(name, TAKEN)
+            self.pending = []
+            return True
+
+        if self.vitals_pending and not self.pending:
+            # Only a clear "no" is safe; "yes" means numbers should follow
+            if DONT_KNOW in categories or _answer_status(categories) != NOT_TAKEN:
+                return False
+            self.vitals_checked = "no"
+            self.updated["vitals_checked"] = self.turns
+            self.vitals_pending = False
+            return True
+
+        if self.pending or named:
+            if DONT_KNOW in categories:
+                # "yaad nahi" alone is an answer; next to a yes/no it's a conflict
+                answer = UNCLEAR if not categories & _ANSWERS else None
+            else:
+                answer = _answer_status(categories)
+            # A bare "haan" can only answer a question about one medicine
+            targets = named or (self.pending if len(self.pending) == 1 else [])
+            if answer is None or not targets:
+                self.unclear = True
+                return False
+            # The agent mentioning an answered medicine again ("Metformin nahi
+            # li, koi baat nahi — kal zaroor lijiye") isn't asking again; an
+            # unnamed "haan" to it mustn't overwrite the earlier answer
+            if not named and any(self.status.get(n, answer) != answer for n in targets):
+                return False
+            for name in targets:
+                self._set_status(name, answer)
+            self.pending = [name for name in self.pending if name not in targets]
+        return True
+
+    def _covered(self, norm: str) -> bool:
+        """Every word of a normalized utterance is a lexicon phrase, a filler
+        word or one of the patient's medicine names."""
+        rest = _PHRASE_RE.sub(" ", norm)
+        for pat in self._med_patterns:
+            rest = pat.sub(" ", rest)
+        return not rest.split()
+
+    def resolved(self) -> bool:
+        return self.wellness is not None and all(
+            name in self.status for name in self.medicines
+        )
+
+
+def fast_extract(transcript: list[dict], medicines: list[str]) -> dict | None:
+    """
+    Resolve a simple-confirmation call without the LLM.
+
+    Args:
+        transcript: List of {role: 'agent'|'user', message: str}
+        medicines: Medicine names the agent was asked to check
+
+    Returns:
+        Dict in the same shape as extract_call_data(), or None when any field
+        is ambiguous and the transcript should be escalated to Sarvam 105B.
+    """
+    if not transcript or not medicines:
+        return None
+
+    tracker = TurnTracker(medicines)
+    for turn in transcript:
+        if not tracker.feed(turn["role"], turn["message"]):
+            return None
+    if not tracker.resolved():
+        return None
+    if tracker.vitals_asked and tracker.vitals_checked == "not_applicable":
+        return None  # asked, never answered in a way we could read
+
+    return {
+        "medicine_responses": ",".join(
+            f"{name}:{tracker.status[name]}" for name in medicines
+        ),
+        "vitals_checked": tracker.vitals_checked,
+        "vitals": {"glucose": None, "blood_pressure": {"systolic": None, "diastolic": None}},
+        "wellness": tracker.wellness,
+        "complaints": "none",
+        "re_scheduled": "false",
+    }
@@ -0,0 +1,81 @@
+"""
+Per-process pool of pre-built STT/LLM/TTS plugin instances.
+
+LiveKit runs each job in a pre-spawned process and calls prewarm_fnc before
+a room is assigned. Building the plugins there (API-key resolution, Gemini
+client setup, option validation) takes that work off the answered-call path.
+When a job leases its plugins, connections are opened immediately — while
+the phone is still ringing — so the greeting doesn't wait on cold TCP/TLS/
+WebSocket setup to three services.
+
+Network I/O can't happen in prewarm itself: the plugins' HTTP session comes
+from the job's http_context, which only exists once the job starts. For the
+same reason a leased PluginSet is never returned to the pool: its session is
+closed with the job.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger("plugin-pool")
+
+
+@dataclass
+class PluginSet:
+    """One STT/LLM/TTS trio configured for a single language, plus the
+    backup LLM/TTS that hedged requests fall over to (see hedging.py)."""
+
+    language: str
+    stt: Any
+    llm: Any
+    tts: Any
+    backup_llm: Any = None
+    backup_tts: Any = None
+
+    def connect(self) -> None:
+        """Start opening provider connections in the background (needs a job context).
+
+        The backup TTS is left cold: most calls never hedge, and its
+        connection opens when a hedge first starts it."""
+        plugins = (self.stt, self.llm, self.tts, self.backup_llm)
+        for plugin in (p for p in plugins if p is not None):
+            try:
+                plugin.prewarm()
+            except Exception as e:
+                logger.warning(f"{type(plugin).__name__}.prewarm failed: {e}")
+
+
+class PluginPool:
+    """Idle PluginSets keyed by language, built ahead of time and leased per job."""
+
+    def __init__(self, factory: Callable[[str], PluginSet]) -> None:
+        self._factory = factory
+        self._idle: dict[str, list[PluginSet]] = {}
+
+    def warm(self, languages: Iterable[str]) -> None:
+        """Build one PluginSet per language. Safe to call from prewarm_fnc."""
+        for lang in languages:
+            started = time.perf_counter()
+            try:
+                self._idle.setdefault(lang, []).append(self._factory(lang))
+            except Exception as e:
+                logger.error(f"Failed to prewarm plugins for '{lang}': {e}")
+                continue
+            logger.info(
+                f"Prewarmed plugins for '{lang}' in "
+                f"{(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+
+    def lease(self, lang: str) -> PluginSet:
+        """Take a warm PluginSet for lang (building one on a miss) and connect it."""
+        idle = self._idle.get(lang)
+        if idle:
+            plugins = idle.pop()
+        else:
+            logger.info(f"No prewarmed plugins for '{lang}', building on demand")
+            plugins = self._factory(lang)
+        plugins.connect()
+        return plugins
@@ -3,68 +3,34 @@ System prompt for the medicine-check voice agent.
 Keep in sync with: apps/api/src/integrations/elevenlabs/elevenlabs-agent.service.ts getSystemPrompt()
 """
 
-LANGUAGE_MAP = {
-    'hi': 'Hindi',
-    'te': 'Telugu',
-    'ta': 'Tamil',
-    'kn': 'Kannada',
-    'ml': 'Malayalam',
-    'bn': 'Bengali',
-    'mr': 'Marathi',
-    'gu': 'Gujarati',
-    'pa': 'Punjabi',
-    'ur': 'Urdu',
-    'en': 'English',
-}
+import re
+from functools import lru_cache
 
+import language_packs
 
-def build_system_prompt(patient_data: dict) -> str:
-    lang_code = patient_data.get('preferredLanguage', 'hi')
-    preferred_language = LANGUAGE_MAP.get(lang_code, lang_code)
 
-    patient_name = patient_data.get('patientName') or 'ji'
-    is_new_patient = bool(patient_data.get('isNewPatient', False))
-    has_glucometer = bool(patient_data.get('hasGlucometer', False))
-    has_bp_monitor = bool(patient_data.get('hasBPMonitor', False))
+class PromptTemplate:
+    """Template precompiled into alternating static segments and {name} slots."""
 
-    medicines = patient_data.get('medicines', [])
-    medicine_count = len(medicines)
+    _SLOT_RE = re.compile(r"\{(\w+)\}")
 
-    # Group medicines by timing for clarity
-    timing_order = ['morning', 'afternoon', 'evening', 'night']
-    timing_groups: dict[str, list[str]] = {}
-    for m in medicines:
-        timing = m.get('timing', 'unknown')
-        timing_groups.setdefault(timing, []).append(m.get('name', 'Unknown'))
-    # Sort by natural timing order
-    sorted_parts = [
-        f"{t}: {', '.join(timing_groups[t])}"
-        for t in timing_order if t in timing_groups
-    ]
-    # Include any timings not in the standard order
-    sorted_parts += [
-        f"{t}: {', '.join(names)}"
-        for t, names in timing_groups.items() if t not in timing_order
-    ]
-    medicines_list = ' | '.join(sorted_parts)
-    # Build detailed numbered list for Step 2
-    medicines_detailed = ''
-    for timing in timing_order:
-        if timing not in timing_groups:
-            continue
-        medicines_detailed += f'\n  {timing.upper()} medicines:\n'
-        for i, name in enumerate(timing_groups[timing], 1):
-            medicines_detailed += f'    {i}. {name}\n'
+    def __init__(self, text: str) -> None:
+        parts = self._SLOT_RE.split(text)
+        self.segments = parts[0::2]
+        self.slots = parts[1::2]
 
-    # Build dynamic prompt sections (empty strings when not enabled)
-    dynamic = patient_data.get('dynamicPrompt') or {}
-    relationship_directive = dynamic.get('relationshipDirective', '')
-    tone_directive = dynamic.get('toneDirective', '')
-    flow_directive = dynamic.get('flowDirective', '')
-    context_notes = dynamic.get('contextNotes', '')
-    screening_questions = dynamic.get('screeningQuestions', '')
+    def render(self, values: dict[str, str]) -> str:
+        out = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            out.append(values[slot])
+            out.append(segment)
+        return ''.join(out)
 
-    return f"""You are {patient_name}'s caring health companion calling to check their medicines and wellbeing. Speak ONLY in {preferred_language}.
+
+# Compiled once at import: the prompt is split into static text segments and
+# named slots, so rendering is a single join instead of re-parsing a large
+# f-string and concatenating sections in a loop on every call.
+SYSTEM_PROMPT_TEMPLATE = PromptTemplate("""You are {patient_name}'s caring health companion calling to check their medicines and wellbeing. Speak ONLY in {preferred_language}.
 
 TONE & MANNER
 - Warm, respectful, like talking to family
@@ -81,7 +47,7 @@ MEDICINES TO CHECK:
 CALL FLOW
 1. GREETING — Warmly greet {patient_name} and ask how they're doing
 2. MEDICINES — Ask about EACH medicine by timing (morning → afternoon → evening → night)
-3. VITALS — {"Ask if they checked their glucometer/BP today. If YES, ask for the specific values (e.g., 'What was your blood sugar reading?' 'What was your BP?')" if (has_glucometer or has_bp_monitor) else ""}
+3. VITALS — {vitals_step}
 4. WELLNESS — Ask if they have any concerns or problems
 5. CLOSING — Say everything is noted and say goodbye
 
@@ -94,30 +60,86 @@ KEY RULES
 - If they mention severe pain/chest pain/breathing issues, tell them to call doctor/ or always refer 108 as emergency
 - If they mention health problems, empathize then suggest visiting doctor (don't diagnose)
 - Never contradict them (if they forgot, acknowledge it, don't say "good, you took it")
-{context_notes} {screening_questions if screening_questions else ""}"""
+{context_notes} {screening_questions}""")
 
+VITALS_STEP = (
+    "Ask if they checked their glucometer/BP today. If YES, ask for the specific values "
+    "(e.g., 'What was your blood sugar reading?' 'What was your BP?')"
+)
 
-GREETING_MAP = {
-    'hi': 'Namaste',
-    'te': 'Namaskaram',
-    'ta': 'Vanakkam',
-    'kn': 'Namaskara',
-    'ml': 'Namaskaram',
-    'bn': 'Nomoshkar',
-    'mr': 'Namaskar',
-    'gu': 'Namaste',
-    'pa': 'Sat Sri Akaal',
-    'ur': 'Assalaam Alaikum',
-    'en': 'Hello',
-}
+TIMING_ORDER = ('morning', 'afternoon', 'evening', 'night')
+
+
+def _system_prompt_key(patient_data: dict) -> tuple:
+    """The subset of patient_data the system prompt depends on, as a hashable key."""
+    dynamic = patient_data.get('dynamicPrompt') or {}
+    return (
+        patient_data.get('preferredLanguage', 'hi'),
+        patient_data.get('patientName') or 'ji',
+        bool(patient_data.get('hasGlucometer', False))
+        or bool(patient_data.get('hasBPMonitor', False)),
+        tuple(
+            (m.get('timing', 'unknown'), m.get('name', 'Unknown'))
+            for m in patient_data.get('medicines', [])
+        ),
+        str(dynamic.get('relationshipDirective', '')),
+        str(dynamic.get('toneDirective', '')),
+        str(dynamic.get('contextNotes', '')),
+        str(dynamic.get('screeningQuestions', '') or ''),
+    )
+
+
+@lru_cache(maxsize=512)
+def _render_system_prompt(key: tuple) -> str:
+    (lang_code, patient_name, has_vitals_device, medicines,
+     relationship_directive, tone_directive, context_notes, screening_questions) = key
+
+    # Group medicines by timing, then emit the numbered list for Step 2 in
+    # natural timing order (morning → afternoon → evening → night)
+    timing_groups: dict[str, list[str]] = {}
+    for timing, name in medicines:
+        timing_groups.setdefault(timing, []).append(name)
+    detailed: list[str] = []
+    for timing in TIMING_ORDER:
+        if timing not in timing_groups:
+            continue
+        detailed.append(f'\n  {timing.upper()} medicines:\n')
+        detailed.extend(
+            f'    {i}. {name}\n' for i, name in enumerate(timing_groups[timing], 1)
+        )
+
+    # A code without a language pack goes to Gemini as-is, like before the
+    # packs existed, rather than silently turning into the default language
+    pack = language_packs.PACKS.get(lang_code)
+    return SYSTEM_PROMPT_TEMPLATE.render({
+        'patient_name': patient_name,
+        'preferred_language': pack.name if pack is not None else lang_code,
+        'relationship_directive': relationship_directive,
+        'tone_directive': tone_directive,
+        'medicines_detailed': ''.join(detailed),
+        'vitals_step': VITALS_STEP if has_vitals_device else '',
+        'context_notes': context_notes,
+        'screening_questions': screening_questions,
+    })
+
+
+def build_system_prompt(patient_data: dict) -> str:
+    # The same patient is dialed several times a day with identical metadata,
+    # so repeat calls are served from the memo cache
+    return _render_system_prompt(_system_prompt_key(patient_data))
 
 
 def build_first_message(patient_data: dict) -> str:
     dynamic = patient_data.get('dynamicPrompt') or {}
-    first_message = dynamic.get('firstMessage')
+    return _render_first_message(
+        dynamic.get('firstMessage') or '',
+        patient_data.get('patientName', 'ji'),
+        patient_data.get('preferredLanguage', 'hi'),
+    )
+
+
+@lru_cache(maxsize=512)
+def _render_first_message(first_message: str, patient_name: str, lang_code: str) -> str:
     if first_message:
         return first_message
-    patient_name = patient_data.get('patientName', 'ji')
-    lang_code = patient_data.get('preferredLanguage', 'hi')
-    greeting = GREETING_MAP.get(lang_code, 'Namaste')
-    return f"{greeting} {patient_name}!"
+    return f"{language_packs.get(lang_code).greeting} {patient_name}!"
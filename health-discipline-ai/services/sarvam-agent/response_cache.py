@@ -0,0 +1,168 @@
+"""
+Speculative acknowledgements for routine patient turns.
+
+Most patient turns are a short answer to a question from the fixed CALL FLOW
+(prompt.py): "haan, le liya" to a medicine question, "theek hoon" to the
+greeting. For those the opening of the agent's reply is predictable — "very
+good", "okay", "no problem" — and those phrases are already synthesized in
+the greeting cache (LanguagePack.stock_phrases). Playing one the moment the
+turn ends covers Gemini's TTFT; the substantive follow-up is queued right
+behind it, and MedicineCheckAgent.llm_node trims Gemini's opening sentence
+when it is that same acknowledgement, so it isn't said twice.
+
+Decisions are memoized per process on (flow step, language, normalized
+utterance), since the same few replies recur across every call.
+
+An acknowledgement is only chosen when it cannot contradict the patient:
+the reply is short, has no numbers or question, reads as exactly one kind
+of answer in the lexicon, and says nothing about feeling unwell or calling
+back. "No problem" answers a missed dose, never "very good".
+"""
+
+import logging
+import re
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from language_packs import LanguagePack
+from lexicon import (
+    DONT_KNOW,
+    FEELING_GOOD,
+    NOT_TAKEN,
+    NOT_TIME_YET,
+    NOT_WELL,
+    RESCHEDULE,
+    TAKEN,
+    TAKEN_ALL,
+    TurnTracker,
+    classify,
+    normalize,
+)
+
+logger = logging.getLogger("response-cache")
+
+# Index into LanguagePack.stock_phrases
+NEUTRAL, POSITIVE, REASSURING = range(3)
+
+# Flow steps (CALL FLOW in prompt.py) where the patient's answer is routine
+GREETING = "greeting"
+MEDICINE = "medicine"
+VITALS = "vitals"
+
+# Longer replies usually carry something the acknowledgement would gloss over
+MAX_WORDS = 5
+MAX_ENTRIES = 4096
+
+# (step, the single answer category the reply reads as) → acknowledgement
+_ACKS: dict[tuple[str, str], int] = {
+    (GREETING, FEELING_GOOD): POSITIVE,
+    (MEDICINE, TAKEN): POSITIVE,
+    (MEDICINE, TAKEN_ALL): POSITIVE,
+    (MEDICINE, NOT_TAKEN): REASSURING,
+    (MEDICINE, NOT_TIME_YET): NEUTRAL,
+    (VITALS, TAKEN): NEUTRAL,  # "haan" — numbers (if any) come next
+    (VITALS, NOT_TAKEN): NEUTRAL,
+}
+# Categories that answer the same question in opposite ways
+_ANSWERS = {TAKEN, TAKEN_ALL, NOT_TAKEN, NOT_TIME_YET}
+
+_DIGIT_RE = re.compile(r"\d")
+
+# (step, language, normalized utterance) → stock phrase index or None
+_decisions: OrderedDict[tuple[str, str, str], int | None] = OrderedDict()
+
+
+def _choose(step: str, text: str) -> int | None:
+    if "?" in text or _DIGIT_RE.search(text) or len(text.split()) > MAX_WORDS:
+        return None
+    categories = classify(text)
+    if categories & {NOT_WELL, RESCHEDULE, DONT_KNOW}:
+        return None
+    answers = categories & _ANSWERS
+    if answers == {TAKEN, TAKEN_ALL}:
+        answers = {TAKEN_ALL}
+    if step == GREETING:
+        # "theek hoon", "haan, theek hoon"
+        if FEELING_GOOD in categories and categories <= {FEELING_GOOD, TAKEN}:
+            return _ACKS[GREETING, FEELING_GOOD]
+        return None
+    if len(answers) != 1:
+        return None
+    return _ACKS.get((step, answers.pop()))
+
+
+class SpeculativeAcks:
+    """Per-call lookup of an acknowledgement for the patient's latest turn."""
+
+    def __init__(self, pack: LanguagePack, medicines: list[str]) -> None:
+        self.pack = pack
+        self._tracker = TurnTracker(medicines)
+
+    def _step(self, agent_text: str, agent_turns: int) -> str | None:
+        """The CALL FLOW step the agent's last turn was asking about."""
+        self._tracker.feed("agent", agent_text)
+        if self._tracker.pending:
+            return MEDICINE
+        if self._tracker.vitals_pending:
+            return VITALS
+        if agent_turns == 1:
+            return GREETING
+        return None  # wellness / closing / off-flow: let Gemini answer
+
+    def lookup(self, agent_text: str, agent_turns: int, text: str) -> str | None:
+        """Stock phrase to play for the patient's reply `text` to the agent's
+        turn number `agent_turns`, `agent_text`; None to wait for Gemini."""
+        if len(self.pack.stock_phrases) <= REASSURING:
+            return None
+        step = self._step(agent_text, agent_turns)
+        if step is None:
+            return None
+        key = (step, self.pack.code, normalize(text))
+        if key in _decisions:
+            _decisions.move_to_end(key)
+            index = _decisions[key]
+        else:
+            index = _choose(step, text)
+            _decisions[key] = index
+            if len(_decisions) > MAX_ENTRIES:
+                _decisions.popitem(last=False)
+        return self.pack.stock_phrases[index] if index is not None else None
+
+
+class LeadTrimmer:
+    """Drops a leading acknowledgement ("बहुत बढ़िया!") from a streamed LLM
+    reply when it is one of `phrases` — the ones already played for the
+    turn. Any other opening sentence, however short, is kept."""
+
+    # Room beyond the longest phrase for spacing/punctuation differences
+    LEAD_SLACK_CHARS = 8
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self._phrases = {normalize(p) for p in phrases}
+        self._max_chars = max((len(p) for p in phrases), default=0) + self.LEAD_SLACK_CHARS
+        self._buffer = ""
+        self._done = False
+
+    def push(self, chunk: str) -> str:
+        if self._done:
+            return chunk
+        self._buffer += chunk
+        for i, ch in enumerate(self._buffer):
+            if ch == "?" or i >= self._max_chars:
+                return self.flush()
+            if ch in "!.।":
+                lead = self._buffer[: i + 1]
+                if normalize(lead) not in self._phrases:
+                    return self.flush()
+                self._done = True
+                rest = self._buffer[i + 1:].lstrip()
+                self._buffer = ""
+                logger.debug(f"Trimmed leading acknowledgement: {lead!r}")
+                return rest
+        return ""
+
+    def flush(self) -> str:
+        """Release whatever is held (end of reply, or no lead to trim)."""
+        self._done = True
+        out, self._buffer = self._buffer, ""
+        return out
@@ -0,0 +1,170 @@
+"""
+Cold-start profile for the agent worker (`python agent.py startup-profile`).
+
+Reports the three numbers that decide how fast a new container (or a
+scaled-up instance during a dialing burst) starts taking calls:
+
+  health   — how long `agent.py start` takes to bind the health port and to
+             report /ready, measured on a child process on a spare port
+             (it is stopped before it connects to LiveKit)
+  imports  — `python -X importtime -c "import agent"` in a fresh
+             interpreter, per module agent.py imports directly
+  prewarm  — the per-job-process prewarm (plugin construction, greeting
+             clip index), run in this process stage by stage
+
+Usage:
+  python agent.py startup-profile
+  python agent.py startup-profile --top 25 --skip-health
+"""
+
+import argparse
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import urllib.error
+import urllib.request
+from collections.abc import Callable
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEALTH_TIMEOUT = 30.0
+
+
+@contextlib.contextmanager
+def stage(timings: dict[str, float], name: str):
+    """Record the block's wall time in ms under timings[name]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _probe(port: int, path: str) -> int | None:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=0.5) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def profile_health(timeout: float = HEALTH_TIMEOUT) -> dict[str, float | None]:
+    """Time from spawning `agent.py start` to the port answering, then to /ready."""
+    port = _free_port()
+    scratch = tempfile.TemporaryDirectory(prefix="startup-profile-")
+    env = {
+        **os.environ,
+        "PORT": str(port),
+        # Keep the child away from LiveKit and from the real webhook journal
+        # and metrics: it is only here to be timed
+        "LIVEKIT_URL": "",
+        "WEBHOOK_JOURNAL_DIR": os.path.join(scratch.name, "webhooks"),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(scratch.name, "metrics"),
+        "ROOM_STATS_DIR": os.path.join(scratch.name, "rooms"),
+    }
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "agent.py"), "start"],
+        cwd=HERE,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    result: dict[str, float | None] = {"bound": None, "ready": None}
+    try:
+        while time.perf_counter() - start < timeout and proc.poll() is None:
+            status = _probe(port, "/ready")
+            now = (time.perf_counter() - start) * 1000
+            if status is not None and result["bound"] is None:
+                result["bound"] = now
+            if status == 200:
+                result["ready"] = now
+                break
+            time.sleep(0.005)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        scratch.cleanup()
+    return result
+
+
+def profile_imports() -> tuple[float, list[tuple[str, float]]]:
+    """Wall time of `import agent`, and cumulative ms per module agent.py
+    imports directly."""
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agent"],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    modules: dict[str, float] = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth != 1 or not cumulative.strip().isdigit():
+            continue  # only agent.py's own imports (one level below `agent`)
+        modules[name.strip()] = int(cumulative) / 1000
+    return wall, sorted(modules.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def profile_prewarm(prewarm: Callable) -> tuple[dict[str, float], str | None]:
+    """Run prewarm against a stand-in JobProcess; returns (stage timings, error)."""
+    proc = types.SimpleNamespace(userdata={})
+    try:
+        prewarm(proc)
+    except Exception as e:
+        return proc.userdata.get("prewarm_ms", {}), f"{type(e).__name__}: {e}"
+    return proc.userdata.get("prewarm_ms", {}), None
+
+
+def _ms(value: float | None) -> str:
+    return f"{value:8.0f}ms" if value is not None else "       n/a"
+
+
+def main(prewarm: Callable, argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="agent.py startup-profile")
+    parser.add_argument("--top", type=int, default=15, help="modules to list")
+    parser.add_argument(
+        "--skip-health", action="store_true", help="don't spawn a worker to time the health port"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.skip_health:
+        health = profile_health()
+        print("health")
+        print(f"  port bound   {_ms(health['bound'])}")
+        print(f"  /ready       {_ms(health['ready'])}")
+
+    wall, modules = profile_imports()
+    print(f"imports (import agent, {wall:.0f}ms wall incl. interpreter start)")
+    for name, ms in modules[: args.top]:
+        print(f"  {name:<28} {_ms(ms)}")
+
+    timings, error = profile_prewarm(prewarm)
+    print(f"prewarm ({sum(timings.values()):.0f}ms)")
+    for name, ms in timings.items():
+        print(f"  {name:<28} {_ms(ms)}")
+    if error:
+        print(f"  failed: {error}")
+        return 1
+    return 0
@@ -0,0 +1,191 @@
+"""
+Multi-process supervisor for the agent worker (`python agent.py supervise`).
+
+LiveKit already runs every call in its own job process, so audio pipelines
+don't share a GIL. What stays single-threaded is the worker's main process:
+dispatch handling, admission and load reporting, and process-pool
+management for every room on the container. Supervisor mode runs
+WORKER_PROCESSES (default: one per core) LiveKit worker processes side by
+side, each registering with LiveKit and taking its own share of
+dispatches.
+
+  - The supervisor imports agent.py (livekit, google and sarvam plugins
+    included) once, then forks the workers, so they start without
+    re-importing anything. The first workers are forked before any thread
+    is started; on_started then brings up the supervisor's own threads
+    (health server, webhook sender). Later restarts fork with those
+    running, so modules whose locks matter across a fork guard them with
+    os.register_at_fork (see webhook_queue.py).
+  - It serves the single health/metrics endpoint. Each worker writes its
+    Prometheus samples to its own subdirectory of PROMETHEUS_MULTIPROC_DIR
+    (LiveKit wipes that directory when a worker starts), and /metrics
+    merges all of them. A dead worker's counters and histograms are folded
+    into one retired subdirectory and its own is deleted, so totals don't
+    drop and restarts don't pile up directories. See worker_metrics.py.
+  - A worker that dies is restarted with exponential backoff.
+  - SIGTERM/SIGINT forward SIGTERM to every worker; LiveKit drains active
+    calls before exiting. Workers still running after DRAIN_TIMEOUT are
+    killed.
+  - SIGHUP does a rolling restart: for each worker a replacement is started
+    first, then the old one is drained.
+"""
+
+import logging
+import os
+import signal
+import time
+import traceback
+from collections.abc import Callable
+
+import worker_metrics
+
+logger = logging.getLogger("supervisor")
+
+WORKER_PROCESSES = int(os.environ.get("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+DRAIN_TIMEOUT = float(os.environ.get("SUPERVISOR_DRAIN_TIMEOUT", "600"))
+RESTART_BACKOFF_MAX = 30.0
+# A worker that stayed up this long before dying isn't crash-looping
+HEALTHY_UPTIME = 60.0
+POLL_INTERVAL = 0.5
+
+
+class Supervisor:
+    """Forks and babysits N LiveKit worker processes."""
+
+    def __init__(
+        self,
+        run_worker: Callable[[int], None],
+        processes: int = WORKER_PROCESSES,
+        drain_timeout: float = DRAIN_TIMEOUT,
+        on_started: Callable[[], None] | None = None,
+    ) -> None:
+        self._run_worker = run_worker
+        self._on_started = on_started
+        self.processes = max(1, processes)
+        self.drain_timeout = drain_timeout
+        self._children: dict[int, int] = {}  # pid → slot
+        self._metrics_dirs: dict[int, str] = {}  # pid → its metrics subdirectory
+        self._started: dict[int, float] = {}  # pid → spawn time
+        self._failures: dict[int, int] = {}  # slot → consecutive crashes
+        self._restart_at: dict[int, float] = {}  # slot → when to respawn
+        self._draining: dict[int, float] = {}  # pid → kill deadline
+        self._generation = 0
+        self._stopping = False
+        self._rolling: list[int] = []  # slots waiting for a rolling restart
+
+    # --- forking -------------------------------------------------------
+
+    def _spawn(self, slot: int) -> int:
+        self._generation += 1
+        metrics_root = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+        metrics_dir = os.path.join(metrics_root, f"worker-{slot}-{self._generation}")
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                    signal.signal(sig, signal.SIG_DFL)
+                os.makedirs(metrics_dir, exist_ok=True)
+                os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+                self._run_worker(slot)
+                code = 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        self._children[pid] = slot
+        self._metrics_dirs[pid] = metrics_dir
+        self._started[pid] = time.monotonic()
+        logger.info(f"Started worker {slot} (pid {pid})")
+        return pid
+
+    def _drain(self, pid: int) -> None:
+        if pid in self._draining:
+            return
+        self._draining[pid] = time.monotonic() + self.drain_timeout
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    # --- signals -------------------------------------------------------
+
+    def _on_stop(self, signum, frame) -> None:
+        if not self._stopping:
+            logger.info(f"Received {signal.Signals(signum).name}, draining workers")
+        self._stopping = True
+        for pid in list(self._children):
+            self._drain(pid)
+
+    def _on_reload(self, signum, frame) -> None:
+        if not self._stopping and not self._rolling:
+            logger.info("Received SIGHUP, rolling restart of workers")
+            self._rolling = sorted(set(self._children.values()))
+
+    # --- main loop -----------------------------------------------------
+
+    def _reap(self) -> None:
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self._children.pop(pid, None)
+            if slot is None:
+                continue
+            drained = self._draining.pop(pid, None) is not None
+            uptime = time.monotonic() - self._started.pop(pid, 0.0)
+            worker_metrics.retire_shard(self._metrics_dirs.pop(pid))
+            code = os.waitstatus_to_exitcode(status)
+            if drained or self._stopping:
+                logger.info(f"Worker {slot} (pid {pid}) exited ({code})")
+                continue
+            failures = 1 if uptime >= HEALTHY_UPTIME else self._failures.get(slot, 0) + 1
+            self._failures[slot] = failures
+            delay = min(2 ** (failures - 1), RESTART_BACKOFF_MAX)
+            logger.error(f"Worker {slot} (pid {pid}) died ({code}), restarting in {delay:.0f}s")
+            self._restart_at[slot] = time.monotonic() + delay
+
+    def _tick(self) -> None:
+        now = time.monotonic()
+        for slot, at in list(self._restart_at.items()):
+            if at <= now and not self._stopping:
+                del self._restart_at[slot]
+                self._spawn(slot)
+
+        # Rolling restart: one slot at a time — the replacement starts before
+        # the old worker drains, and the next slot waits until it has exited
+        if self._rolling and not self._stopping and not self._draining:
+            slot = self._rolling.pop(0)
+            old = [pid for pid, s in self._children.items() if s == slot]
+            self._spawn(slot)
+            for pid in old:
+                self._drain(pid)
+
+        for pid, deadline in list(self._draining.items()):
+            if now >= deadline and pid in self._children:
+                logger.warning(f"Worker pid {pid} still draining after timeout, killing")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        logger.info(f"Supervisor starting {self.processes} worker process(es)")
+        for slot in range(self.processes):
+            self._spawn(slot)
+        if self._on_started is not None:
+            self._on_started()
+        while self._children or (self._restart_at and not self._stopping):
+            time.sleep(POLL_INTERVAL)
+            self._reap()
+            self._tick()
+        logger.info("All workers exited")
+        return 0
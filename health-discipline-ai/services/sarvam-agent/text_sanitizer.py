@@ -0,0 +1,69 @@
+"""
+Streaming text sanitizer for the LLM → TTS path.
+
+Gemini sometimes returns **bold**, *italic*, #headings, or emoji that Sarvam
+TTS can't synthesize — producing silence or garbled audio. Every streamed
+token goes through here, so the cleanup is one precompiled str.translate
+pass per chunk (no regex engine, no per-pass string copies).
+
+Markdown and emoji are removed character by character, so tokens split
+across chunk boundaries ("*" + "*bold") are handled without lookahead. The
+only cross-chunk state is whitespace: a chunk that cleans down to just
+spaces (e.g. "** ") is held and prepended to the next real chunk instead of
+being dropped, which used to glue words together ("achha" + "ji" →
+"achhaji").
+"""
+
+MARKDOWN_CHARS = "*_#`~>|"
+
+# Same ranges the original emoji regex stripped. ZWJ (U+200D) is deliberately
+# kept: Indic scripts use it for conjuncts and half-forms.
+EMOJI_RANGES = [
+    (0x1F600, 0x1F64F),  # emoticons
+    (0x1F300, 0x1F5FF),  # symbols & pictographs
+    (0x1F680, 0x1F6FF),  # transport & map
+    (0x1F1E0, 0x1F1FF),  # flags
+    (0x2702, 0x27B0),  # dingbats
+    (0xFE00, 0xFE0F),  # variation selectors
+    (0x1F900, 0x1F9FF),  # supplemental symbols & pictographs
+    (0x1FA00, 0x1FA6F),  # chess symbols / extended-A
+]
+
+
+def _build_table() -> dict[int, None]:
+    table: dict[int, None] = {ord(c): None for c in MARKDOWN_CHARS}
+    for start, end in EMOJI_RANGES:
+        table.update(dict.fromkeys(range(start, end + 1)))
+    return table
+
+
+# Precompiled once at import — str.translate deletes every mapped codepoint
+# in a single C-level pass
+STRIP_TABLE = _build_table()
+
+
+def sanitize(text: str) -> str:
+    """Strip markdown and emoji from a complete string."""
+    return text.translate(STRIP_TABLE)
+
+
+class StreamingSanitizer:
+    """Per-reply sanitizer that carries whitespace across chunk boundaries."""
+
+    __slots__ = ("_pending_ws",)
+
+    def __init__(self) -> None:
+        self._pending_ws = ""
+
+    def push(self, chunk: str) -> str:
+        """Clean one streamed chunk. Returns "" when nothing should be emitted yet."""
+        cleaned = chunk.translate(STRIP_TABLE)
+        if not cleaned or cleaned.isspace():
+            if cleaned and not self._pending_ws:
+                self._pending_ws = cleaned[-1]  # one separator is enough for TTS
+            return ""
+        if self._pending_ws:
+            if not cleaned[0].isspace():
+                cleaned = self._pending_ws + cleaned
+            self._pending_ws = ""
+        return cleaned
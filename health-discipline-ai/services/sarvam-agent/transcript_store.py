@@ -0,0 +1,203 @@
+"""
+Compact per-call transcript store.
+
+One Turn per committed conversation item, with __slots__ instead of a dict
+per turn, plus the metadata LiveKit already attaches to each ChatMessage:
+when it was committed, the STT confidence, and the transcription delay
+(user turns) or end-to-end reply latency (agent turns).
+
+The store is the single source for everything downstream — the webhook
+payload, the extraction prompt and the incremental extractor's windows —
+so turns are read straight out of it rather than copied into intermediate
+lists and strings first.
+
+Memory is bounded: past max_turns in memory, the oldest half is appended
+to a JSONL spill file and dropped, so a pathological hour-long call costs
+the same RAM as a normal one. Iteration transparently reads the spilled
+turns back from disk.
+"""
+
+import enum
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterator
+from itertools import islice
+
+logger = logging.getLogger("transcript-store")
+
+MEMORY_TURNS = int(os.environ.get("TRANSCRIPT_MEMORY_TURNS", "200"))
+SPILL_DIR = os.environ.get("TRANSCRIPT_SPILL_DIR", tempfile.gettempdir())
+
+PROMPT_LABELS = {"agent": "Assistant", "user": "Patient"}
+
+
+class Role(str, enum.Enum):
+    AGENT = "agent"
+    USER = "user"
+
+
+def prompt_line(role: str, message: str) -> str:
+    """One transcript line as it appears in the extraction prompt."""
+    return f"{PROMPT_LABELS.get(role, 'Patient')}: {message}"
+
+
+class Turn:
+    __slots__ = ("role", "text", "timestamp", "confidence", "latency_ms")
+
+    def __init__(
+        self,
+        role: Role,
+        text: str,
+        timestamp: float,
+        confidence: float | None = None,
+        latency_ms: float | None = None,
+    ) -> None:
+        self.role = role
+        self.text = text
+        self.timestamp = timestamp
+        self.confidence = confidence
+        self.latency_ms = latency_ms
+
+    def to_dict(self) -> dict:
+        """Webhook shape: {role, message} plus whatever metadata we have.
+
+        The timestamp goes out as epoch milliseconds — the backend stores it
+        with `new Date(entry.timestamp)`.
+        """
+        d = {
+            "role": self.role.value,
+            "message": self.text,
+            "timestamp": int(self.timestamp * 1000),
+        }
+        if self.confidence is not None:
+            d["confidence"] = self.confidence
+        if self.latency_ms is not None:
+            d["latencyMs"] = self.latency_ms
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Turn":
+        return cls(
+            Role(d["role"]),
+            d["message"],
+            d.get("timestamp", 0) / 1000,
+            d.get("confidence"),
+            d.get("latencyMs"),
+        )
+
+
+def item_text(item) -> str:
+    """Plain text of a ChatMessage (text parts, or the transcript of audio parts)."""
+    parts = []
+    for c in getattr(item, "content", None) or []:
+        if isinstance(c, str):
+            parts.append(c)
+        elif getattr(c, "transcript", None):
+            parts.append(c.transcript)
+    return " ".join(parts).strip()
+
+
+class TranscriptStore:
+    """Append-only transcript for one call with a bounded in-memory tail."""
+
+    def __init__(self, max_turns: int = MEMORY_TURNS, spill_dir: str = SPILL_DIR) -> None:
+        self._max_turns = max(2, max_turns)
+        self._spill_dir = spill_dir
+        self._spill_path: str | None = None
+        self._spilled = 0
+        self._turns: list[Turn] = []
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._turns)
+
+    def append(
+        self,
+        role: Role | str,
+        text: str,
+        timestamp: float,
+        confidence: float | None = None,
+        latency_ms: float | None = None,
+    ) -> Turn:
+        turn = Turn(Role(role), text, timestamp, confidence, latency_ms)
+        self._turns.append(turn)
+        if len(self._turns) > self._max_turns:
+            self._spill(self._max_turns // 2)
+        return turn
+
+    def add_item(self, item) -> Turn | None:
+        """Append a committed ChatMessage; skips system/developer and empty items."""
+        role = getattr(item, "role", "")
+        if role not in ("user", "assistant"):
+            return None
+        text = item_text(item)
+        if not text:
+            return None
+        metrics = getattr(item, "metrics", None) or {}
+        if role == "user":
+            delay = metrics.get("transcription_delay")
+        else:
+            delay = metrics.get("e2e_latency")
+        return self.append(
+            Role.USER if role == "user" else Role.AGENT,
+            text,
+            getattr(item, "created_at", 0.0),
+            getattr(item, "transcript_confidence", None),
+            round(delay * 1000) if delay is not None else None,
+        )
+
+    def _spill(self, n: int) -> None:
+        try:
+            if self._spill_path is None:
+                fd, self._spill_path = tempfile.mkstemp(
+                    dir=self._spill_dir, prefix="transcript-", suffix=".jsonl"
+                )
+                os.close(fd)
+            with open(self._spill_path, "a", encoding="utf-8") as f:
+                for turn in self._turns[:n]:
+                    f.write(json.dumps(turn.to_dict(), ensure_ascii=False))
+                    f.write("\n")
+        except OSError as e:
+            # Keep everything in memory rather than lose turns
+            logger.error(f"Transcript spill failed, keeping turns in memory: {e}")
+            return
+        del self._turns[:n]
+        self._spilled += n
+
+    def _iter_spilled(self) -> Iterator[Turn]:
+        if self._spill_path is None:
+            return
+        with open(self._spill_path, encoding="utf-8") as f:
+            for line in f:
+                yield Turn.from_dict(json.loads(line))
+
+    def __iter__(self) -> Iterator[Turn]:
+        yield from self._iter_spilled()
+        yield from self._turns
+
+    def window(self, start: int, end: int | None = None) -> Iterator[Turn]:
+        """Turns [start, end) by overall index; only touches disk if start was spilled."""
+        end = len(self) if end is None else end
+        if start >= self._spilled:
+            yield from self._turns[start - self._spilled:end - self._spilled]
+        else:
+            yield from islice(self, start, end)
+
+    def to_payload(self) -> list[dict]:
+        return [turn.to_dict() for turn in self]
+
+    def prompt_text(self, start: int = 0, end: int | None = None) -> str:
+        """Turns [start, end) formatted for EXTRACTION_PROMPT."""
+        return "\n".join(
+            prompt_line(turn.role.value, turn.text) for turn in self.window(start, end)
+        )
+
+    def close(self) -> None:
+        """Remove the spill file (the turns themselves are gone after this)."""
+        if self._spill_path is not None:
+            try:
+                os.unlink(self._spill_path)
+            except FileNotFoundError:
+                pass
+            self._spill_path = None
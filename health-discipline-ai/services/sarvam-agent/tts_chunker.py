@@ -0,0 +1,142 @@
+"""
+Clause-aware chunk scheduler between llm_node and Sarvam TTS.
+
+Sarvam's streaming TTS sends text to its WebSocket in units produced by a
+sentence tokenizer. The stock LiveKit tokenizer only splits on . ! ? — it
+doesn't know the danda (।), so a Hindi/Marathi/Bengali reply reaches TTS as
+one unit at the end of generation (slow first audio), while short English
+fragments get synthesized separately (choppy prosody).
+
+ClauseScheduler replaces it with units that fit Indic speech:
+  - The first unit of each reply is cut at the first clause boundary
+    (danda, comma, ?, !) once it reaches first_min_chars — so "नमस्ते जी,"
+    starts playing while Gemini is still generating the rest.
+  - Later units are batched to whole sentences of at least min_chars, which
+    gives TTS enough context for natural prosody.
+  - Nothing grows past max_chars: an over-long run is cut at the last clause
+    boundary, or failing that the last space.
+"""
+
+import os
+import re
+
+from livekit.agents import tokenize
+from livekit.agents.utils import shortuuid
+
+FIRST_MIN_CHARS = int(os.environ.get("TTS_FIRST_CHUNK_CHARS", "8"))
+MIN_CHARS = int(os.environ.get("TTS_MIN_CHUNK_CHARS", "40"))
+MAX_CHARS = int(os.environ.get("TTS_MAX_CHUNK_CHARS", "200"))
+
+# "." only counts when followed by whitespace, so "120.5" and "Dr.Sharma"
+# don't split; at the end of the buffer we wait for the next token to decide.
+_SENTENCE_END_RE = re.compile(r"[।॥!?]+|\.(?=\s)")
+_CLAUSE_END_RE = re.compile(r"[।॥!?,;:،]+|\.(?=\s)")
+
+
+def _first_boundary(pattern: re.Pattern, text: str, min_len: int) -> int | None:
+    """Index just past the first boundary ending at or after min_len."""
+    for m in pattern.finditer(text, max(min_len - 1, 0)):
+        return m.end()
+    return None
+
+
+def _last_boundary(pattern: re.Pattern, text: str) -> int | None:
+    end = None
+    for m in pattern.finditer(text):
+        end = m.end()
+    return end
+
+
+def next_cut(
+    buf: str, first: bool, first_min: int, min_chars: int, max_chars: int
+) -> int | None:
+    """Where to cut the next TTS unit from buf, or None to keep buffering."""
+    if first:
+        cut = _first_boundary(_CLAUSE_END_RE, buf, first_min)
+    else:
+        cut = _first_boundary(_SENTENCE_END_RE, buf, min_chars)
+    if cut is not None and cut <= max_chars:
+        return cut
+    if len(buf) < max_chars:
+        return None
+    window = buf[:max_chars]
+    cut = _last_boundary(_CLAUSE_END_RE, window) or window.rfind(" ")
+    return cut if cut and cut > 0 else max_chars
+
+
+class ClauseStream(tokenize.SentenceStream):
+    def __init__(self, first_min: int, min_chars: int, max_chars: int) -> None:
+        super().__init__()
+        self._first_min = first_min
+        self._min_chars = min_chars
+        self._max_chars = max_chars
+        self._buf = ""
+        self._first = True
+        self._segment_id = shortuuid()
+
+    def push_text(self, text: str) -> None:
+        self._check_not_closed()
+        self._buf += text
+        while True:
+            cut = next_cut(
+                self._buf, self._first, self._first_min, self._min_chars, self._max_chars
+            )
+            if cut is None:
+                return
+            self._emit(self._buf[:cut])
+            self._buf = self._buf[cut:].lstrip()
+
+    def _emit(self, unit: str) -> None:
+        unit = unit.strip()
+        if unit:
+            self._event_ch.send_nowait(
+                tokenize.TokenData(token=unit, segment_id=self._segment_id)
+            )
+            self._first = False
+
+    def flush(self) -> None:
+        self._check_not_closed()
+        self._emit(self._buf)
+        # A flush ends the reply; the next one gets a fast first unit again
+        self._buf = ""
+        self._first = True
+        self._segment_id = shortuuid()
+
+    def end_input(self) -> None:
+        self.flush()
+        self._do_close()
+
+    async def aclose(self) -> None:
+        self._do_close()
+
+
+class ClauseScheduler(tokenize.SentenceTokenizer):
+    """SentenceTokenizer that emits a fast first clause, then sentence batches."""
+
+    def __init__(
+        self,
+        first_min_chars: int = FIRST_MIN_CHARS,
+        min_chars: int = MIN_CHARS,
+        max_chars: int = MAX_CHARS,
+    ) -> None:
+        self.first_min_chars = first_min_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+
+    def tokenize(self, text: str, *, language: str | None = None) -> list[str]:
+        units: list[str] = []
+        first = True
+        while True:
+            cut = next_cut(text, first, self.first_min_chars, self.min_chars, self.max_chars)
+            if cut is None:
+                break
+            if unit := text[:cut].strip():
+                units.append(unit)
+                first = False
+            text = text[cut:].lstrip()
+        if unit := text.strip():
+            units.append(unit)
+        return units
+
+    def stream(self, *, language: str | None = None) -> ClauseStream:
+        return ClauseStream(self.first_min_chars, self.min_chars, self.max_chars)
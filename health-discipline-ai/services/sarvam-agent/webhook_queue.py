@@ -0,0 +1,329 @@
+"""
+Durable delivery of post-call webhooks to the NestJS backend.
+
+The call result used to be POSTed once, synchronously, from the session's
+close handler: a slow backend stalled the job's event loop for up to 15s,
+and a failed POST (or a crash before it) lost the transcript for good.
+
+Delivery now goes through an append-only journal on local disk:
+
+  1. enqueue()  — the job process appends the payload to journal.jsonl and
+                  fsyncs before the close handler returns.
+  2. deliver()  — the job then POSTs it asynchronously over the pooled
+                  client (http_pool.py), with a few quick retries, before
+                  its process exits. Success appends an ack.
+  3. DeliveryWorker — a background thread in the long-lived main worker
+                  process rescans the journal and retries anything still
+                  unacknowledged (backend down, job crashed, worker
+                  restarted) with jittered exponential backoff.
+
+The journal only outlives the instance if WEBHOOK_JOURNAL_DIR points at
+persistent storage (see the Dockerfile). Unset, it falls back to the tmp
+dir, which on Cloud Run is memory-backed: entries still pending when the
+instance is shut down or crashes are lost, and the worker warns about it
+at startup.
+
+Every POST carries an Idempotency-Key of the callId; the backend already
+ignores repeat results for a completed call, so an entry delivered twice
+(e.g. a job crash between the POST and its ack) is harmless.
+
+Journal records, one JSON object per line:
+  {"op": "enqueue", "id", "key", "url", "payload", "ts"}
+  {"op": "ack", "id"}   — delivered
+  {"op": "dead", "id"}  — given up (permanent 4xx, or too many attempts)
+
+Job processes and the main process append under an flock on
+journal.lock. Compaction rewrites the file with only pending entries
+under the same lock. A fork waits until no thread is inside a locked
+section: the child would inherit the open lock file, and the flock would
+stay held until the child closed it.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+import httpx
+
+import http_pool
+import worker_metrics
+
+logger = logging.getLogger("webhook-queue")
+
+JOURNAL_DIR_CONFIGURED = bool(os.environ.get("WEBHOOK_JOURNAL_DIR"))
+WEBHOOK_JOURNAL_DIR = os.environ.get("WEBHOOK_JOURNAL_DIR") or os.path.join(
+    tempfile.gettempdir(), "sarvam-webhooks"
+)
+WEBHOOK_TIMEOUT = float(os.environ.get("WEBHOOK_TIMEOUT", "15"))
+# Attempts made by the job itself before leaving the entry to the sender
+INLINE_ATTEMPTS = int(os.environ.get("WEBHOOK_INLINE_ATTEMPTS", "3"))
+INLINE_DEADLINE = float(os.environ.get("WEBHOOK_INLINE_DEADLINE", "30"))
+# Background sender
+SCAN_INTERVAL = float(os.environ.get("WEBHOOK_SCAN_INTERVAL", "5"))
+SENDER_CONCURRENCY = int(os.environ.get("WEBHOOK_SENDER_CONCURRENCY", "4"))
+MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", "30"))
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 300.0
+# Entries younger than this are still owned by their job's inline delivery
+HANDOFF_AGE = INLINE_DEADLINE + WEBHOOK_TIMEOUT
+COMPACT_BYTES = 1 << 20
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Held around every flock section and across os.fork() (the supervisor
+# forks workers while its DeliveryWorker thread is running)
+_fork_guard = threading.Lock()
+os.register_at_fork(
+    before=_fork_guard.acquire,
+    after_in_parent=_fork_guard.release,
+    after_in_child=_fork_guard.release,
+)
+
+
+class WebhookJournal:
+    """Append-only JSONL journal shared by every process on the instance."""
+
+    def __init__(self, directory: str = WEBHOOK_JOURNAL_DIR) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._path = os.path.join(directory, "journal.jsonl")
+        self._lock_path = os.path.join(directory, "journal.lock")
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with _fork_guard, open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def append(self, record: dict, sync: bool = False) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._locked():
+            fd = os.open(self._path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                if sync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _read(self) -> list[dict]:
+        records = []
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Torn final line from a crash mid-append
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    @staticmethod
+    def _pending(records: list[dict]) -> list[dict]:
+        entries: dict[str, dict] = {}
+        for record in records:
+            op = record.get("op")
+            if op == "enqueue":
+                entries[record["id"]] = record
+            elif op in ("ack", "dead"):
+                entries.pop(record.get("id"), None)
+        return list(entries.values())
+
+    def pending(self) -> list[dict]:
+        """Enqueued entries that are neither acked nor dead, oldest first."""
+        return self._pending(self._read())
+
+    def compact(self) -> None:
+        """Rewrite the journal keeping only pending entries, once it gets large."""
+        try:
+            if os.path.getsize(self._path) < COMPACT_BYTES:
+                return
+        except FileNotFoundError:
+            return
+        with self._locked():
+            pending = self._pending(self._read())
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".jsonl")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for entry in pending:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path)
+        logger.info(f"Compacted webhook journal to {len(pending)} pending entries")
+
+
+def _retry_delay(attempt: int) -> float:
+    delay = min(RETRY_BASE_DELAY * (2 ** attempt), RETRY_MAX_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class WebhookQueue:
+    """Per-process handle for enqueueing and delivering webhook entries."""
+
+    def __init__(self, journal: WebhookJournal | None = None) -> None:
+        self.journal = journal or WebhookJournal()
+
+    def enqueue(self, url: str, payload: dict) -> dict:
+        """Durably journal a webhook. Synchronous: safe to call from event callbacks."""
+        entry = {
+            "op": "enqueue",
+            "id": uuid.uuid4().hex,
+            "key": payload.get("callId", ""),
+            "url": url,
+            "payload": payload,
+            "ts": time.time(),
+        }
+        self.journal.append(entry, sync=True)
+        return entry
+
+    async def attempt(self, entry: dict) -> bool | None:
+        """POST an entry once. True = delivered, None = retryable, False = permanent failure."""
+        kind = entry["payload"].get("terminationReason", "unknown")
+        started = time.perf_counter()
+        try:
+            resp = await http_pool.client_for(entry["url"]).post(
+                entry["url"],
+                json=entry["payload"],
+                headers={"Idempotency-Key": entry["key"]},
+                timeout=WEBHOOK_TIMEOUT,
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f"Webhook POST for callId={entry['key']} failed: {e!r}")
+            worker_metrics.record_webhook(kind, False, time.perf_counter() - started)
+            return None
+        worker_metrics.record_webhook(kind, resp.is_success, time.perf_counter() - started)
+        if resp.is_success:
+            logger.info(f"Webhook POST for callId={entry['key']}: status={resp.status_code}")
+            await asyncio.to_thread(self.journal.append, {"op": "ack", "id": entry["id"]})
+            return True
+        logger.warning(
+            f"Webhook POST for callId={entry['key']}: status={resp.status_code} "
+            f"{resp.text[:200]}"
+        )
+        return None if resp.status_code in RETRYABLE_STATUS else False
+
+    async def deliver(self, entry: dict, attempts: int = INLINE_ATTEMPTS) -> bool:
+        """Try to deliver an entry now; on failure it stays in the journal for the sender."""
+        for attempt in range(attempts):
+            result = await self.attempt(entry)
+            if result is not None:
+                if result is False:
+                    await asyncio.to_thread(self.mark_dead, entry, "permanent error")
+                return result
+            if attempt + 1 < attempts:
+                await asyncio.sleep(_retry_delay(attempt))
+        logger.warning(
+            f"Webhook for callId={entry['key']} not delivered yet; left for background retry"
+        )
+        return False
+
+    def mark_dead(self, entry: dict, reason: str) -> None:
+        logger.error(f"Giving up on webhook for callId={entry['key']}: {reason}")
+        self.journal.append({"op": "dead", "id": entry["id"], "reason": reason})
+
+
+class DeliveryWorker(threading.Thread):
+    """Background sender for the main worker process.
+
+    Runs its own event loop in a daemon thread so retries never touch the
+    LiveKit worker's loop. Pending entries are replayed on startup; stop()
+    makes one last pass before the process exits.
+    """
+
+    def __init__(self, queue: WebhookQueue | None = None) -> None:
+        super().__init__(name="webhook-sender", daemon=True)
+        self.queue = queue or WebhookQueue()
+        self._attempts: dict[str, int] = {}
+        self._next_at: dict[str, float] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping: asyncio.Event | None = None
+
+    def start(self) -> None:
+        if not JOURNAL_DIR_CONFIGURED:
+            logger.warning(
+                "WEBHOOK_JOURNAL_DIR is not set: journaling webhooks to "
+                f"{self.queue.journal.directory}, which does not survive an instance "
+                "restart (tmpfs on Cloud Run). Undelivered call results will be lost; "
+                "point it at a persistent volume."
+            )
+        super().start()
+        # The final pass needs the default executor (journal reads, DNS for
+        # the POSTs). Plain atexit handlers run after concurrent.futures has
+        # shut it down; threading's exit hooks run before.
+        threading._register_atexit(self.stop)
+
+    def run(self) -> None:
+        asyncio.run(self._run())
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._loop is not None and self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        self.join(timeout)
+
+    async def _run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        sem = asyncio.Semaphore(max(1, SENDER_CONCURRENCY))
+        try:
+            while True:
+                # First pass one interval after startup, once the LiveKit
+                # worker has reset the shared metrics directory
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), SCAN_INTERVAL)
+                    stopping = True
+                except asyncio.TimeoutError:
+                    stopping = False
+                try:
+                    await self._pass(sem, final=stopping)
+                except Exception as e:
+                    logger.error(f"Webhook sender pass failed: {e}")
+                if stopping:
+                    return
+        finally:
+            await http_pool.aclose()
+
+    async def _pass(self, sem: asyncio.Semaphore, final: bool) -> None:
+        journal = self.queue.journal
+        pending = await asyncio.to_thread(journal.pending)
+        now = time.time()
+        due = [
+            entry
+            for entry in pending
+            if now - entry.get("ts", 0) >= HANDOFF_AGE
+            and (final or self._next_at.get(entry["id"], 0) <= now)
+        ]
+
+        async def send(entry: dict) -> None:
+            async with sem:
+                result = await self.queue.attempt(entry)
+            entry_id = entry["id"]
+            if result is True:
+                self._forget(entry_id)
+                return
+            attempts = self._attempts.get(entry_id, 0) + 1
+            if result is False or attempts >= MAX_ATTEMPTS:
+                reason = "permanent error" if result is False else f"{attempts} attempts"
+                await asyncio.to_thread(self.queue.mark_dead, entry, reason)
+                self._forget(entry_id)
+                return
+            self._attempts[entry_id] = attempts
+            self._next_at[entry_id] = time.time() + _retry_delay(attempts)
+
+        if due:
+            logger.info(f"Retrying {len(due)} pending webhook(s)")
+            await asyncio.gather(*(send(entry) for entry in due))
+        await asyncio.to_thread(journal.compact)
+
+    def _forget(self, entry_id: str) -> None:
+        self._attempts.pop(entry_id, None)
+        self._next_at.pop(entry_id, None)
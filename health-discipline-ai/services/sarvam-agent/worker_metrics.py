@@ -0,0 +1,264 @@
+"""
+Prometheus metrics for the agent worker.
+
+LiveKit runs every call in its own job process, while the health server
+runs as a thread in the main worker process — so metrics recorded during a
+call live in a different process from the one that serves /metrics. We use
+prometheus_client's multiprocess mode: each process writes its samples to
+mmap'd files under PROMETHEUS_MULTIPROC_DIR and the health server merges
+them on scrape. LiveKit's own lk_agents_* worker metrics come out of the
+same directory.
+
+PROMETHEUS_MULTIPROC_DIR has to be set before prometheus_client is first
+imported (livekit.agents imports it), so agent.py imports this module
+ahead of LiveKit. The worker wipes the directory when it starts; in
+supervisor mode each worker gets its own subdirectory and render() merges
+them all. When a worker dies, retire_shard() folds its counters and
+histograms into one "retired" subdirectory and deletes its own, so
+restarts don't leave a directory (and a file per job process) behind each.
+
+Every metric here is labelled: an unlabelled metric opens its sample file
+at import time, and the main process imports this module before the worker
+wipes the directory.
+"""
+
+import asyncio
+import glob
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Callable
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "sarvam-agent-metrics")
+)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+import prometheus_client  # noqa: E402
+from prometheus_client import multiprocess  # noqa: E402
+from prometheus_client.mmap_dict import MmapedDict  # noqa: E402
+
+logger = logging.getLogger("worker-metrics")
+
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", "0.5"))
+
+# Latency buckets in seconds, from fast STT finals up to slow LLM turns
+_LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+ACTIVE_ROOMS = prometheus_client.Gauge(
+    "sarvam_active_rooms",
+    "Calls currently in progress",
+    ["language"],
+    multiprocess_mode="livesum",
+)
+
+JOBS = prometheus_client.Counter(
+    "sarvam_jobs",
+    "Job requests handled by this worker",
+    ["decision"],  # accepted | rejected
+)
+
+WEBHOOKS = prometheus_client.Counter(
+    "sarvam_webhooks",
+    "Post-call webhook deliveries",
+    ["kind", "outcome"],  # kind: terminationReason; outcome: success | failure
+)
+
+WEBHOOK_LATENCY = prometheus_client.Histogram(
+    "sarvam_webhook_latency_seconds",
+    "Post-call webhook round-trip time",
+    ["kind"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+DIAL_OUTCOMES = prometheus_client.Histogram(
+    "sarvam_dial_outcome_seconds",
+    "Time spent waiting for the callee to answer or the dial to fail",
+    ["outcome"],  # answered | no_answer | busy | unanswered | dial_failed | sip_failure
+    buckets=(1.0, 2.5, 5.0, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0),
+)
+
+EXTRACTIONS = prometheus_client.Counter(
+    "sarvam_extractions",
+    "Post-call extractions by how they were resolved",
+    ["source"],  # local | cache | llm | partial | fallback | error (batch only)
+)
+
+EXTRACTION_FOLLOW_UPS = prometheus_client.Counter(
+    "sarvam_extraction_follow_ups",
+    "Follow-up requests for fields missing from a truncated/malformed extraction",
+    ["outcome"],  # complete | incomplete
+)
+
+PLUGIN_ERRORS = prometheus_client.Counter(
+    "sarvam_plugin_errors",
+    "Errors raised by the STT/LLM/TTS plugins during a call",
+    ["plugin", "recoverable"],
+)
+
+TURN_LATENCY = prometheus_client.Histogram(
+    "sarvam_turn_latency_seconds",
+    "Per-turn pipeline stage latency (see latency_tracer.py)",
+    ["stage", "language"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+SPECULATIVE_ACKS = prometheus_client.Counter(
+    "sarvam_speculative_acks",
+    "Cached acknowledgements played ahead of the LLM reply (see response_cache.py)",
+    ["language"],
+)
+
+HEDGES = prometheus_client.Counter(
+    "sarvam_hedges",
+    "LLM/TTS requests by which stream answered first (see hedging.py)",
+    ["kind", "language", "outcome"],
+)
+
+CIRCUIT_OPENS = prometheus_client.Counter(
+    "sarvam_circuit_opens",
+    "Times a provider circuit breaker opened (see hedging.py)",
+    ["circuit"],
+)
+
+LOOP_LAG = prometheus_client.Histogram(
+    "sarvam_event_loop_lag_seconds",
+    "How late the job's event loop wakes up from a timed sleep",
+    ["process"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+LOOP_LAG_MAX = prometheus_client.Gauge(
+    "sarvam_event_loop_lag_max_seconds",
+    "Event-loop lag at the last sample, worst across live job processes",
+    ["process"],
+    multiprocess_mode="livemax",
+)
+
+
+def record_job(accepted: bool) -> None:
+    JOBS.labels(decision="accepted" if accepted else "rejected").inc()
+
+
+def record_webhook(kind: str, ok: bool, seconds: float) -> None:
+    WEBHOOKS.labels(kind=kind, outcome="success" if ok else "failure").inc()
+    WEBHOOK_LATENCY.labels(kind=kind).observe(seconds)
+
+
+def record_dial_outcome(outcome: str, seconds: float) -> None:
+    DIAL_OUTCOMES.labels(outcome=outcome).observe(seconds)
+
+
+def record_extraction(source: str) -> None:
+    EXTRACTIONS.labels(source=source).inc()
+
+
+def record_extraction_follow_up(complete: bool) -> None:
+    EXTRACTION_FOLLOW_UPS.labels(outcome="complete" if complete else "incomplete").inc()
+
+
+def record_plugin_error(error) -> None:
+    """Count a session ErrorEvent.error (STTError / LLMError / TTSError)."""
+    plugin = getattr(error, "type", "unknown").removesuffix("_error")
+    recoverable = "true" if getattr(error, "recoverable", False) else "false"
+    PLUGIN_ERRORS.labels(plugin=plugin, recoverable=recoverable).inc()
+
+
+def record_turn_latency(stage: str, language: str, ms: float) -> None:
+    TURN_LATENCY.labels(stage=stage, language=language).observe(ms / 1000)
+
+
+def record_speculative_ack(language: str) -> None:
+    SPECULATIVE_ACKS.labels(language=language).inc()
+
+
+def record_hedge(kind: str, language: str, outcome: str) -> None:
+    HEDGES.labels(kind=kind, language=language, outcome=outcome).inc()
+
+
+def record_circuit_open(circuit: str) -> None:
+    CIRCUIT_OPENS.labels(circuit=circuit).inc()
+
+
+async def monitor_loop_lag(
+    interval: float = LOOP_LAG_INTERVAL,
+    on_sample: Callable[[float], None] | None = None,
+) -> None:
+    """Sample event-loop lag until cancelled.
+
+    Sleeps for `interval` and records how much later than requested the
+    loop woke up — time the loop spent on other callbacks (audio frames,
+    JSON parsing, synchronous I/O) instead of serving this one. Each sample
+    is also passed to on_sample (the capacity RoomMonitor).
+    """
+    loop = asyncio.get_running_loop()
+    hist = LOOP_LAG.labels(process="job")
+    gauge = LOOP_LAG_MAX.labels(process="job")
+    try:
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(loop.time() - started - interval, 0.0)
+            hist.observe(lag)
+            gauge.set(lag)
+            if on_sample is not None:
+                on_sample(lag)
+    finally:
+        gauge.set(0)
+
+
+RETIRED_SHARD = "retired"
+# Held while a shard is folded into RETIRED_SHARD, so a scrape never counts
+# it twice or not at all (both run in the supervisor process)
+_shards_lock = threading.Lock()
+
+
+def retire_shard(path: str) -> None:
+    """Fold a dead worker's metrics directory into the retired shard and
+    delete it. Counters and histograms are added on, so merged totals never
+    go backwards when a worker is replaced; its gauges describe processes
+    that are gone and are dropped."""
+    totals: dict[str, dict[str, float]] = {}  # type → sample key → value
+    for f in glob.glob(os.path.join(path, "*.db")):
+        typ = os.path.basename(f).split("_")[0]
+        if typ == "gauge":
+            continue
+        values = totals.setdefault(typ, {})
+        for key, value, _, _ in MmapedDict.read_all_values_from_file(f):
+            values[key] = values.get(key, 0.0) + value
+
+    retired = os.path.join(os.path.dirname(path), RETIRED_SHARD)
+    os.makedirs(retired, exist_ok=True)
+    with _shards_lock:
+        for typ, values in totals.items():
+            shard = MmapedDict(os.path.join(retired, f"{typ}_retired.db"))
+            try:
+                for key, value in values.items():
+                    total, _ = shard.read_value(key)
+                    shard.write_value(key, total + value, 0.0)
+            finally:
+                shard.close()
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class _ShardedCollector:
+    """MultiProcessCollector over PROMETHEUS_MULTIPROC_DIR and its immediate
+    subdirectories — one per worker in supervisor mode (see supervisor.py)."""
+
+    def __init__(self, root: str) -> None:
+        self._root = root
+
+    def collect(self):
+        with _shards_lock:
+            files = glob.glob(os.path.join(self._root, "*.db"))
+            files += glob.glob(os.path.join(self._root, "*", "*.db"))
+            return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def render() -> tuple[bytes, str]:
+    """Merge every process's samples into Prometheus text format."""
+    registry = prometheus_client.CollectorRegistry()
+    registry.register(_ShardedCollector(os.environ["PROMETHEUS_MULTIPROC_DIR"]))
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST